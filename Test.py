@@ -1,20 +1,54 @@
 import streamlit as st
 import pandas as pd
-import base64
 import os
-from datetime import datetime, timedelta
+import functools
+import time
+from datetime import date, datetime, timedelta
 import plotly.graph_objects as go
 import plotly.express as px
+from assets import prepare_assets
+from charts import combo_chart, payload_size
+from aggregates import build_filter_index, periods, period_start, dashboard_aggregates, build_target_table, target_vs_ach_aggregates
+from data_loader import source_registry, enable_copy_on_write, frame_digest, filter_options, read_target_file, shared_view, freeze_arrays
+from dataset_store import DatasetStore, build_dataset, history_view
+from file_watcher import FileWatcher
+from history_store import HistoryStore
+from instrumentation import Recorder, summarise
+from release_store import ReleaseStore
+from result_cache import ResultCache
+# Data files, users, travel years and prebuilt datasets are set in settings.py, shared with etl.py and user_store.py
+from settings import current_date, dataset_dir, history_dir, history_years, live_years, prebuilt_data, snapshot_dir, target_file, travel_years, user_db, user_file
+from sql_backend import DuckDBBackend
+from user_store import UserStore
+
+# Sessions share the loaded frames through copy-on-write views (see data_loader.shared_view)
+enable_copy_on_write()
 
 # === CONFIG ===
 
 bg_image = os.path.join("Travel_Photo.jpg")
 logo_path = os.path.join("TC-logo-Vertical.png")
 tm_logo_path = os.path.join("TM logo.png")
-user_file = os.path.join("Emp_base.csv")
-current_base_file = os.path.join("Current_Base.xlsb")
-sap_file = os.path.join("SAP.xlsb")
-target_file = os.path.join("Target.csv")
+# Images are re-encoded once to WebP at their drawn size (x2 for high-DPI screens): (path, (max width, max height), quality).
+# With server.enableStaticServing on (.streamlit/config.toml) they are served from static_dir, otherwise inlined.
+images = {
+    "background": (bg_image, (1920, 1080), 70),
+    "logo": (logo_path, (300, 300), 85),
+    "tm_logo": (tm_logo_path, (480, 96), 85),
+}
+static_dir = os.path.join("static")
+as_of_default = (current_date - timedelta(days=1)).date()
+result_cache_bytes = 64 * 1024 * 1024
+# Page aggregates from the in-memory cube ("pandas") or from SQL over a Parquet export of the data ("duckdb", needs pip install duckdb)
+query_backend = "pandas"
+# Timing events for the admin Performance page: the latest perf_buffer are kept in memory, and all are appended to perf_log
+perf_buffer = 5000
+perf_log = os.path.join("logs", "perf.jsonl")
+# Source files (with prebuilt_data, the latest dataset's pointer) are polled every watch_interval seconds
+# and reloaded once unchanged for watch_settle seconds
+watch_files = True
+watch_interval = 5
+watch_settle = 10
 
 st.set_page_config(page_title="Thomas Cook Dashboard", layout="wide")
 
@@ -29,8 +63,6 @@ if "change_pw" not in st.session_state:
     st.session_state.change_pw = False
 if "active_tab" not in st.session_state:
     st.session_state.active_tab = "Dashboard"
-if "refresh_trigger" not in st.session_state:
-    st.session_state.refresh_trigger = False
 
 # Global CSS for banner and app styling
 st.markdown("""
@@ -146,186 +178,190 @@ st.markdown("""
     <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/5.15.4/css/all.min.css">
 """, unsafe_allow_html=True)
 
-@st.cache_data
-def load_data():
-    try:
-        # Current date and time: 10:04 PM IST, Thursday, July 24, 2025
-        current_date = datetime(2025, 7, 24, 22, 4)  # IST is UTC+5:30
-        yesterday = current_date - timedelta(days=1)
-        current_month = current_date.month
-        current_year = current_date.year
-        previous_year = current_year - 1
-        previous_year_yesterday = yesterday.replace(year=previous_year)
-
-        # Required and optional columns
-        required_cols = ["Sale In Cr", "Travel M", "Travel Y"]
-        optional_cols = ["REGION", "TOUR START DATE", "FILE_DATE", "TOTAL_PAX", "Travel Qtr", "Final Buniess", "Destination", "FILE_TYPE", "REGION_B", "FILE_SUB_TYPE"]
-
-        # Load Current_Base.xlsb (Jul-Dec 2024 and 2025, filtered by FILE_DATE)
-        df_current = pd.read_excel(current_base_file, engine='pyxlsb')
-        df_current.columns = df_current.columns.str.strip()
-        df_current["Source"] = "Current_Base"
-
-        # Rename only TOUR_START_DATE and Destination
-        df_current = df_current.rename(columns={
-            "TOUR_START_DATE": "TOUR START DATE",
-            "Destination": "Destination"
-        })
-
-        # Normalize Final Buniess, FILE_TYPE, REGION_B, and FILE_SUB_TYPE to uppercase
-        if "Final Buniess" in df_current.columns:
-            df_current["Final Buniess"] = df_current["Final Buniess"].str.strip().str.upper()
-        if "FILE_TYPE" in df_current.columns:
-            df_current["FILE_TYPE"] = df_current["FILE_TYPE"].str.strip().str.upper()
-        if "REGION_B" in df_current.columns:
-            df_current["REGION_B"] = df_current["REGION_B"].str.strip().str.upper()
-        if "FILE_SUB_TYPE" in df_current.columns:
-            df_current["FILE_SUB_TYPE"] = df_current["FILE_SUB_TYPE"].str.strip().str.upper()
-
-        # Create BAREADEP column
-        if "FILE_SUB_TYPE" in df_current.columns and "Final Buniess" in df_current.columns:
-            df_current["BAREADEP"] = df_current.apply(
-                lambda row: "NTCIL" if row["FILE_SUB_TYPE"] in ["ESCORTED TOUR", "CRUISE", "RAIL"] else row["Final Buniess"], axis=1
-            )
+@st.cache_resource
+def get_history_store():
+    return HistoryStore(history_dir)
+
+@st.cache_resource
+def get_recorder():
+    # One instrumentation buffer per server process
+    return Recorder(perf_buffer, perf_log)
+
+def timed(name):
+    # Records every run of a page or fragment as a "page" event
+    def decorate(func):
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            with get_recorder().timer("page", name):
+                return func(*args, **kwargs)
+        return run
+    return decorate
+
+@st.cache_resource
+def get_release_store():
+    return ReleaseStore(dataset_dir)
+
+@st.cache_resource
+def get_dataset_store():
+    # One store per server process; every session reads its current data version
+    history = get_history_store()
+    recorder = get_recorder()
+    def build(progress, previous, sources):
+        if prebuilt_data:
+            # etl.py builds and publishes the data versions; the app only opens the latest one
+            dataset, messages = get_release_store().open_latest()
+            history.reload()
         else:
-            df_current["BAREADEP"] = df_current["Final Buniess"] if "Final Buniess" in df_current.columns else "Unknown"
-
-        # Check required columns
-        missing_required = [col for col in required_cols if col not in df_current.columns]
-        if missing_required:
-            st.error(f"Missing required columns in {current_base_file}: {', '.join(missing_required)}")
-            return pd.DataFrame()
-
-        # Log missing optional columns
-        missing_optional = [col for col in optional_cols if col not in df_current.columns]
-        if missing_optional:
-            st.warning(f"Missing optional columns in {current_base_file}: {', '.join(missing_optional)}")
-
-        # Filter Current_Base for Jul-Dec 2024 and 2025, FILE_DATE <= yesterday
-        df_current["Travel M"] = df_current["Travel M"].astype(str).str.strip().str.lower()
-        df_current["Travel Y"] = df_current["Travel Y"].astype(int)
-        month_map = {
-            "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
-            "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
-            "january": 1, "february": 2, "march": 3, "april": 4, "may": 5, "june": 6,
-            "july": 7, "august": 8, "september": 9, "october": 10, "november": 11, "december": 12,
-            "1": 1, "2": 2, "3": 3, "4": 4, "5": 5, "6": 6,
-            "7": 7, "8": 8, "9": 9, "10": 10, "11": 11, "12": 12
-        }
-        df_current["Month Num"] = df_current["Travel M"].map(month_map)
-        df_current["Month Name"] = df_current["Month Num"].map({
-            1: "Jan", 2: "Feb", 3: "Mar", 4: "Apr", 5: "May", 6: "Jun",
-            7: "Jul", 8: "Aug", 9: "Sep", 10: "Oct", 11: "Nov", 12: "Dec"
-        })
-        df_current["FILE_DATE"] = pd.to_datetime(df_current["FILE_DATE"], errors="coerce")
-        df_current = df_current[
-            ((df_current["Travel Y"] == current_year) & (df_current["Month Num"] >= current_month) & 
-             (df_current["FILE_DATE"] <= yesterday)) |
-            ((df_current["Travel Y"] == previous_year) & (df_current["Month Num"] >= current_month) & 
-             (df_current["FILE_DATE"] <= previous_year_yesterday))
-        ]
-
-        # Load SAP.xlsb (Jan-Jun 2024 and 2025)
-        df_sap = pd.read_excel(sap_file, engine='pyxlsb')
-        df_sap.columns = df_sap.columns.str.strip()
-        df_sap["Source"] = "SAP"
-
-        # Rename only TOUR_START_DATE and Group Destination
-        df_sap = df_sap.rename(columns={
-            "TOUR_START_DATE": "TOUR START DATE",
-            "Group Destination": "Destination"
-        })
+            # Sources load one after another here: worker processes are for etl.py (see data_loader.load_sources)
+            dataset, messages = build_dataset(snapshot_dir, history, travel_years, history_years, live_years, False, progress, previous, sources)
+        if dataset is not None:
+            recorder.record_stages("load", dataset["timings"], rows=len(dataset["df"]))
+        return dataset, messages
+    return DatasetStore(build)
+
+def source_files_changed(paths):
+    # Runs on the watcher thread: open a newly published dataset, or reload only the sources whose workbooks changed
+    if prebuilt_data:
+        get_dataset_store().refresh()
+        return
+    changed_sources = [source["name"] for source in source_registry if source["file"] in paths]
+    if changed_sources:
+        get_dataset_store().refresh(sources=changed_sources)
+    if target_file in paths:
+        load_shared_target_data.clear()
+        target_data_version.clear()
+
+@st.cache_resource
+def start_file_watcher():
+    # One watcher per server process, started by the first session
+    if prebuilt_data:
+        paths = [get_release_store().pointer_path()]
+    else:
+        paths = [source["file"] for source in source_registry] + [target_file]
+    return FileWatcher(paths, source_files_changed, interval=watch_interval, settle=watch_settle).start()
 
-        # Normalize Final Buniess, FILE_TYPE, REGION_B, and FILE_SUB_TYPE to uppercase
-        if "Final Buniess" in df_sap.columns:
-            df_sap["Final Buniess"] = df_sap["Final Buniess"].str.strip().str.upper()
-        if "FILE_TYPE" in df_sap.columns:
-            df_sap["FILE_TYPE"] = df_sap["FILE_TYPE"].str.strip().str.upper()
-        if "REGION_B" in df_sap.columns:
-            df_sap["REGION_B"] = df_sap["REGION_B"].str.strip().str.upper()
-        if "FILE_SUB_TYPE" in df_sap.columns:
-            df_sap["FILE_SUB_TYPE"] = df_sap["FILE_SUB_TYPE"].str.strip().str.upper()
-
-        # Create BAREADEP column
-        if "FILE_SUB_TYPE" in df_sap.columns and "Final Buniess" in df_sap.columns:
-            df_sap["BAREADEP"] = df_sap.apply(
-                lambda row: "NTCIL" if row["FILE_SUB_TYPE"] in ["ESCORTED TOUR", "CRUISE", "RAIL"] else row["Final Buniess"], axis=1
-            )
-        else:
-            df_sap["BAREADEP"] = df_sap["Final Buniess"] if "Final Buniess" in df_sap.columns else "Unknown"
-
-        # Check required columns
-        missing_required = [col for col in required_cols if col not in df_sap.columns]
-        if missing_required:
-            st.error(f"Missing required columns in {sap_file}: {', '.join(missing_required)}")
-            return pd.DataFrame()
-
-        # Log missing optional columns
-        missing_optional = [col for col in optional_cols if col not in df_sap.columns]
-        if missing_optional:
-            st.warning(f"Missing optional columns in {sap_file}: {', '.join(missing_optional)}")
-
-        # Filter SAP for Jan-Jun 2024 and 2025
-        df_sap["Travel M"] = df_sap["Travel M"].astype(str).str.strip().str.lower()
-        df_sap["Travel Y"] = df_sap["Travel Y"].astype(int)
-        df_sap["Month Num"] = df_sap["Travel M"].map(month_map)
-        df_sap["Month Name"] = df_sap["Month Num"].map({
-            1: "Jan", 2: "Feb", 3: "Mar", 4: "Apr", 5: "May", 6: "Jun",
-            7: "Jul", 8: "Aug", 9: "Sep", 10: "Oct", 11: "Nov", 12: "Dec"
-        })
-        df_sap = df_sap[
-            ((df_sap["Travel Y"] == current_year) & (df_sap["Month Num"] >= 1) & (df_sap["Month Num"] < current_month)) |
-            ((df_sap["Travel Y"] == previous_year) & (df_sap["Month Num"] >= 1) & (df_sap["Month Num"] < current_month))
-        ]
-
-        # Combine DataFrames
-        df = pd.concat([df_current, df_sap], ignore_index=True)
-        df["Sale In Cr"] = pd.to_numeric(df["Sale In Cr"], errors="coerce").fillna(0)
-        if "TOTAL_PAX" in df.columns:
-            df["TOTAL_PAX"] = pd.to_numeric(df["TOTAL_PAX"], errors="coerce").fillna(0)
-        if "TOUR START DATE" in df.columns:
-            df["TOUR START DATE"] = pd.to_datetime(df["TOUR START DATE"], errors="coerce")
-        return df
-    except Exception as e:
-        st.error(f"Failed to load data: {str(e)}")
-        return pd.DataFrame()
+def current_dataset():
+    dataset = get_dataset_store().current()
+    for level, message in dataset["messages"]:
+        getattr(st, level)(message)
+    return dataset
 
-@st.cache_data
-def load_target_data():
+def load_data():
+    # A copy-on-write view of the shared frame: no copy per call, and writes stay in the caller's view
+    return shared_view(current_dataset()["df"])
+
+def read_only_view(dataset):
+    # The shared frames as copy-on-write views and the daily totals (frozen arrays) in a dict of the
+    # caller's own: a page can modify what it gets without touching the version other sessions read
+    daily = dict(dataset["daily"], measures=list(dataset["daily"]["measures"])) if dataset["daily"] else dataset["daily"]
+    return dict(dataset, df=shared_view(dataset["df"]), cube=shared_view(dataset["cube"]), daily=daily, columns=list(dataset["columns"]))
+
+def load_sales_cube():
+    # Aggregated once per data version; the chart pages read this instead of the booking rows
+    dataset = read_only_view(current_dataset())
+    return dataset["cube"], dataset["daily"], dataset["columns"], dataset["version"]
+
+@st.cache_resource
+def load_shared_target_data():
     try:
-        df = pd.read_csv(target_file)
-        df.columns = df.columns.str.strip()
-        df = df.rename(columns={
-            col: "Region" for col in df.columns if col.lower() in ["region", "reg"]
-        })
-        df = df.rename(columns={
-            col: "Month" for col in df.columns if col.lower() in ["month", "month name"]
-        })
-        df = df.rename(columns={
-            col: "Target Amount" for col in df.columns if col.lower() in ["target", "target amount", "target_cr"]
-        })
-        required_cols = ["Region", "Month", "Target Amount"]
-        if not all(col in df.columns for col in required_cols):
-            st.error(f"Missing required columns in {target_file}: {', '.join(set(required_cols) - set(df.columns))}")
-            return pd.DataFrame()
-        if "Target Amount" in df.columns and df["Target Amount"].max() > 1e7:
-            df["Target Amount Cr"] = df["Target Amount"] / 1e7
-        else:
-            df["Target Amount Cr"] = df["Target Amount"]
-        return df
+        started = time.perf_counter()
+        df, messages = read_target_file(target_file)
+        for level, message in messages:
+            getattr(st, level)(message)
+        if df is None:
+            return None
+        # Normalised and indexed once per file version; pages only join sales against it
+        read = time.perf_counter()
+        targets = build_target_table(df)
+        get_recorder().record_stages("target", {"read": read - started, "normalise": time.perf_counter() - read}, rows=len(df))
+        return targets
     except Exception as e:
         st.error(f"Failed to load target data from {target_file}: {str(e)}")
-        return pd.DataFrame()
+        return None
 
-def set_background(image_path):
-    try:
-        with open(image_path, "rb") as file:
-            encoded = base64.b64encode(file.read()).decode()
-        ext = image_path.split('.')[-1]
+def load_target_data():
+    # Prebuilt datasets carry the targets they were built with
+    targets = get_dataset_store().current().get("targets") if prebuilt_data else load_shared_target_data()
+    if targets is None or targets["table"].empty:
+        return None
+    return dict(targets, table=shared_view(targets["table"]), lookup=shared_view(targets["lookup"]))
+
+@st.cache_resource
+def target_data_version():
+    targets = load_shared_target_data()
+    return frame_digest(targets["table"].reset_index()) if targets is not None else "none"
+
+def current_target_version():
+    if prebuilt_data:
+        return get_dataset_store().current().get("target_version", "none")
+    return target_data_version()
+
+@st.cache_resource(max_entries=4)
+def get_history_view(history_version, years, region, quarter, final_business):
+    # Built from the history partitions of the view's years that can hold its filter values
+    view = history_view(get_history_store(), years, region, quarter, final_business)
+    if view is not None:
+        get_recorder().record_stages("history view", view["timings"], rows=len(view["df"]))
+    return view
+
+def sales_view(years, region, quarter, final_business):
+    # The current data version when it holds the view's travel years, otherwise a cube of just
+    # the history partitions the view needs. Read-only views, like load_sales_cube()
+    dataset = get_dataset_store().current()
+    if not set(years) <= set(travel_years):
+        view = get_history_view(get_history_store().version(years), tuple(years), region, quarter, final_business)
+        if view is not None:
+            return dict(read_only_view(view), live=False)
+    return dict(read_only_view(dataset), live=True)
+
+@st.cache_resource(max_entries=4)
+def get_sql_backend(data_version, _rows, export=True):
+    # One engine per data version, over its rows exported to Parquet; history views are small
+    # and are loaded into the engine's memory instead
+    return DuckDBBackend(_rows, snapshot_dir if export else None, data_version)
+
+def sql_backend(view):
+    return get_sql_backend(view["version"], view["df"], view["live"])
+
+@st.cache_resource(max_entries=4)
+def get_filter_index(data_version, _cube):
+    # Built once per data version and shared read-only by every session
+    return freeze_arrays(build_filter_index(_cube))
+
+@st.cache_resource
+def get_result_cache():
+    # One cache per server process, shared by every session
+    return ResultCache(result_cache_bytes)
+
+def cached_figure(key, chart, build):
+    # The figure is built and converted to a plain dict once per data version, page, chart
+    # and filters; reruns (e.g. switching tabs) rehydrate the dict without validation, and
+    # st.plotly_chart skips validating a Figure object again.
+    # build() returns a spec dict (charts.combo_chart) or a go.Figure
+    def compute():
+        started = time.perf_counter()
+        spec = build()
+        if not isinstance(spec, dict):
+            spec = spec.to_plotly_json()
+        built = time.perf_counter()
+        size = payload_size(spec)
+        get_recorder().record("figure", chart, built - started, serialise=time.perf_counter() - built, bytes=size)
+        return spec
+    spec = get_result_cache().get_or_compute(key + ("figure", chart), compute)
+    return go.Figure(spec, _validate=False)
+
+@st.cache_resource
+def get_assets():
+    # Encoded once per process; pages only send the URL (or the small data URI)
+    served = st.get_option("server.enableStaticServing")
+    return prepare_assets(images, static_dir if served else None)
+
+def set_background(image_src):
+    if image_src:
         st.markdown(f"""
             <style>
             .stApp {{
-                background-image: url("data:image/{ext};base64,{encoded}");
+                background-image: url("{image_src}");
                 background-size: cover;
                 background-repeat: no-repeat;
                 background-position: center;
@@ -334,7 +370,7 @@ def set_background(image_path):
             }}
             </style>
         """, unsafe_allow_html=True)
-    except FileNotFoundError:
+    else:
         st.markdown("""
             <style>
             .stApp {
@@ -344,13 +380,14 @@ def set_background(image_path):
             </style>
         """, unsafe_allow_html=True)
 
-def change_password():
-    users_df = pd.read_csv(user_file)
-    pw_col = next((col for col in users_df.columns if col.strip().lower() == "password"), None)
-    if not pw_col:
-        st.error("Password column not found in Emp_base.csv")
-        return
+@st.cache_resource
+def get_user_store():
+    # One store per process; the first start imports Emp_base.csv
+    store = UserStore(user_db)
+    store.migrate_csv(user_file)
+    return store
 
+def change_password():
     with st.form("change_password_form"):
         st.markdown("### Change Password")
         current_password = st.text_input("Current Password", type="password")
@@ -359,11 +396,8 @@ def change_password():
         submitted = st.form_submit_button("Update Password")
 
         if submitted:
-            user_row = users_df[
-                (users_df["User Name"].str.strip().str.lower() == st.session_state.username.strip().lower()) &
-                (users_df[pw_col].astype(str).str.strip() == current_password.strip())
-            ]
-            if user_row.empty:
+            user_store = get_user_store()
+            if user_store.authenticate(st.session_state.username, current_password) is None:
                 st.error("Current password is incorrect.")
                 return
             if new_password != confirm_password:
@@ -373,30 +407,76 @@ def change_password():
                 st.error("New password cannot be empty.")
                 return
 
-            users_df.loc[
-                users_df["User Name"].str.strip().str.lower() == st.session_state.username.strip().lower(),
-                pw_col
-            ] = new_password.strip()
-            
             try:
-                users_df.to_csv(user_file, index=False)
-                st.success("Password updated successfully!")
+                if user_store.set_password(st.session_state.username, new_password):
+                    st.success("Password updated successfully!")
+                else:
+                    st.error("Failed to update password: user not found.")
             except Exception as e:
                 st.error(f"Failed to update password: {str(e)}")
 
+def as_of_input(key):
+    # Any day of a history year that has its previous year kept for comparison
+    return st.date_input("Sales As Of", as_of_default, min_value=date(history_years[0] + 1, 1, 1), max_value=date(history_years[-1], 12, 31), key=key)
+
+def as_of_text(as_of, period="Travel year", start=None):
+    if period == "Travel year":
+        return f"as of {as_of.strftime('%b %d')}"
+    return f"booked {period_start(as_of, period, start).strftime('%b %d')} - {as_of.strftime('%b %d')}"
+
 def refresh_callback():
-    st.cache_data.clear()
-    load_data.clear()
-    load_target_data.clear()
-    st.session_state.refresh_trigger = True
+    # The next data version is built in the background; every session keeps the current one until it is ready
+    get_dataset_store().refresh()
+    load_shared_target_data.clear()
+    target_data_version.clear()
+
+def data_status():
+    store = get_dataset_store()
+    dataset = store.current()
+    loaded_at = datetime.fromtimestamp(dataset["loaded_at"]).strftime("%d %b %H:%M:%S")
+    release = f" · release {dataset['release']}" if dataset.get("release") else ""
+    st.caption(f"Data version {dataset['generation']}{release} · {len(dataset['df']):,} rows · loaded {loaded_at}")
+    status = store.status()
+    if status["state"] == "running":
+        refresh_progress()
+    elif status["state"] == "failed" and dataset["generation"] > 0:
+        st.warning("Last refresh failed; showing the previous data version.")
+        for level, message in status["messages"]:
+            st.caption(message)
+
+@st.fragment(run_every=1)
+def refresh_progress():
+    status = get_dataset_store().status()
+    if status["state"] != "running":
+        # The new version is live (or the refresh failed): redraw the whole page
+        st.rerun()
+    st.progress(status["done"] / status["total"] if status["total"] else 0.0, text=f"Refreshing: {status['step']}")
+
+@st.fragment
+def profile_options():
+    # Typing in or submitting the password form reruns only this panel
+    with st.expander("🔽 Profile Options"):
+        st.text(f"User: {st.session_state.username}")
+        st.text(f"Role: {st.session_state.access}")
+        if st.button("🚪 Logout"):
+            for key in list(st.session_state.keys()):
+                del st.session_state[key]
+            st.rerun()
+        change_password()
+
+def sidebar_panel():
+    st.subheader("👤 Profile")
+    profile_options()
+    st.markdown("---")
+    st.button("↻ Refresh Data", on_click=refresh_callback)
+    data_status()
 
 def dashboard_page():
     # Load TM logo for banner
-    try:
-        with open(tm_logo_path, "rb") as img_file:
-            tm_logo_base64 = base64.b64encode(img_file.read()).decode()
-        tm_logo_html = f"<img src='data:image/png;base64,{tm_logo_base64}' style='height: 4vh; margin-left: 1vw;'>"
-    except FileNotFoundError:
+    tm_logo_src = get_assets()["tm_logo"]
+    if tm_logo_src:
+        tm_logo_html = f"<img src='{tm_logo_src}' style='height: 4vh; margin-left: 1vw;'>"
+    else:
         tm_logo_html = "<p style='color: red; margin-left: 1vw;'>TM Logo not found</p>"
 
     # Display top banner with logo and text
@@ -406,24 +486,26 @@ def dashboard_page():
             <div class="banner-text">YOY Sales Comparison Dashboard</div>
         </div>
     """, unsafe_allow_html=True)
-
-    # Handle refresh action
-    if st.session_state.refresh_trigger:
-        st.session_state.refresh_trigger = False
-        st.rerun()
-
-    # Main content container
+    with st.sidebar:
+        sidebar_panel()
+    dashboard_view()
+
+@st.fragment
+@timed("Dashboard view")
+def dashboard_view():
+    # The filters and everything that reads them (KPIs, charts); changing a filter reruns
+    # only this, not the banner, the sidebar or the login/session setup
     with st.container():
         st.markdown('<div class="main-content">', unsafe_allow_html=True)
 
-        df = load_data()
+        df, daily, data_columns, data_version = load_sales_cube()
         if df.empty:
             st.error("No data available for Dashboard.")
             st.markdown('</div>', unsafe_allow_html=True)
             return
 
         # Verify required columns
-        if "FILE_SUB_TYPE" not in df.columns:
+        if "FILE_SUB_TYPE" not in data_columns:
             st.error("FILE_SUB_TYPE column not found in data.")
             st.markdown('</div>', unsafe_allow_html=True)
             return
@@ -432,79 +514,41 @@ def dashboard_page():
             st.markdown('</div>', unsafe_allow_html=True)
             return
 
-        with st.sidebar:
-            st.subheader("👤 Profile")
-            with st.expander("🔽 Profile Options"):
-                st.text(f"User: {st.session_state.username}")
-                st.text(f"Role: {st.session_state.access}")
-                if st.button("🚪 Logout"):
-                    for key in list(st.session_state.keys()):
-                        del st.session_state[key]
-                    st.rerun()
-                change_password()
-            st.markdown("---")
-            st.button("↻ Refresh Data", on_click=refresh_callback)
-            st.title("🔍 Filters")
-            region_options = ["All"] + sorted(df["REGION"].dropna().astype(str).unique()) if "REGION" in df.columns else ["All"]
+        # Filters (widgets in a fragment cannot live in the sidebar)
+        region_col, quarter_col, business_col, as_of_col, period_col, start_col = st.columns(6)
+        with region_col:
+            region_options = filter_options(df["REGION"]) if "REGION" in df.columns else ["All"]
             region = st.selectbox("Region", region_options, key="dash_region")
-            travel_qtr_options = ["All"] + sorted(df["Travel Qtr"].dropna().astype(str).unique()) if "Travel Qtr" in df.columns else ["All"]
+        with quarter_col:
+            travel_qtr_options = filter_options(df["Travel Qtr"]) if "Travel Qtr" in df.columns else ["All"]
             quarter = st.selectbox("Travel Quarter", travel_qtr_options, key="dash_quarter")
-            final_business_options = ["All"] + sorted(df["Final Buniess"].dropna().astype(str).unique()) if "Final Buniess" in df.columns else ["All"]
+        with business_col:
+            final_business_options = filter_options(df["Final Buniess"]) if "Final Buniess" in df.columns else ["All"]
             final_business = st.selectbox("Final Buniess", final_business_options, key="dash_final_business")
-
-        # Apply filters
-        filtered_df = df.copy()
-        if region != "All" and "REGION" in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df["REGION"].astype(str) == region]
-        if quarter != "All" and "Travel Qtr" in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df["Travel Qtr"].astype(str) == quarter]
-        if final_business != "All" and "Final Buniess" in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df["Final Buniess"].astype(str) == final_business]
-
-        # Calculate sales for current year (as of yesterday) and previous year
-        current_date = datetime(2025, 7, 24, 22, 4)  # 10:04 PM IST, July 24, 2025
-        yesterday = current_date - timedelta(days=1)
-        current_year = current_date.year
-        current_month = current_date.month
+        with as_of_col:
+            as_of = as_of_input("dash_as_of")
+        with period_col:
+            period = st.selectbox("Booking Period", periods, key="dash_period")
+        with start_col:
+            start = st.date_input("Period Start", as_of.replace(day=1), max_value=as_of, key="dash_period_start") if period == "Custom" else None
+
+        # Calculate sales for current year (as of the selected day) and the same days of the previous year
+        current_year = as_of.year
         previous_year = current_year - 1
-        previous_year_yesterday = yesterday.replace(year=previous_year)
-
-        # Current year sales: Jan-Jun from SAP.xlsb, Jul-Dec from Current_Base.xlsb
-        current_year_df = filtered_df[filtered_df["Travel Y"] == current_year]
-        sap_2025 = pd.DataFrame()
-        current_base_2025 = pd.DataFrame()
-        if not current_year_df.empty:
-            sap_2025 = current_year_df[
-                (current_year_df["Source"] == "SAP") & 
-                (current_year_df["Month Num"] >= 1) & 
-                (current_year_df["Month Num"] < current_month)
-            ]
-            current_base_2025 = current_year_df[
-                (current_year_df["Source"] == "Current_Base") & 
-                (current_year_df["Month Num"] >= current_month)
-            ]
-            current_year_df = pd.concat([sap_2025, current_base_2025], ignore_index=True)
-        sales_current = current_year_df["Sale In Cr"].sum()
-
-        # Previous year sales: Jan-Jun from SAP.xlsb, Jul-Dec from Current_Base.xlsb
-        previous_year_df = filtered_df[filtered_df["Travel Y"] == previous_year]
-        sap_2024 = pd.DataFrame()
-        current_base_2024 = pd.DataFrame()
-        if not previous_year_df.empty:
-            sap_2024 = previous_year_df[
-                (previous_year_df["Source"] == "SAP") & 
-                (previous_year_df["Month Num"] >= 1) & 
-                (previous_year_df["Month Num"] < current_month)
-            ]
-            current_base_2024 = previous_year_df[
-                (previous_year_df["Source"] == "Current_Base") & 
-                (previous_year_df["Month Num"] >= current_month)
-            ]
-            previous_year_df = pd.concat([sap_2024, current_base_2024], ignore_index=True)
-        sales_previous = previous_year_df["Sale In Cr"].sum()
-
-        # Calculate growth percentage
-        growth_pct = ((sales_current - sales_previous) / sales_previous * 100) if sales_previous > 0 else 0
+        as_of_label = as_of_text(as_of, period, start)
+
+        # Aggregates and figures are shared across sessions; the key changes whenever the data does
+        view = sales_view([previous_year, current_year], region, quarter, final_business)
+        cube, daily, data_version = view["cube"], view["daily"], view["version"]
+        dashboard_key = (data_version, query_backend, "dashboard", region, quarter, final_business, as_of, period, start)
+        if query_backend == "duckdb":
+            compute = lambda: sql_backend(view).dashboard_aggregates(region, quarter, final_business, as_of, period, start)
+        else:
+            compute = lambda: dashboard_aggregates(cube, get_filter_index(data_version, cube), daily, region, quarter, final_business, as_of, period, start)
+        result = get_result_cache().get_or_compute(dashboard_key, compute)
+        sales_current = result["sales_current"]
+        sales_previous = result["sales_previous"]
+        growth_pct = result["growth_pct"]
 
         # KPI Cards (Total Sales, LOLH, LOSH, LTDM, AIR)
         with st.container():
@@ -527,19 +571,15 @@ def dashboard_page():
                         st.markdown(f"""
                             <div class="kpi-card {card_style}" style='text-align: center;'>
                                 <h3 style='{header_style}'><i class="fas {icon_map[business]}"></i> Total Sales</h3>
-                                <p style='{text_style}'>2025 (as of {yesterday.strftime('%b %d')}): ₹{sales_current:.2f} Cr</p>
-                                <p style='{text_style}'>2024 (as of {yesterday.strftime('%b %d')}): ₹{sales_previous:.2f} Cr</p>
+                                <p style='{text_style}'>{current_year} ({as_of_label}): ₹{sales_current:.2f} Cr</p>
+                                <p style='{text_style}'>{previous_year} ({as_of_label}): ₹{sales_previous:.2f} Cr</p>
                                 <p style='{text_style}'>Growth: {growth_pct:.2f}% 
                                     {'<i class="fas fa-arrow-up" style="color: #008000;"></i>' if growth_pct > 0 else '<i class="fas fa-arrow-down" style="color: #ff0000;"></i>' if growth_pct < 0 else ''}
                                 </p>
                             </div>
                         """, unsafe_allow_html=True)
-                    elif "Final Buniess" in filtered_df.columns and business in filtered_df["Final Buniess"].dropna().astype(str).unique():
-                        current_business_df = current_year_df[current_year_df["Final Buniess"].astype(str) == business]
-                        previous_business_df = previous_year_df[previous_year_df["Final Buniess"].astype(str) == business]
-                        current_sales = current_business_df["Sale In Cr"].sum()
-                        previous_sales = previous_business_df["Sale In Cr"].sum()
-                        growth = ((current_sales - previous_sales) / previous_sales * 100) if previous_sales > 0 else 0
+                    elif result["business_kpis"][business] is not None:
+                        current_sales, previous_sales, growth = result["business_kpis"][business]
                         growth_style = "color: #008000;" if growth > 0 else "color: #ff0000;" if growth < 0 else ""
                         growth_icon = '<i class="fas fa-arrow-up"></i>' if growth > 0 else '<i class="fas fa-arrow-down"></i>' if growth < 0 else ''
                         card_style = "other"
@@ -547,8 +587,8 @@ def dashboard_page():
                         st.markdown(f"""
                             <div class="kpi-card {card_style}" style='text-align: center;'>
                                 <h3><i class="fas {icon_map[business]}"></i> {business}</h3>
-                                <p style='{text_style}'>2025 (as of {yesterday.strftime('%b %d')}): ₹{current_sales:.2f} Cr</p>
-                                <p style='{text_style}'>2024 (as of {yesterday.strftime('%b %d')}): ₹{previous_sales:.2f} Cr</p>
+                                <p style='{text_style}'>{current_year} ({as_of_label}): ₹{current_sales:.2f} Cr</p>
+                                <p style='{text_style}'>{previous_year} ({as_of_label}): ₹{previous_sales:.2f} Cr</p>
                                 <p style='{text_style} {growth_style}'>Growth: {growth:.2f}% {growth_icon}</p>
                             </div>
                         """, unsafe_allow_html=True)
@@ -565,178 +605,98 @@ def dashboard_page():
 
         # Prepare data for bar graph using Travel M (Jan-Dec)
         months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-        current_year_monthly = current_year_df.groupby("Month Name")["Sale In Cr"].sum().reindex(months, fill_value=0)
-        previous_year_monthly = previous_year_df.groupby("Month Name")["Sale In Cr"].sum().reindex(months, fill_value=0)
-        growth_monthly = []
-        for month in months:
-            sales_current = current_year_monthly.get(month, 0)
-            sales_prev = previous_year_monthly.get(month, 0)
-            growth = ((sales_current - sales_prev) / sales_prev * 100) if sales_prev > 0 else 0
-            growth_monthly.append(growth)
+        current_year_monthly = result["current_year_monthly"]
+        previous_year_monthly = result["previous_year_monthly"]
+        growth_monthly = result["growth_monthly"]
 
         # Create Plotly bar figure for month-wise sales
-        fig = go.Figure()
-        fig.add_trace(go.Bar(
-            x=months,
-            y=previous_year_monthly,
-            name=f"{previous_year} Sales",
-            marker_color="blue",
-            text=previous_year_monthly,
-            texttemplate="%{y:.2f}",
-            textposition="auto",
-            textfont=dict(
-                family="Arial, sans-serif",
-                size=0.75 * 16
-            )
-        ))
-        fig.add_trace(go.Bar(
-            x=months,
-            y=current_year_monthly,
-            name=f"{current_year} Sales",
-            marker_color="orange",
-            text=current_year_monthly,
-            texttemplate="%{y:.2f}",
-            textposition="auto",
-            textfont=dict(
-                family="Arial, sans-serif",
-                size=0.75 * 16
-            )
-        ))
-        fig.add_trace(go.Scatter(
-            x=months,
-            y=growth_monthly,
-            name="Growth %",
-            yaxis="y2",
-            mode="lines+markers+text",
-            line=dict(color="darkgreen", width=2),
-            marker=dict(color="darkgreen", size=8),
-            text=[f"{growth_value:.2f}%" if growth_value != 0 else "" for growth_value in growth_monthly],
-            textposition="top center",
-            textfont=dict(
-                family="Arial Black, Arial, sans-serif",
-                size=0.875 * 16,
-                color=["red" if growth_value < 0 else "darkgreen" if growth_value > 0 else "darkgreen" for growth_value in growth_monthly]
-            )
+        fig = cached_figure(dashboard_key, "month_sales", lambda: combo_chart(
+            months,
+            [(f"{previous_year} Sales", "blue", previous_year_monthly), (f"{current_year} Sales", "orange", current_year_monthly)],
+            ("Growth %", growth_monthly),
+            f"Month-wise Sales ({previous_year} vs {current_year}, {as_of_label}) with Growth %",
+            "Month", "Sales (Cr)"
         ))
-        fig.update_layout(
-            title=dict(
-                text=f"Month-wise Sales ({previous_year} vs {current_year}, as of {yesterday.strftime('%b %d')}) with Growth %",
-                x=0.5,
-                xanchor="center",
-                y=0.95,
-                font=dict(family="Arial, sans-serif", size=16, color="black")
-            ),
-            xaxis=dict(title="Month"),
-            yaxis=dict(
-                title="Sales (Cr)",
-                side="left",
-                tickformat=".2f"
-            ),
-            yaxis2=dict(
-                title="Growth %",
-                overlaying="y",
-                side="right",
-                tickformat=".2f",
-                ticksuffix="%"
-            ),
-            barmode="group",
-            legend=dict(
-                x=0.5,
-                y=-0.15,
-                xanchor="center",
-                yanchor="top",
-                orientation="h"
-            ),
-            template="plotly_white",
-            margin=dict(t=100, b=100, l=80, r=80),
-            autosize=True
-        )
-
-        # Prepare data for business contribution donut chart (2025)
+
+        # Prepare data for business contribution donut chart (current year)
         businesses = ["LOLH", "LOSH", "LTDM", "AIR"]
-        sales_values = []
-        for business in businesses:
-            if "Final Buniess" in current_year_df.columns and business in current_year_df["Final Buniess"].dropna().astype(str).unique():
-                business_sales = current_year_df[current_year_df["Final Buniess"].astype(str) == business]["Sale In Cr"].sum()
-                sales_values.append(business_sales)
-            else:
-                sales_values.append(0)
+        sales_values = result["sales_values"]
 
         # Create business contribution donut chart
-        fig_donut_business = go.Figure(data=[
-            go.Pie(
-                labels=businesses,
-                values=sales_values,
-                hole=0.4,
-                textinfo='label+percent',
-                insidetextorientation='radial',
-                marker=dict(colors=['#ff7f0e', '#1f77b4', '#2ca02c', '#9467bd']),
-                textfont=dict(family="Arial, sans-serif", size=0.75 * 16)
+        def business_donut_figure():
+            fig_donut_business = go.Figure(data=[
+                go.Pie(
+                    labels=businesses,
+                    values=sales_values,
+                    hole=0.4,
+                    textinfo='label+percent',
+                    insidetextorientation='radial',
+                    marker=dict(colors=['#ff7f0e', '#1f77b4', '#2ca02c', '#9467bd']),
+                    textfont=dict(family="Arial, sans-serif", size=0.75 * 16)
+                )
+            ])
+            fig_donut_business.update_layout(
+                title=dict(
+                    text=f"Business Contribution ({current_year}, {as_of_label})",
+                    x=0.5,
+                    xanchor="center",
+                    y=0.95,
+                    font=dict(family="Arial, sans-serif", size=14, color="black")
+                ),
+                showlegend=True,
+                legend=dict(
+                    x=0.5,
+                    y=-0.15,
+                    xanchor="center",
+                    yanchor="top",
+                    orientation="h"
+                ),
+                template="plotly_white",
+                margin=dict(t=60, b=60, l=40, r=40),
+                autosize=True
             )
-        ])
-        fig_donut_business.update_layout(
-            title=dict(
-                text=f"Business Contribution (2025, as of {yesterday.strftime('%b %d')})",
-                x=0.5,
-                xanchor="center",
-                y=0.95,
-                font=dict(family="Arial, sans-serif", size=14, color="black")
-            ),
-            showlegend=True,
-            legend=dict(
-                x=0.5,
-                y=-0.15,
-                xanchor="center",
-                yanchor="top",
-                orientation="h"
-            ),
-            template="plotly_white",
-            margin=dict(t=60, b=60, l=40, r=40),
-            autosize=True
-        )
-
-        # Prepare data for file type contribution pie chart (2025)
+            return fig_donut_business
+        fig_donut_business = cached_figure(dashboard_key, "business_donut", business_donut_figure)
+
+        # Prepare data for file type contribution pie chart (current year)
         file_types = ["GIT", "FIT", "AIR"]
-        file_type_sales = []
-        for file_type in file_types:
-            if "FILE_TYPE" in current_year_df.columns:
-                file_type_sales_value = current_year_df[current_year_df["FILE_TYPE"].astype(str).str.upper() == file_type]["Sale In Cr"].sum()
-                file_type_sales.append(file_type_sales_value)
-            else:
-                file_type_sales.append(0)
+        file_type_sales = result["file_type_sales"]
 
         # Create file type contribution pie chart
-        fig_pie_file_type = go.Figure(data=[
-            go.Pie(
-                labels=file_types,
-                values=file_type_sales,
-                hole=0,
-                textinfo='label+percent',
-                insidetextorientation='radial',
-                marker=dict(colors=['#d62728', '#17becf', '#2ca02c']),
-                textfont=dict(family="Arial, sans-serif", size=0.75 * 16)
+        def file_type_pie_figure():
+            fig_pie_file_type = go.Figure(data=[
+                go.Pie(
+                    labels=file_types,
+                    values=file_type_sales,
+                    hole=0,
+                    textinfo='label+percent',
+                    insidetextorientation='radial',
+                    marker=dict(colors=['#d62728', '#17becf', '#2ca02c']),
+                    textfont=dict(family="Arial, sans-serif", size=0.75 * 16)
+                )
+            ])
+            fig_pie_file_type.update_layout(
+                title=dict(
+                    text=f"File Type Contribution ({current_year}, {as_of_label})",
+                    x=0.5,
+                    xanchor="center",
+                    y=0.95,
+                    font=dict(family="Arial, sans-serif", size=14, color="black")
+                ),
+                showlegend=True,
+                legend=dict(
+                    x=0.5,
+                    y=-0.15,
+                    xanchor="center",
+                    yanchor="top",
+                    orientation="h"
+                ),
+                template="plotly_white",
+                margin=dict(t=60, b=60, l=40, r=40),
+                autosize=True
             )
-        ])
-        fig_pie_file_type.update_layout(
-            title=dict(
-                text=f"File Type Contribution (2025, as of {yesterday.strftime('%b %d')})",
-                x=0.5,
-                xanchor="center",
-                y=0.95,
-                font=dict(family="Arial, sans-serif", size=14, color="black")
-            ),
-            showlegend=True,
-            legend=dict(
-                x=0.5,
-                y=-0.15,
-                xanchor="center",
-                yanchor="top",
-                orientation="h"
-            ),
-            template="plotly_white",
-            margin=dict(t=60, b=60, l=40, r=40),
-            autosize=True
-        )
+            return fig_pie_file_type
+        fig_pie_file_type = cached_figure(dashboard_key, "file_type_pie", file_type_pie_figure)
 
         # Display charts side by side
         col1, col2, col3 = st.columns([5, 2.5, 2.5])
@@ -754,190 +714,38 @@ def dashboard_page():
                 st.markdown("<p style='text-align: center; color: #ff4b4b;'>No data available for File Type Contribution chart.</p>", unsafe_allow_html=True)
 
         # Prepare data for region-wise bar graph
-        regions = sorted(set(current_year_df["REGION_B"].dropna().astype(str).unique()) | set(previous_year_df["REGION_B"].dropna().astype(str).unique()))
-        current_year_region = current_year_df.groupby("REGION_B")["Sale In Cr"].sum().reindex(regions, fill_value=0)
-        previous_year_region = previous_year_df.groupby("REGION_B")["Sale In Cr"].sum().reindex(regions, fill_value=0)
-        growth_region = [(current_year_region.get(region, 0) - previous_year_region.get(region, 0)) / previous_year_region.get(region, 0) * 100 if previous_year_region.get(region, 0) > 0 else 0 for region in regions]
+        regions = result["regions"]
+        current_year_region = result["current_year_region"]
+        previous_year_region = result["previous_year_region"]
+        growth_region = result["growth_region"]
 
         # Create Plotly bar figure for region-wise sales
-        fig_region = go.Figure()
-        fig_region.add_trace(go.Bar(
-            x=regions,
-            y=previous_year_region,
-            name=f"{previous_year} Sales",
-            marker_color="blue",
-            text=previous_year_region,
-            texttemplate="%{y:.2f}",
-            textposition="auto",
-            textfont=dict(
-                family="Arial, sans-serif",
-                size=0.75 * 16
-            )
+        fig_region = cached_figure(dashboard_key, "region_sales", lambda: combo_chart(
+            regions,
+            [(f"{previous_year} Sales", "blue", previous_year_region), (f"{current_year} Sales", "orange", current_year_region)],
+            ("Growth %", growth_region),
+            f"Region-wise Sales ({previous_year} vs {current_year}, {as_of_label}) with Growth %",
+            "Region", "Sales (Cr)"
         ))
-        fig_region.add_trace(go.Bar(
-            x=regions,
-            y=current_year_region,
-            name=f"{current_year} Sales",
-            marker_color="orange",
-            text=current_year_region,
-            texttemplate="%{y:.2f}",
-            textposition="auto",
-            textfont=dict(
-                family="Arial, sans-serif",
-                size=0.75 * 16
-            )
-        ))
-        fig_region.add_trace(go.Scatter(
-            x=regions,
-            y=growth_region,
-            name="Growth %",
-            yaxis="y2",
-            mode="lines+markers+text",
-            line=dict(color="darkgreen", width=2),
-            marker=dict(color="darkgreen", size=8),
-            text=[f"{growth_value:.2f}%" if growth_value != 0 else "" for growth_value in growth_region],
-            textposition="top center",
-            textfont=dict(
-                family="Arial Black, Arial, sans-serif",
-                size=0.875 * 16,
-                color=["red" if growth_value < 0 else "darkgreen" if growth_value > 0 else "darkgreen" for growth_value in growth_region]
-            )
-        ))
-        fig_region.update_layout(
-            title=dict(
-                text=f"Region-wise Sales ({previous_year} vs {current_year}, as of {yesterday.strftime('%b %d')}) with Growth %",
-                x=0.5,
-                xanchor="center",
-                y=0.95,
-                font=dict(family="Arial, sans-serif", size=16, color="black")
-            ),
-            xaxis=dict(title="Region"),
-            yaxis=dict(
-                title="Sales (Cr)",
-                side="left",
-                tickformat=".2f"
-            ),
-            yaxis2=dict(
-                title="Growth %",
-                overlaying="y",
-                side="right",
-                tickformat=".2f",
-                ticksuffix="%"
-            ),
-            barmode="group",
-            legend=dict(
-                x=0.5,
-                y=-0.15,
-                xanchor="center",
-                yanchor="top",
-                orientation="h"
-            ),
-            template="plotly_white",
-            margin=dict(t=100, b=100, l=80, r=80),
-            autosize=True
-        )
-
-        # Prepare data for horizontal bar plot (2024 and 2025, BAREADEP)
-        barea_sales_current = current_year_df.groupby("BAREADEP")["Sale In Cr"].sum().reset_index()
-        barea_sales_previous = previous_year_df.groupby("BAREADEP")["Sale In Cr"].sum().reset_index()
-        barea_sales_current = barea_sales_current[barea_sales_current["Sale In Cr"] > 0]
-        barea_sales_previous = barea_sales_previous[barea_sales_previous["Sale In Cr"] > 0]
-        barea_sales_current = barea_sales_current.sort_values("BAREADEP")
-        barea_sales_previous = barea_sales_previous.sort_values("BAREADEP")
-        barea_categories = sorted(set(barea_sales_current["BAREADEP"]).union(set(barea_sales_previous["BAREADEP"])))
-        barea_sales_current = barea_sales_current.set_index("BAREADEP").reindex(barea_categories, fill_value=0).reset_index()
-        barea_sales_previous = barea_sales_previous.set_index("BAREADEP").reindex(barea_categories, fill_value=0).reset_index()
-        growth_barea = [
-            (barea_sales_current[barea_sales_current["BAREADEP"] == cat]["Sale In Cr"].iloc[0] - 
-             barea_sales_previous[barea_sales_previous["BAREADEP"] == cat]["Sale In Cr"].iloc[0]) / 
-             barea_sales_previous[barea_sales_previous["BAREADEP"] == cat]["Sale In Cr"].iloc[0] * 100 
-             if barea_sales_previous[barea_sales_previous["BAREADEP"] == cat]["Sale In Cr"].iloc[0] > 0 else 0 
-             for cat in barea_categories
-        ]
+
+        # Prepare data for horizontal bar plot (previous and current year, BAREADEP)
+        barea_categories = result["barea_categories"]
+        barea_sales_current = result["barea_sales_current"]
+        barea_sales_previous = result["barea_sales_previous"]
+        growth_barea = result["growth_barea"]
 
         # Create color map for BAREADEP categories
         colors = px.colors.qualitative.Plotly[:len(barea_categories)]
         color_map = dict(zip(barea_categories, colors))
 
         # Create horizontal bar plot
-        fig_barea = go.Figure()
-        fig_barea.add_trace(go.Bar(
-            y=barea_categories,
-            x=barea_sales_previous["Sale In Cr"],
-            name="2024 Sales",
-            marker_color="blue",
-            text=[f"₹{val:.2f} Cr" for val in barea_sales_previous["Sale In Cr"]],
-            texttemplate="%{text}",
-            textposition="auto",
-            textfont=dict(
-                family="Arial, sans-serif",
-                size=0.75 * 16
-            ),
-            orientation='h'
-        ))
-        fig_barea.add_trace(go.Bar(
-            y=barea_categories,
-            x=barea_sales_current["Sale In Cr"],
-            name="2025 Sales",
-            marker_color="orange",
-            text=[f"₹{val:.2f} Cr" for val in barea_sales_current["Sale In Cr"]],
-            texttemplate="%{text}",
-            textposition="auto",
-            textfont=dict(
-                family="Arial, sans-serif",
-                size=0.75 * 16
-            ),
-            orientation='h'
+        fig_barea = cached_figure(dashboard_key, "bareadep_sales", lambda: combo_chart(
+            barea_categories,
+            [(f"{previous_year} Sales", "blue", barea_sales_previous["Sale In Cr"]), (f"{current_year} Sales", "orange", barea_sales_current["Sale In Cr"])],
+            ("Growth %", growth_barea),
+            f"Business Area-wise Sales ({previous_year} vs {current_year}, {as_of_label}) with Growth %",
+            "Business Area", "Sales (Cr)", bar_text="₹{value} Cr", horizontal=True
         ))
-        fig_barea.add_trace(go.Scatter(
-            y=barea_categories,
-            x=growth_barea,
-            name="Growth %",
-            xaxis="x2",
-            mode="lines+markers+text",
-            line=dict(color="darkgreen", width=2),
-            marker=dict(color="darkgreen", size=8),
-            text=[f"{growth_value:.2f}%" if growth_value != 0 else "" for growth_value in growth_barea],
-            textposition="middle right",
-            textfont=dict(
-                family="Arial Black, Arial, sans-serif",
-                size=0.875 * 16,
-                color=["red" if growth_value < 0 else "darkgreen" if growth_value > 0 else "darkgreen" for growth_value in growth_barea]
-            )
-        ))
-        fig_barea.update_layout(
-            title=dict(
-                text=f"Business Area-wise Sales (2024 vs 2025, as of {yesterday.strftime('%b %d')}) with Growth %",
-                x=0.5,
-                xanchor="center",
-                y=0.95,
-                font=dict(family="Arial, sans-serif", size=16, color="black")
-            ),
-            yaxis=dict(title="Business Area"),
-            xaxis=dict(
-                title="Sales (Cr)",
-                tickformat=".2f"
-            ),
-            xaxis2=dict(
-                title="Growth %",
-                overlaying="x",
-                side="top",
-                tickformat=".2f",
-                ticksuffix="%"
-            ),
-            barmode="group",
-            showlegend=True,
-            legend=dict(
-                x=0.5,
-                y=-0.15,
-                xanchor="center",
-                yanchor="top",
-                orientation="h"
-            ),
-            template="plotly_white",
-            margin=dict(t=100, b=100, l=100, r=80),
-            autosize=True
-        )
 
         # Display region-wise and business area charts
         with st.container():
@@ -966,49 +774,30 @@ def drr_summary_page():
         </style>
     """, unsafe_allow_html=True)
 
-    if st.session_state.refresh_trigger:
-        st.session_state.refresh_trigger = False
-        st.rerun()
+    with st.sidebar:
+        sidebar_panel()
+    st.title("📊 Detailed DRR Summary")
+    drr_summary_view()
 
+@st.fragment
+@timed("Detailed DRR view")
+def drr_summary_view():
     df = load_data()
     if df.empty:
         st.error("No data available for DRR Summary.")
         return
 
-    with st.sidebar:
-        st.subheader("👤 Profile")
-        with st.expander("🔽 Profile Options"):
-            st.text(f"User: {st.session_state.username}")
-            st.text(f"Role: {st.session_state.access}")
-            if st.button("🚪 Logout"):
-                for key in list(st.session_state.keys()):
-                    del st.session_state[key]
-                st.rerun()
-            change_password()
-        st.markdown("---")
-        st.button("↻ Refresh Data", on_click=refresh_callback)
-        st.title("🔍 Filters")
-        date_range = st.date_input("Select FILE_DATE Range", 
-                                 [df["FILE_DATE"].min(), df["FILE_DATE"].max()] if "FILE_DATE" in df.columns else [datetime.now(), datetime.now()])
-
-    st.title("📊 Detailed DRR Summary")
+    date_range = st.date_input("Select FILE_DATE Range", 
+                             [df["FILE_DATE"].min(), df["FILE_DATE"].max()] if "FILE_DATE" in df.columns else [datetime.now(), datetime.now()])
     if len(date_range) == 2 and "FILE_DATE" in df.columns:
         df = df[(df["FILE_DATE"] >= pd.to_datetime(date_range[0])) & (df["FILE_DATE"] <= pd.to_datetime(date_range[1]))]
     st.markdown("### No data displayed (all tables and KPIs removed).")
 
 def target_vs_ach_page():
-    current_date = datetime(2025, 7, 24, 22, 4)  # 10:04 PM IST, July 24, 2025
-    yesterday = current_date - timedelta(days=1)
-    current_year = current_date.year
-    current_month = current_date.month
-    previous_year = current_year - 1
-    previous_year_yesterday = yesterday.replace(year=previous_year)
-
-    try:
-        with open(tm_logo_path, "rb") as img_file:
-            tm_logo_base64 = base64.b64encode(img_file.read()).decode()
-        tm_logo_html = f"<img src='data:image/png;base64,{tm_logo_base64}' style='height: 4vh; margin-left: 1vw;'>"
-    except FileNotFoundError:
+    tm_logo_src = get_assets()["tm_logo"]
+    if tm_logo_src:
+        tm_logo_html = f"<img src='{tm_logo_src}' style='height: 4vh; margin-left: 1vw;'>"
+    else:
         tm_logo_html = "<p style='color: red; margin-left: 1vw;'>TM Logo not found</p>"
 
     st.markdown(f"""
@@ -1017,102 +806,62 @@ def target_vs_ach_page():
             <div class="banner-text">🎯 Target vs Achievement Dashboard</div>
         </div>
     """, unsafe_allow_html=True)
+    with st.sidebar:
+        sidebar_panel()
+    target_vs_ach_view()
 
-    if st.session_state.refresh_trigger:
-        st.session_state.refresh_trigger = False
-        st.rerun()
-
+@st.fragment
+@timed("Target Vs Ach view")
+def target_vs_ach_view():
+    # Filters, KPIs and charts rerun together when a filter changes; see dashboard_view
     with st.container():
         st.markdown('<div class="main-content">', unsafe_allow_html=True)
 
-        df = load_data()
-        target_df = load_target_data()
-        if df.empty or target_df.empty:
+        df, daily, data_columns, data_version = load_sales_cube()
+        targets = load_target_data()
+        target_version = current_target_version()
+        if df.empty or targets is None:
             st.error("Required data is missing. Check CSV and Excel files.")
             st.markdown('</div>', unsafe_allow_html=True)
             return
 
-        type_col = None
-        for col in target_df.columns:
-            if col.strip().lower() in ['type', 'category']:
-                type_col = col
-                break
-        if type_col is None:
+        if not targets["typed"]:
             st.warning(f"Column 'TYPE' not found in Target.csv. Using all rows for BAREA/REGION calculations.")
-            target_barea = target_df
-            target_region = target_df
-            target_file_type = target_df
         else:
-            target_barea = target_df[target_df[type_col].str.strip().str.upper() == "BAREA"]
-            target_region = target_df[target_df[type_col].str.strip().str.upper() == "REGION"]
-            target_file_type = target_df[target_df[type_col].str.strip().str.upper() == "FILE TYPE"]
-            if target_region.empty:
+            if "REGION" not in targets["types"]:
                 st.warning("No rows with TYPE='REGION' found in Target.csv for region-wise graph.")
-            if target_barea.empty:
+            if "BAREA" not in targets["types"]:
                 st.warning("No rows with TYPE='BAREA' found in Target.csv for month-wise graph and KPI cards.")
-            if target_file_type.empty:
+            if "FILE TYPE" not in targets["types"]:
                 st.warning("No rows with TYPE='FILE TYPE' found in Target.csv for file type graphs.")
 
-        region_col = None
-        for col in target_df.columns:
-            if col.strip().lower() in ['region', 'file_type']:
-                region_col = col
-                break
-        if region_col is None and not target_file_type.empty:
-            st.warning(f"Column 'REGION' not found in Target.csv for TYPE='FILE TYPE'. File Type graphs will show zero targets.")
-
-        with st.sidebar:
-            st.subheader("👤 Profile")
-            with st.expander("🔽 Profile Options"):
-                st.text(f"User: {st.session_state.username}")
-                st.text(f"Role: {st.session_state.access}")
-                if st.button("🚪 Logout"):
-                    for key in list(st.session_state.keys()):
-                        del st.session_state[key]
-                    st.rerun()
-                change_password()
-            st.markdown("---")
-            st.button("↻ Refresh Data", on_click=refresh_callback)
-            st.title("🔍 Filters")
-            region_options = ["All"] + sorted(df["REGION"].dropna().astype(str).unique()) if "REGION" in df.columns else ["All"]
+        region_col, quarter_col, business_col, as_of_col = st.columns(4)
+        with region_col:
+            region_options = filter_options(df["REGION"]) if "REGION" in df.columns else ["All"]
             region = st.selectbox("Region", region_options, key="tva_region")
-            travel_qtr_options = ["All"] + sorted(df["Travel Qtr"].dropna().astype(str).unique()) if "Travel Qtr" in df.columns else ["All"]
+        with quarter_col:
+            travel_qtr_options = filter_options(df["Travel Qtr"]) if "Travel Qtr" in df.columns else ["All"]
             quarter = st.selectbox("Travel Quarter", travel_qtr_options, key="tva_quarter")
-            final_business_options = ["All"] + sorted(df["Final Buniess"].dropna().astype(str).unique()) if "Final Buniess" in df.columns else ["All"]
+        with business_col:
+            final_business_options = filter_options(df["Final Buniess"]) if "Final Buniess" in df.columns else ["All"]
             final_business = st.selectbox("Final Buniess", final_business_options, key="tva_final_business")
+        with as_of_col:
+            as_of = as_of_input("tva_as_of")
 
-        current_year_df = df[df["Travel Y"] == 2025]
-        sap_2025 = pd.DataFrame()
-        current_base_2025 = pd.DataFrame()
-        if not current_year_df.empty:
-            sap_2025 = current_year_df[
-                (current_year_df["Source"] == "SAP") & 
-                (current_year_df["Month Num"] >= 1) & 
-                (current_year_df["Month Num"] < current_month)
-            ]
-            current_base_2025 = current_year_df[
-                (current_year_df["Source"] == "Current_Base") & 
-                (current_year_df["Month Num"] >= current_month)
-            ]
-            current_year_df = pd.concat([sap_2025, current_base_2025], ignore_index=True)
-
-        filtered_df = current_year_df.copy()
-        if region != "All" and "REGION" in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df["REGION"].astype(str) == region]
-        if quarter != "All" and "Travel Qtr" in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df["Travel Qtr"].astype(str) == quarter]
-        if final_business != "All" and "Final Buniess" in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df["Final Buniess"].astype(str) == final_business]
-
-        sales_current = filtered_df["Sale In Cr"].sum()
-        total_target = target_barea["Target Amount Cr"].sum() if "Target Amount Cr" in target_barea.columns else 0
-
-        business_targets = {}
-        for business in ["LOLH", "LOSH", "LTDM", "AIR"]:
-            target_business = target_barea[
-                target_barea["Region"].str.strip().str.upper() == business
-            ]
-            business_targets[business] = target_business["Target Amount Cr"].sum() if "Target Amount Cr" in target_business.columns else 0
+        current_year = as_of.year
+        as_of_label = as_of_text(as_of)
+
+        view = sales_view([current_year], region, quarter, final_business)
+        cube, daily, data_version = view["cube"], view["daily"], view["version"]
+        target_key = (data_version, target_version, query_backend, "target_vs_ach", region, quarter, final_business, as_of)
+        if query_backend == "duckdb":
+            compute = lambda: sql_backend(view).target_vs_ach_aggregates(targets, region, quarter, final_business, as_of)
+        else:
+            compute = lambda: target_vs_ach_aggregates(cube, get_filter_index(data_version, cube), daily, targets, region, quarter, final_business, as_of)
+        result = get_result_cache().get_or_compute(target_key, compute)
+        sales_current = result["sales_current"]
+        total_target = result["total_target"]
+        business_targets = result["business_targets"]
 
         with st.container():
             st.markdown('<div class="kpi-container">', unsafe_allow_html=True)
@@ -1135,7 +884,7 @@ def target_vs_ach_page():
                         st.markdown(f"""
                             <div class="kpi-card {card_style}" style='text-align: center;'>
                                 <h3 style='{header_style}'><i class="fas {icon_map[business]}"></i> Total Sales</h3>
-                                <p style='{text_style}'>2025 (as of {yesterday.strftime('%b %d')}): ₹{sales_current:.2f} Cr</p>
+                                <p style='{text_style}'>{current_year} ({as_of_label}): ₹{sales_current:.2f} Cr</p>
                                 <p style='{text_style}'>Target: ₹{total_target:.2f} Cr</p>
                                 <p style='{text_style}'>Achievement: {ach_pct:.2f}%</p>
                                 <div style='width: 100%; height: 0.625rem; background-color: #d3d3d3; border: 1px solid #000000; border-radius: 0.3125rem; margin-top: 0.3125rem;'>
@@ -1143,8 +892,8 @@ def target_vs_ach_page():
                                 </div>
                             </div>
                         """, unsafe_allow_html=True)
-                    elif "Final Buniess" in filtered_df.columns and business in filtered_df["Final Buniess"].dropna().astype(str).unique():
-                        current_sales = filtered_df[filtered_df["Final Buniess"].astype(str) == business]["Sale In Cr"].sum()
+                    elif result["business_sales"][business] is not None:
+                        current_sales = result["business_sales"][business]
                         target = business_targets.get(business, 0)
                         ach_pct = (current_sales / target * 100) if target > 0 else 0
                         card_style = "other"
@@ -1152,7 +901,7 @@ def target_vs_ach_page():
                         st.markdown(f"""
                             <div class="kpi-card {card_style}" style='text-align: center;'>
                                 <h3><i class="fas {icon_map[business]}"></i> {business}</h3>
-                                <p style='{text_style}'>2025 (as of {yesterday.strftime('%b %d')}): ₹{current_sales:.2f} Cr</p>
+                                <p style='{text_style}'>{current_year} ({as_of_label}): ₹{current_sales:.2f} Cr</p>
                                 <p style='{text_style}'>Target: ₹{target:.2f} Cr</p>
                                 <p style='{text_style}'>Achievement: {ach_pct:.2f}%</p>
                                 <div style='width: 100%; height: 0.625rem; background-color: #d3d3d3; border: 1px solid #000000; border-radius: 0.3125rem; margin-top: 0.3125rem;'>
@@ -1168,7 +917,7 @@ def target_vs_ach_page():
                         st.markdown(f"""
                             <div class="kpi-card {card_style}" style='text-align: center;'>
                                 <h3><i class="fas {icon_map[business]}"></i> {business}</h3>
-                                <p style='{text_style}'>2025 Sales: No Data</p>
+                                <p style='{text_style}'>{current_year} Sales: No Data</p>
                                 <p style='{text_style}'>Target: ₹{target:.2f} Cr</p>
                                 <p style='{text_style}'>Achievement: N/A</p>
                                 <div style='width: 100%; height: 0.625rem; background-color: #d3d3d3; border: 1px solid #000000; border-radius: 0.3125rem; margin-top: 0.3125rem;'>
@@ -1178,108 +927,34 @@ def target_vs_ach_page():
                         """, unsafe_allow_html=True)
             st.markdown('</div>', unsafe_allow_html=True)
 
-        regions = sorted(filtered_df["REGION_B"].str.strip().str.upper().dropna().unique()) if "REGION_B" in filtered_df.columns else []
-        sales_by_region = filtered_df.groupby(filtered_df["REGION_B"].str.strip().str.upper())["Sale In Cr"].sum().reindex(regions, fill_value=0) if not filtered_df.empty else pd.Series(index=regions, dtype=float).fillna(0)
-        target_by_region = target_region.groupby(target_region["Region"].str.strip().str.upper())["Target Amount Cr"].sum().reindex(regions, fill_value=0) if not target_region.empty and "Target Amount Cr" in target_region.columns else pd.Series(index=regions, dtype=float).fillna(0)
-        ach_pct_by_region = [(sales_by_region.get(region, 0) / target_by_region.get(region, 0) * 100) if target_by_region.get(region, 0) > 0 else 0 for region in regions]
-
-        fig_region = go.Figure()
-        fig_region.add_trace(go.Bar(
-            x=regions,
-            y=sales_by_region,
-            name="2025 Sales",
-            marker_color="#FFC107",
-            text=[f"₹{val:.2f} Cr" for val in sales_by_region],
-            texttemplate="%{text}",
-            textposition="auto",
-            textfont=dict(family="Arial, sans-serif", size=0.75 * 16)
+        regions = result["regions"]
+        sales_by_region = result["sales_by_region"]
+        target_by_region = result["target_by_region"]
+        ach_pct_by_region = result["ach_pct_by_region"]
+
+        fig_region = cached_figure(target_key, "region_target", lambda: combo_chart(
+            regions,
+            [(f"{current_year} Sales", "#FFC107", sales_by_region), ("Target", "#8B8000", target_by_region)],
+            ("Achievement %", ach_pct_by_region),
+            f"Region-wise Target vs Achievement ({current_year}, {as_of_label})",
+            "Region", "Amount (Cr)", bar_text="₹{value} Cr", value_prefix="₹"
         ))
-        fig_region.add_trace(go.Bar(
-            x=regions,
-            y=target_by_region,
-            name="Target",
-            marker_color="#8B8000",
-            text=[f"₹{val:.2f} Cr" for val in target_by_region],
-            texttemplate="%{text}",
-            textposition="auto",
-            textfont=dict(family="Arial, sans-serif", size=0.75 * 16)
-        ))
-        fig_region.add_trace(go.Scatter(
-            x=regions,
-            y=ach_pct_by_region,
-            name="Achievement %",
-            yaxis="y2",
-            mode="lines+markers+text",
-            line=dict(color="darkgreen", width=2),
-            marker=dict(color="darkgreen", size=8),
-            text=[f"{pct:.2f}%" if pct != 0 else "" for pct in ach_pct_by_region],
-            textposition="top center",
-            textfont=dict(family="Arial Black, Arial, sans-serif", size=0.875 * 16, color=["red" if pct < 0 else "darkgreen" for pct in ach_pct_by_region])
-        ))
-        fig_region.update_layout(
-            title=dict(text=f"Region-wise Target vs Achievement (2025, as of {yesterday.strftime('%b %d')})", x=0.5, xanchor="center", y=0.95, font=dict(family="Arial, sans-serif", size=16, color="black")),
-            xaxis=dict(title="Region"),
-            yaxis=dict(title="Amount (Cr)", side="left", tickformat=".2f", tickprefix="₹"),
-            yaxis2=dict(title="Achievement %", overlaying="y", side="right", tickformat=".2f", ticksuffix="%"),
-            barmode="group",
-            legend=dict(x=0.5, y=-0.15, xanchor="center", yanchor="top", orientation="h"),
-            template="plotly_white",
-            margin=dict(t=100, b=100, l=80, r=80),
-            autosize=True
-        )
 
         with st.container():
             st.plotly_chart(fig_region, use_container_width=True)
 
         months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-        sales_by_month = filtered_df.groupby("Month Num")["Sale In Cr"].sum().reindex(range(1, 13), fill_value=0) if not filtered_df.empty else pd.Series(index=range(1, 13), dtype=float).fillna(0)
-        target_by_month = target_barea.groupby("Month")["Target Amount Cr"].sum().reindex(months, fill_value=0) if not target_barea.empty and "Target Amount Cr" in target_barea.columns else pd.Series(index=months, dtype=float).fillna(0)
-        ach_pct_by_month = [(sales_by_month.get(i, 0) / target_by_month.get(m, 0) * 100) if target_by_month.get(m, 0) > 0 else 0 for i, m in enumerate(months, 1)]
-
-        fig_month = go.Figure()
-        fig_month.add_trace(go.Bar(
-            x=months,
-            y=sales_by_month,
-            name="2025 Sales",
-            marker_color="#FFC107",
-            text=[f"₹{val:.2f} Cr" for val in sales_by_month],
-            texttemplate="%{text}",
-            textposition="auto",
-            textfont=dict(family="Arial, sans-serif", size=0.75 * 16)
-        ))
-        fig_month.add_trace(go.Bar(
-            x=months,
-            y=target_by_month,
-            name="Target",
-            marker_color="#8B8000",
-            text=[f"₹{val:.2f} Cr" for val in target_by_month],
-            texttemplate="%{text}",
-            textposition="auto",
-            textfont=dict(family="Arial, sans-serif", size=0.75 * 16)
+        sales_by_month = result["sales_by_month"]
+        target_by_month = result["target_by_month"]
+        ach_pct_by_month = result["ach_pct_by_month"]
+
+        fig_month = cached_figure(target_key, "month_target", lambda: combo_chart(
+            months,
+            [(f"{current_year} Sales", "#FFC107", sales_by_month), ("Target", "#8B8000", target_by_month)],
+            ("Achievement %", ach_pct_by_month),
+            f"Month-wise Target vs Achievement ({current_year}, {as_of_label})",
+            "Month", "Amount (Cr)", bar_text="₹{value} Cr", value_prefix="₹"
         ))
-        fig_month.add_trace(go.Scatter(
-            x=months,
-            y=ach_pct_by_month,
-            name="Achievement %",
-            yaxis="y2",
-            mode="lines+markers+text",
-            line=dict(color="darkgreen", width=2),
-            marker=dict(color="darkgreen", size=8),
-            text=[f"{pct:.2f}%" if pct != 0 else "" for pct in ach_pct_by_month],
-            textposition="top center",
-            textfont=dict(family="Arial Black, Arial, sans-serif", size=0.875 * 16, color=["red" if pct < 0 else "darkgreen" for pct in ach_pct_by_month])
-        ))
-        fig_month.update_layout(
-            title=dict(text=f"Month-wise Target vs Achievement (2025, as of {yesterday.strftime('%b %d')})", x=0.5, xanchor="center", y=0.95, font=dict(family="Arial, sans-serif", size=16, color="black")),
-            xaxis=dict(title="Month"),
-            yaxis=dict(title="Amount (Cr)", side="left", tickformat=".2f", tickprefix="₹"),
-            yaxis2=dict(title="Achievement %", overlaying="y", side="right", tickformat=".2f", ticksuffix="%"),
-            barmode="group",
-            legend=dict(x=0.5, y=-0.15, xanchor="center", yanchor="top", orientation="h"),
-            template="plotly_white",
-            margin=dict(t=100, b=100, l=80, r=80),
-            autosize=True
-        )
 
         with st.container():
             st.plotly_chart(fig_month, use_container_width=True)
@@ -1289,89 +964,130 @@ def target_vs_ach_page():
         cols = st.columns([1, 1, 1])
         for idx, business in enumerate(businesses):
             with cols[idx]:
-                business_df = filtered_df[filtered_df["Final Buniess"].str.strip().str.upper() == business] if "Final Buniess" in filtered_df.columns else pd.DataFrame()
-                sales_by_file_type = business_df.groupby(business_df["FILE_TYPE"].str.strip().str.upper())["Sale In Cr"].sum().reindex(file_types, fill_value=0) if not business_df.empty else pd.Series(index=file_types, dtype=float).fillna(0)
-                target_business = target_file_type[target_file_type["ZONE"].str.strip().str.upper() == business]
-                if target_business.empty:
+                file_type_chart = result["file_type_charts"][business]
+                if not file_type_chart["target_found"]:
                     st.warning(f"No rows with ZONE='{business}' and TYPE='FILE TYPE' found in Target.csv for {business} graph.")
-                    target_by_file_type = pd.Series(index=file_types, dtype=float).fillna(0)
-                elif region_col is None:
-                    target_by_file_type = pd.Series(index=file_types, dtype=float).fillna(0)
-                else:
-                    target_by_file_type = target_business.groupby(target_business[region_col].str.strip().str.upper())["Target Amount Cr"].sum().reindex(file_types, fill_value=0) if "Target Amount Cr" in target_business.columns else pd.Series(index=file_types, dtype=float).fillna(0)
-                ach_pct_by_file_type = [(sales_by_file_type.get(ft, 0) / target_by_file_type.get(ft, 0) * 100) if target_by_file_type.get(ft, 0) > 0 else 0 for ft in file_types]
-                fig = go.Figure()
-                fig.add_trace(go.Bar(
-                    x=file_types,
-                    y=sales_by_file_type,
-                    name="2025 Sales",
-                    marker_color="#FFC107",
-                    text=[f"₹{val:.2f} Cr" for val in sales_by_file_type],
-                    texttemplate="%{text}",
-                    textposition="auto",
-                    textfont=dict(family="Arial, sans-serif", size=0.75 * 16)
-                ))
-                fig.add_trace(go.Bar(
-                    x=file_types,
-                    y=target_by_file_type,
-                    name="Target",
-                    marker_color="#8B8000",
-                    text=[f"₹{val:.2f} Cr" for val in target_by_file_type],
-                    texttemplate="%{text}",
-                    textposition="auto",
-                    textfont=dict(family="Arial, sans-serif", size=0.75 * 16)
-                ))
-                fig.add_trace(go.Scatter(
-                    x=file_types,
-                    y=ach_pct_by_file_type,
-                    name="Achievement %",
-                    yaxis="y2",
-                    mode="lines+markers+text",
-                    line=dict(color="darkgreen", width=2),
-                    marker=dict(color="darkgreen", size=8),
-                    text=[f"{pct:.2f}%" if pct != 0 else "" for pct in ach_pct_by_file_type],
-                    textposition="top center",
-                    textfont=dict(family="Arial Black, Arial, sans-serif", size=0.875 * 16, color=["red" if pct < 0 else "darkgreen" for pct in ach_pct_by_file_type])
+                sales_by_file_type = file_type_chart["sales_by_file_type"]
+                target_by_file_type = file_type_chart["target_by_file_type"]
+                ach_pct_by_file_type = file_type_chart["ach_pct_by_file_type"]
+                fig = cached_figure(target_key + (business,), "file_type_target", lambda: combo_chart(
+                    file_types,
+                    [(f"{current_year} Sales", "#FFC107", sales_by_file_type), ("Target", "#8B8000", target_by_file_type)],
+                    ("Achievement %", ach_pct_by_file_type),
+                    f"{business} Target vs Achievement ({current_year}, {as_of_label})",
+                    "File Type", "Amount (Cr)", bar_text="₹{value} Cr", value_prefix="₹"
                 ))
-                fig.update_layout(
-                    title=dict(text=f"{business} Target vs Achievement (2025, as of {yesterday.strftime('%b %d')})", x=0.5, xanchor="center", y=0.95, font=dict(family="Arial, sans-serif", size=16, color="black")),
-                    xaxis=dict(title="File Type"),
-                    yaxis=dict(title="Amount (Cr)", side="left", tickformat=".2f", tickprefix="₹"),
-                    yaxis2=dict(title="Achievement %", overlaying="y", side="right", tickformat=".2f", ticksuffix="%"),
-                    barmode="group",
-                    legend=dict(x=0.5, y=-0.15, xanchor="center", yanchor="top", orientation="h"),
-                    template="plotly_white",
-                    margin=dict(t=100, b=100, l=80, r=80),
-                    autosize=True
-                )
                 st.plotly_chart(fig, use_container_width=True)
 
         st.markdown('</div>', unsafe_allow_html=True)
 
+def performance_page():
+    with st.sidebar:
+        sidebar_panel()
+    st.title("⏱️ Performance")
+    if st.session_state.access != "Admin":
+        st.error("The Performance page is only available to Admin users.")
+        return
+    performance_view()
+
+def timing_table(events, empty_text):
+    if events:
+        st.dataframe(summarise(events), hide_index=True, use_container_width=True)
+    else:
+        st.caption(empty_text)
+
+def performance_view():
+    recorder = get_recorder()
+    dataset = get_dataset_store().current()
+    st.caption(f"{len(recorder):,} timing events in memory (the latest {perf_buffer:,} are kept); every event is also appended to {perf_log}")
+
+    st.subheader("Data loads")
+    st.markdown("**Sales data** (open: the prebuilt dataset from etl.py; otherwise per source read and normalise, then history write, concat, compact, aggregate)")
+    timing_table(recorder.events("load"), "No sales data load recorded yet.")
+    st.markdown("**Target data**")
+    timing_table(recorder.events("target"), "No target data load recorded yet.")
+    st.markdown("**History views** (as-of dates outside the data version)")
+    timing_table(recorder.events("history view"), "No history view opened yet.")
+
+    st.subheader("Page reruns")
+    timing_table(recorder.events("page"), "No page rerun recorded yet.")
+
+    st.subheader("Figures")
+    figure_events = recorder.events("figure")
+    if figure_events:
+        figures = pd.DataFrame(figure_events).groupby("name", sort=False).agg(**{
+            "Builds": ("seconds", "size"),
+            "Build p50 ms": ("seconds", "median"),
+            "Serialise p50 ms": ("serialise", "median"),
+            "Last KB": ("bytes", "last"),
+        })
+        figures[["Build p50 ms", "Serialise p50 ms"]] *= 1000
+        figures["Last KB"] /= 1024
+        st.dataframe(figures.round(1).rename_axis("Chart").reset_index(), hide_index=True, use_container_width=True)
+        st.caption(f"Latest payloads total {figures['Last KB'].sum():.1f} KB; cached figures are not rebuilt")
+    else:
+        st.caption("No figure built yet.")
+
+    st.subheader("Caches")
+    cache = get_result_cache().stats()
+    st.dataframe(pd.DataFrame([{
+        "Cache": "Page results and figures",
+        "Entries": cache["entries"],
+        "MB": round(cache["bytes"] / 1e6, 1),
+        "Budget MB": round(cache["max_bytes"] / 1e6, 1),
+        "Hits": cache["hits"],
+        "Misses": cache["misses"],
+        "Evictions": cache["evictions"],
+        "Hit ratio %": round(cache["hit_rate"] * 100, 1),
+    }]), hide_index=True, use_container_width=True)
+    partitions = get_history_store().select(history_years)
+    st.caption(f"History store: {len(partitions):,} partitions, {sum(partition['rows'] for partition in partitions):,} rows")
+
+    st.subheader("Memory")
+    memory = dataset["memory"] or {"before": 0, "after": 0}
+    daily_bytes = sum(getattr(value, "nbytes", 0) for value in dataset["daily"].values()) if dataset["daily"] else 0
+    st.dataframe(pd.DataFrame({
+        "Held": ["Booking rows as loaded", "Booking rows (compact)", "Sales cube", "Daily running totals", "Page results cache"],
+        "MB": [
+            memory["before"] / 1e6,
+            memory["after"] / 1e6,
+            dataset["cube"].memory_usage(deep=True).sum() / 1e6,
+            daily_bytes / 1e6,
+            cache["bytes"] / 1e6,
+        ],
+    }).round(1), hide_index=True, use_container_width=True)
+
 if __name__ == '__main__':
+    if watch_files:
+        start_file_watcher()
     if st.session_state.logged_in:
-        tab_selection = st.radio("", ["Dashboard", "Detailed DRR", "Target Vs Ach"], horizontal=True, label_visibility="collapsed")
+        tabs = ["Dashboard", "Detailed DRR", "Target Vs Ach"]
+        if st.session_state.access == "Admin":
+            tabs.append("Performance")
+        tab_selection = st.radio("", tabs, horizontal=True, label_visibility="collapsed")
         st.session_state.active_tab = tab_selection
-        if tab_selection == "Dashboard":
-            dashboard_page()
-        elif tab_selection == "Detailed DRR":
-            drr_summary_page()
-        elif tab_selection == "Target Vs Ach":
-            target_vs_ach_page()
+        with get_recorder().timer("page", tab_selection):
+            if tab_selection == "Dashboard":
+                dashboard_page()
+            elif tab_selection == "Detailed DRR":
+                drr_summary_page()
+            elif tab_selection == "Target Vs Ach":
+                target_vs_ach_page()
+            elif tab_selection == "Performance":
+                performance_page()
     else:
-        set_background(bg_image)
+        set_background(get_assets()["background"])
         try:
-            users_df = pd.read_csv(user_file)
+            user_store = get_user_store()
         except FileNotFoundError:
             st.error(f"User file not found at {user_file}")
             st.stop()
+        except ValueError as e:
+            st.error(str(e))
+            st.stop()
 
-        try:
-            with open(logo_path, "rb") as img_file:
-                logo_base64 = base64.b64encode(img_file.read()).decode()
-            logo_html = f"<div style='text-align: center;'><img src='data:image/png;base64,{logo_base64}' style='width: 15vw; max-width: 150px;'></div>"
-        except FileNotFoundError:
-            logo_html = ""
+        logo_src = get_assets()["logo"]
+        logo_html = f"<div style='text-align: center;'><img src='{logo_src}' style='width: 15vw; max-width: 150px;'></div>" if logo_src else ""
 
         st.markdown("""
             <style>
@@ -1396,20 +1112,12 @@ if __name__ == '__main__':
             password = st.text_input("Password", type="password")
             submitted = st.form_submit_button("Login")
 
-            pw_col = next((col for col in users_df.columns if col.strip().lower() == "password"), None)
-            if not pw_col:
-                st.error("Password column not found in Emp_base.csv")
-                st.stop()
-
             if submitted:
-                user_row = users_df[
-                    (users_df["User Name"].str.strip().str.lower() == username.strip().lower()) &
-                    (users_df[pw_col].astype(str).str.strip() == password.strip())
-                ]
-                if not user_row.empty:
+                access = user_store.authenticate(username, password)
+                if access is not None:
                     st.session_state.logged_in = True
                     st.session_state.username = username
-                    st.session_state.access = user_row["Access"].values[0]
+                    st.session_state.access = access
                     st.success(f"Welcome, {username}!")
                     st.rerun()
                 else:
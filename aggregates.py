@@ -0,0 +1,432 @@
+import calendar
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from data_loader import month_name_map, distinct_values, frame_digest, source_registry, window_rules
+
+# === SALES CUBE ===
+# None of the dashboard charts or KPI cards need individual bookings, so the row-level
+# frame is rolled up once per data version into a cube of summed measures over every
+# dimension the pages filter or group by. Its size depends on the number of distinct
+# dimension combinations, not on booking volume, and it keeps the row-level column
+# names so page code can read it like the full frame.
+#
+# Alongside it is a daily cube: for every cube row, the running totals of its measures
+# by booking day (FILE_DATE), stored as one sorted key array over (cube row, day) so the
+# totals as of any day are a binary search away. Rows of sources without booking dates
+# sit before the first day and count at every as-of date; dated rows with no FILE_DATE
+# sit after the last day and never do, as with the row-level FILE_DATE filter.
+
+cube_dims = ["Source", "Travel Y", "Month Num", "REGION", "REGION_B", "Travel Qtr", "Final Buniess", "FILE_TYPE", "BAREADEP"]
+cube_measures = ["Sale In Cr", "TOTAL_PAX"]
+dated_sources = [source["name"] for source in source_registry if "FILE_DATE" in source["date_cols"]]
+
+
+def booking_days(df):
+    # (rows of dated sources, their booking day); NaT for undated sources and bad dates
+    dated = df["Source"].isin(dated_sources).to_numpy() if "Source" in df.columns else np.zeros(len(df), dtype=bool)
+    booked_on = np.full(len(df), np.datetime64("NaT"), dtype="datetime64[D]")
+    if "FILE_DATE" in df.columns and dated.any():
+        booked_on[dated] = pd.to_datetime(df["FILE_DATE"][dated], errors="coerce").to_numpy("datetime64[D]")
+    return dated, booked_on
+
+
+def build_sales_cube(df):
+    # Returns (cube, daily); daily holds the running totals for cube row i under keys
+    # i * daily["ranks"] + day rank
+    dims = [col for col in cube_dims if col in df.columns]
+    measures = [col for col in cube_measures if col in df.columns]
+
+    dated, booked_on = booking_days(df)
+    days = np.unique(booked_on[~np.isnat(booked_on)])
+    day_rank = np.zeros(len(df), dtype=np.int64)
+    day_rank[dated] = np.searchsorted(days, booked_on[dated]) + 1
+    day_rank[dated & np.isnat(booked_on)] = len(days) + 1
+
+    # dropna=False keeps rows with a missing dimension in the totals, as the row-level sums did
+    grouped = df.groupby(dims, observed=True, dropna=False, sort=False)
+    cube = grouped[measures].sum().reset_index()
+    if "Month Num" in cube.columns:
+        cube["Month Name"] = pd.Categorical(
+            cube["Month Num"].map(month_name_map), categories=list(month_name_map.values()), ordered=True
+        )
+
+    by_day = pd.DataFrame({"row": grouped.ngroup().to_numpy(), "rank": day_rank})
+    by_day[measures] = df[measures].to_numpy(dtype=float)
+    by_day = by_day.groupby(["row", "rank"], sort=True)[measures].sum()
+    rows = by_day.index.get_level_values("row").to_numpy()
+    ranks = len(days) + 2
+    daily = {
+        "measures": measures,
+        "days": days,
+        "ranks": ranks,
+        "keys": rows * ranks + by_day.index.get_level_values("rank").to_numpy(),
+        "start": np.searchsorted(rows, np.arange(len(cube))),
+        "cumulative": by_day.groupby(level="row").cumsum().to_numpy(),
+    }
+    return cube, daily
+
+
+def cube_version(cube, daily):
+    # Content digest of both cubes; moving a booking to another day changes it too
+    running = pd.DataFrame(daily["cumulative"]).assign(key=daily["keys"])
+    return f"{frame_digest(cube)}/{frame_digest(running)}/{len(daily['days'])}"
+
+
+# === FILTER INDEX ===
+# The sidebar filters and the year/source split are equality tests on a handful of
+# dimensions, so each value of those dimensions is mapped once per data version to the
+# sorted cube positions holding it. A filter selection is answered by intersecting
+# position arrays and taking only the matching rows, rather than scanning every column
+# and copying the whole cube on each rerun. Keys are the values as text, the same form
+# the filter select boxes hand back.
+
+index_dims = ["REGION", "Travel Qtr", "Final Buniess", "Source", "Travel Y"]
+filter_dims = [("REGION", "region"), ("Travel Qtr", "quarter"), ("Final Buniess", "final_business")]
+no_rows = np.array([], dtype=np.intp)
+
+
+def build_filter_index(cube):
+    index = {}
+    for col in index_dims:
+        if col not in cube.columns:
+            continue
+        series = cube[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy()
+            labels = series.cat.categories.astype(str)
+        else:
+            codes, uniques = pd.factorize(series, sort=False)
+            labels = pd.Index(uniques).astype(str)
+        # Group positions by code in one sort; missing values (code -1) sort first and are skipped
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(labels) + 1))
+        positions = {}
+        for code, label in enumerate(labels):
+            rows = order[bounds[code]:bounds[code + 1]]
+            if len(rows):
+                positions[label] = np.union1d(positions[label], rows) if label in positions else rows
+        index[col] = positions
+    return index
+
+
+def index_rows(index, col, value):
+    return index[col].get(str(value), no_rows)
+
+
+def select_rows(index, n_rows, region="All", quarter="All", final_business="All"):
+    selections = {"region": region, "quarter": quarter, "final_business": final_business}
+    positions = None
+    for col, name in filter_dims:
+        if selections[name] == "All" or col not in index:
+            continue
+        rows = index_rows(index, col, selections[name])
+        positions = rows if positions is None else np.intersect1d(positions, rows, assume_unique=True)
+    return np.arange(n_rows) if positions is None else positions
+
+
+def take_rows(cube, positions):
+    return cube.take(positions).reset_index(drop=True)
+
+
+# === AS-OF WINDOWS ===
+# Sales as of any day are read off the daily cube, so the as-of date and booking period
+# are query parameters rather than load parameters. A travel-year view takes each
+# source's travel months (its window rule) with dated sources booked up to the as-of
+# day; a booking period (MTD, QTD, YTD or a custom start) takes bookings made between
+# its first day and the as-of day, i.e. the difference of two lookups. The comparison
+# year uses the same calendar days one year earlier.
+
+periods = ["Travel year", "MTD", "QTD", "YTD", "Custom"]
+
+
+def same_day_in_year(day, year):
+    # 29 Feb becomes 28 Feb in years without it
+    return day.replace(year=year, day=min(day.day, calendar.monthrange(year, day.month)[1]))
+
+
+def period_start(as_of, period, start=None):
+    if period == "MTD":
+        return as_of.replace(day=1)
+    if period == "QTD":
+        return as_of.replace(month=as_of.month - (as_of.month - 1) % 3, day=1)
+    if period == "YTD":
+        return as_of.replace(month=1, day=1)
+    if period == "Custom":
+        return start
+    return None
+
+
+def booked_to(daily, rows, day):
+    # Running totals of the given cube rows for bookings made on or before day
+    rank = np.searchsorted(daily["days"], np.datetime64(day, "D"), side="right")
+    pos = np.searchsorted(daily["keys"], rows * daily["ranks"] + rank, side="right") - 1
+    found = pos >= daily["start"][rows]
+    return np.where(found[:, None], daily["cumulative"][np.maximum(pos, 0)], 0.0)
+
+
+def window_rows(cube, index, daily, positions, as_of, year, period="Travel year", start=None):
+    # The given cube rows of one travel year as they stood on the as-of day (shifted into
+    # that year), with the measure columns replaced by the windowed totals; rows with
+    # nothing booked in the window are left out, as the row-level filters left them out
+    shift = as_of.year - year
+    cutoff = same_day_in_year(as_of, year)
+    first_day = period_start(as_of, period, start)
+    current_date = as_of + timedelta(days=1)
+    month_num = cube["Month Num"].to_numpy()
+    year_positions = np.intersect1d(positions, index_rows(index, "Travel Y", year), assume_unique=True)
+
+    row_parts, measure_parts = [], []
+    for source in source_registry:
+        rows = np.intersect1d(year_positions, index_rows(index, "Source", source["name"]), assume_unique=True)
+        if first_day is None:
+            rows = rows[window_rules[source["window"]](month_num[rows], current_date)]
+            measures = booked_to(daily, rows, cutoff)
+        elif source["name"] in dated_sources:
+            before = same_day_in_year(first_day, first_day.year - shift) - timedelta(days=1)
+            measures = booked_to(daily, rows, cutoff) - booked_to(daily, rows, before)
+        else:
+            # Undated sources have no booking days to place inside a period
+            continue
+        booked = (measures != 0).any(axis=1)
+        row_parts.append(rows[booked])
+        measure_parts.append(measures[booked])
+
+    rows = np.concatenate(row_parts) if row_parts else no_rows
+    year_df = take_rows(cube, rows)
+    year_df[daily["measures"]] = np.concatenate(measure_parts) if measure_parts else np.zeros((0, len(daily["measures"])))
+    return year_df
+
+
+# === TARGETS ===
+# Target.csv is normalised once per file version into one row per (Type, Region, Zone,
+# Month, Business Type): text upper-cased and stripped, months as three-letter names.
+# BAREA rows hold the business in Region, REGION rows the sales region, and FILE TYPE
+# rows the file type in Region and the business in Zone. The targets each Target vs Ach
+# chart shows do not depend on the filters, so they are summed here as well, in the same
+# long (Chart, Group, Key) layout as chart_sales below; target_vs_ach_aggregates joins
+# the two once.
+
+target_types = ["BAREA", "REGION", "FILE TYPE"]
+target_keys = ["Type", "Region", "Zone", "Month", "Business Type"]
+chart_keys = ["Chart", "Group", "Key"]
+
+
+def normalise_text(values):
+    return values.astype(str).str.strip().str.upper()
+
+
+def build_target_table(target_df):
+    # target_df: Target.csv with Region, Month and Target Amount Cr columns
+    type_col = next((col for col in target_df.columns if col.strip().lower() in ["type", "category"]), None)
+    table = pd.DataFrame({
+        "Region": normalise_text(target_df["Region"]),
+        "Zone": normalise_text(target_df["ZONE"]) if "ZONE" in target_df.columns else "",
+        "Month": target_df["Month"].astype(str).str.strip().str[:3].str.title(),
+        "Business Type": normalise_text(target_df["Business Type"]) if "Business Type" in target_df.columns else "",
+        "Target Amount Cr": target_df["Target Amount Cr"],
+    })
+    if type_col is None:
+        # Without a type column every row counts as every kind of target
+        table = pd.concat([table.assign(Type=target_type) for target_type in target_types], ignore_index=True)
+    else:
+        table["Type"] = normalise_text(target_df[type_col])
+    return target_index(table.groupby(target_keys)[["Target Amount Cr"]].sum(), type_col is not None)
+
+
+def target_index(table, typed):
+    # table: target amounts indexed by target_keys; typed: whether Target.csv had a type column
+    return {
+        "table": table,
+        "lookup": target_lookup(table),
+        "typed": typed,
+        "types": set(table.index.get_level_values("Type")),
+    }
+
+
+def target_lookup(table):
+    rows = table.reset_index()
+    barea = rows[rows["Type"] == "BAREA"]
+    region = rows[rows["Type"] == "REGION"]
+    file_type = rows[rows["Type"] == "FILE TYPE"]
+    parts = [
+        barea.assign(Chart="business", Group="", Key=barea["Region"]),
+        barea.assign(Chart="month", Group="", Key=barea["Month"]),
+        region.assign(Chart="region", Group="", Key=region["Region"]),
+        file_type.assign(Chart="file_type", Group=file_type["Zone"], Key=file_type["Region"]),
+    ]
+    return pd.concat(parts).groupby(chart_keys)["Target Amount Cr"].sum().rename("Target")
+
+
+# === PAGE AGGREGATES ===
+# Everything dashboard_page() and target_vs_ach_page() show for one filter selection,
+# computed from the cube in one call so the result can be kept in the shared result cache.
+# The pages only lay these values out as cards and charts.
+
+months = list(month_name_map.values())
+kpi_businesses = ["LOLH", "LOSH", "LTDM", "AIR"]
+file_types = ["GIT", "FIT", "AIR"]
+tva_businesses = ["LOLH", "LOSH", "LTDM"]
+tva_file_types = ["FIT", "GIT"]
+
+
+summary_dims = ["Month Num", "REGION_B", "Final Buniess", "FILE_TYPE", "BAREADEP"]
+
+
+def growth_pct(current, previous):
+    # Percentage change, 0 where there is no positive base to compare against
+    current = np.asarray(current, dtype=float)
+    previous = np.asarray(previous, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(previous > 0, (current - previous) / previous * 100, 0.0)
+
+
+def year_summary(year_df):
+    # The single groupby per year; every card and chart below re-sums this small frame
+    dims = [col for col in summary_dims if col in year_df.columns]
+    return year_df.groupby(dims, observed=True, dropna=False, sort=False)["Sale In Cr"].sum().reset_index()
+
+
+def sum_by(summary, col):
+    # Sales per value of one dimension, keyed by the value as text like the filters
+    if col not in summary.columns:
+        return pd.Series(dtype=float)
+    sales = summary.groupby(col, observed=True)["Sale In Cr"].sum()
+    sales.index = sales.index.astype(str)
+    return sales.groupby(level=0).sum()
+
+
+def dashboard_aggregates(cube, index, daily, region, quarter, final_business, as_of, period="Travel year", start=None):
+    filtered_rows = select_rows(index, len(cube), region, quarter, final_business)
+    current = year_summary(window_rows(cube, index, daily, filtered_rows, as_of, as_of.year, period, start))
+    previous = year_summary(window_rows(cube, index, daily, filtered_rows, as_of, as_of.year - 1, period, start))
+    return dashboard_result(current, previous)
+
+
+def dashboard_result(current, previous):
+    # The dashboard values from the current and previous year summaries (year_summary
+    # layout); shared by the query backends
+    sales_current = current["Sale In Cr"].sum()
+    sales_previous = previous["Sale In Cr"].sum()
+
+    # None marks a business with no rows in either year's window ("No Data Available" card)
+    present = set()
+    for summary in [current, previous]:
+        if "Final Buniess" in summary.columns:
+            present.update(distinct_values(summary["Final Buniess"]))
+    current_business = sum_by(current, "Final Buniess").reindex(kpi_businesses, fill_value=0)
+    previous_business = sum_by(previous, "Final Buniess").reindex(kpi_businesses, fill_value=0)
+    business_growth = growth_pct(current_business, previous_business)
+    business_kpis = {}
+    for i, business in enumerate(kpi_businesses):
+        business_kpis[business] = (current_business.iloc[i], previous_business.iloc[i], business_growth[i]) if business in present else None
+
+    month_nums = list(month_name_map.keys())
+    current_year_monthly = current.groupby("Month Num")["Sale In Cr"].sum().reindex(month_nums, fill_value=0).set_axis(months)
+    previous_year_monthly = previous.groupby("Month Num")["Sale In Cr"].sum().reindex(month_nums, fill_value=0).set_axis(months)
+
+    current_region = sum_by(current, "REGION_B")
+    previous_region = sum_by(previous, "REGION_B")
+    regions = sorted(set(current_region.index) | set(previous_region.index))
+    current_year_region = current_region.reindex(regions, fill_value=0)
+    previous_year_region = previous_region.reindex(regions, fill_value=0)
+
+    current_barea = sum_by(current, "BAREADEP")
+    previous_barea = sum_by(previous, "BAREADEP")
+    current_barea = current_barea[current_barea > 0]
+    previous_barea = previous_barea[previous_barea > 0]
+    barea_categories = sorted(set(current_barea.index) | set(previous_barea.index))
+    current_barea = current_barea.reindex(barea_categories, fill_value=0)
+    previous_barea = previous_barea.reindex(barea_categories, fill_value=0)
+
+    return {
+        "sales_current": sales_current,
+        "sales_previous": sales_previous,
+        "growth_pct": float(growth_pct(sales_current, sales_previous)),
+        "business_kpis": business_kpis,
+        "current_year_monthly": current_year_monthly,
+        "previous_year_monthly": previous_year_monthly,
+        "growth_monthly": growth_pct(current_year_monthly, previous_year_monthly).tolist(),
+        "sales_values": current_business.tolist(),
+        "file_type_sales": sum_by(current, "FILE_TYPE").reindex(file_types, fill_value=0).tolist(),
+        "regions": regions,
+        "current_year_region": current_year_region,
+        "previous_year_region": previous_year_region,
+        "growth_region": growth_pct(current_year_region, previous_year_region).tolist(),
+        "barea_categories": barea_categories,
+        "barea_sales_current": pd.DataFrame({"BAREADEP": barea_categories, "Sale In Cr": current_barea.to_numpy()}),
+        "barea_sales_previous": pd.DataFrame({"BAREADEP": barea_categories, "Sale In Cr": previous_barea.to_numpy()}),
+        "growth_barea": growth_pct(current_barea, previous_barea).tolist(),
+    }
+
+
+def chart_sales(summary):
+    # Sales per chart key in the layout of target_lookup
+    month_sales = summary.groupby("Month Num")["Sale In Cr"].sum()
+    month_sales.index = month_sales.index.map(month_name_map)
+    parts = {
+        ("region", ""): sum_by(summary, "REGION_B"),
+        ("month", ""): month_sales,
+        ("business", ""): sum_by(summary, "Final Buniess"),
+    }
+    if "Final Buniess" in summary.columns and "FILE_TYPE" in summary.columns:
+        for business, business_summary in summary.groupby("Final Buniess", observed=True):
+            parts[("file_type", str(business))] = sum_by(business_summary, "FILE_TYPE")
+    return pd.concat(parts, names=chart_keys).groupby(level=chart_keys).sum().rename("Sales")
+
+
+def chart_rows(aligned, chart, keys, group=""):
+    # The aligned rows of one chart in the order of keys; 0 where either side is missing
+    index = pd.MultiIndex.from_product([[chart], [group], keys], names=chart_keys)
+    return aligned.reindex(index, fill_value=0).set_axis(keys)
+
+
+def target_vs_ach_aggregates(cube, index, daily, targets, region, quarter, final_business, as_of):
+    # Targets are for the current year only
+    filtered_rows = select_rows(index, len(cube), region, quarter, final_business)
+    return target_vs_ach_result(year_summary(window_rows(cube, index, daily, filtered_rows, as_of, as_of.year)), targets)
+
+
+def target_vs_ach_result(summary, targets):
+    # The Target vs Ach values from the current year summary; shared by the query backends
+    # Sales and targets of every chart aligned in one join
+    aligned = pd.concat([chart_sales(summary), targets["lookup"]], axis=1).fillna(0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        aligned["Ach %"] = np.where(aligned["Target"] > 0, aligned["Sales"] / aligned["Target"] * 100, 0.0)
+
+    business = chart_rows(aligned, "business", kpi_businesses)
+    present = set(distinct_values(summary["Final Buniess"])) if "Final Buniess" in summary.columns else set()
+    # None marks a business with no rows under the current filters ("No Data" card)
+    business_sales = {name: business.at[name, "Sales"] if name in present else None for name in kpi_businesses}
+
+    regions = distinct_values(summary["REGION_B"]) if "REGION_B" in summary.columns else []
+    by_region = chart_rows(aligned, "region", regions)
+    by_month = chart_rows(aligned, "month", months)
+
+    # One entry per business chart; target_found=False shows the missing-target warning
+    file_type_charts = {}
+    for name in tva_businesses:
+        by_file_type = chart_rows(aligned, "file_type", tva_file_types, group=name)
+        file_type_charts[name] = {
+            "target_found": ("file_type", name) in targets["lookup"].index.droplevel("Key"),
+            "sales_by_file_type": by_file_type["Sales"],
+            "target_by_file_type": by_file_type["Target"],
+            "ach_pct_by_file_type": by_file_type["Ach %"].tolist(),
+        }
+
+    return {
+        "sales_current": summary["Sale In Cr"].sum(),
+        "total_target": targets["lookup"].loc["business"].sum() if "business" in targets["lookup"].index else 0,
+        "business_targets": business["Target"].to_dict(),
+        "business_sales": business_sales,
+        "regions": regions,
+        "sales_by_region": by_region["Sales"],
+        "target_by_region": by_region["Target"],
+        "ach_pct_by_region": by_region["Ach %"].tolist(),
+        "sales_by_month": by_month["Sales"],
+        "target_by_month": by_month["Target"],
+        "ach_pct_by_month": by_month["Ach %"].tolist(),
+        "file_type_charts": file_type_charts,
+    }
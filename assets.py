@@ -0,0 +1,67 @@
+import base64
+import glob
+import hashlib
+import io
+import os
+
+from PIL import Image
+
+# === STATIC ASSETS ===
+# The logos and the login background are drawn as <img> tags and CSS in st.markdown.
+# Inlining the original files would send several hundred KB over the websocket on every
+# rerun, so each image is resized to the size it is drawn at (2x for sharp high-DPI
+# screens) and re-encoded as WebP once per process. With static serving on, the file
+# is written to the static folder and pages only send its URL; the browser downloads it
+# once and caches it. Otherwise the small WebP data URI is kept in memory and inlined.
+# File names carry a hash of the image, so a replaced logo gets a new URL.
+
+
+def encode_webp(path, max_size, quality):
+    with Image.open(path) as image:
+        # Keeps the aspect ratio and never enlarges
+        image.thumbnail(max_size, Image.LANCZOS)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        buffer = io.BytesIO()
+        image.save(buffer, "WEBP", quality=quality, method=6)
+    return buffer.getvalue()
+
+
+def publish_static(data, path, static_dir):
+    # Writes the encoded image as <name>-<hash>.webp and removes older versions of it
+    stem = os.path.splitext(os.path.basename(path))[0].replace(" ", "_")
+    name = f"{stem}-{hashlib.sha1(data).hexdigest()[:10]}.webp"
+    os.makedirs(static_dir, exist_ok=True)
+    target = os.path.join(static_dir, name)
+    if not os.path.exists(target):
+        tmp_path = f"{target}.tmp{os.getpid()}"
+        with open(tmp_path, "wb") as file:
+            file.write(data)
+        os.replace(tmp_path, target)
+    for old in glob.glob(os.path.join(glob.escape(static_dir), f"{glob.escape(stem)}-*.webp")):
+        if old != target:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+    return f"app/static/{name}"
+
+
+def image_source(path, max_size, quality=80, static_dir=None):
+    # Returns the src for an <img> tag or CSS url(): a static URL when static_dir is
+    # given, else a data URI. None if the image file is missing.
+    try:
+        data = encode_webp(path, max_size, quality)
+    except FileNotFoundError:
+        return None
+    if static_dir:
+        return publish_static(data, path, static_dir)
+    return f"data:image/webp;base64,{base64.b64encode(data).decode()}"
+
+
+def prepare_assets(images, static_dir=None):
+    # images: {key: (path, (max_width, max_height), quality)} -> {key: src or None}
+    return {
+        key: image_source(path, max_size, quality, static_dir)
+        for key, (path, max_size, quality) in images.items()
+    }
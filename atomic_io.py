@@ -0,0 +1,32 @@
+import json
+import os
+
+# === ATOMIC WRITES ===
+# Files other processes may read while they are rewritten (snapshot and history
+# manifests, Parquet partitions, releases, ETL reports) are written to dest + ".tmp"
+# and renamed over dest, so a reader sees the old file or the new one, never half of one.
+
+
+def write_json_atomic(data, dest):
+    tmp = dest + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, dest)
+
+
+def write_parquet_atomic(df, dest):
+    # Parquet needs string column names and one type per column; pyxlsb hands back
+    # mixed object columns (e.g. "7" and 7.0 in Travel M), so those are stored as text.
+    # Returns the frame as written.
+    df = df.copy()
+    df.columns = [str(col) for col in df.columns]
+    tmp = dest + ".tmp"
+    try:
+        df.to_parquet(tmp, index=False)
+    except Exception:
+        for col in df.columns:
+            if df[col].dtype == object:
+                df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+        df.to_parquet(tmp, index=False)
+    os.replace(tmp, dest)
+    return df
@@ -0,0 +1,272 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# synthetic_data puts the repository on sys.path for the app modules below
+from synthetic_data import repo_dir, seed_snapshots, write_dataset
+
+from aggregates import build_filter_index, build_target_table, dashboard_aggregates, select_rows, take_rows, target_vs_ach_aggregates
+from data_loader import enable_copy_on_write, read_target_file, source_registry
+from dataset_store import build_dataset
+from history_store import HistoryStore
+import etl
+import sql_backend
+from settings import current_date, history_dir, history_years, live_years, parallel_load, snapshot_dir, target_file, travel_years
+
+# === BENCHMARKS ===
+# Times the app's data path on synthetic data of each size (see synthetic_data.py):
+#   load      a first build_dataset (every history year read in), then a refresh of one
+#             changed source, per stage as in dataset["timings"]
+#   filter    the filter index, and selecting rows for a sample of filter combinations
+#   aggregate each page's aggregation over the same combinations, with the pandas cube
+#             and, when duckdb is installed, the DuckDB backend
+#   etl       etl.py publishing the dataset the app opens, per stage
+#   page      renders of each page of Test.py through Streamlit's AppTest, in a child
+#             process so each size starts with empty Streamlit caches; a page that raises
+#             or shows an error stops the run
+# Results are written as JSON, one record per benchmark, with the commit and package
+# versions they ran on; --compare prints the change against an earlier results file.
+
+page_steps = ["Target Vs Ach", "Detailed DRR", "Performance", "Dashboard"]
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1], 1)
+    return int(float(text.rstrip("km")) * scale)
+
+
+def run_times(func, calls):
+    # Seconds per call of func(*args) for each args in calls
+    seconds = []
+    for args in calls:
+        started = time.perf_counter()
+        func(*args)
+        seconds.append(time.perf_counter() - started)
+    return seconds
+
+
+def result(size, group, name, seconds, **fields):
+    seconds = np.asarray(seconds, dtype=float) * 1000
+    return dict(
+        size=size,
+        group=group,
+        name=name,
+        runs=len(seconds),
+        median_ms=round(float(np.median(seconds)), 2),
+        p90_ms=round(float(np.quantile(seconds, 0.9)), 2),
+        max_ms=round(float(seconds.max()), 2),
+        **fields,
+    )
+
+
+def filter_combinations(index, count, seed=0):
+    # No filters first, then a fixed sample of (region, quarter, business) selections
+    options = [["All"] + sorted(index.get(col, {})) for col in ["REGION", "Travel Qtr", "Final Buniess"]]
+    combos = list(itertools.product(*options))[1:]
+    rng = np.random.default_rng(seed)
+    picked = rng.choice(len(combos), min(count - 1, len(combos)), replace=False)
+    return [("All", "All", "All")] + [combos[i] for i in sorted(picked)]
+
+
+def benchmark_size(size, data_dir, combos):
+    results = []
+    # Nothing from an earlier run (history store, snapshots, users.db) is reused
+    shutil.rmtree(data_dir, ignore_errors=True)
+    started = time.perf_counter()
+    frames = write_dataset(data_dir, size)
+    results.append(result(size, "generate", "write dataset", [time.perf_counter() - started]))
+    os.chdir(data_dir)
+    history = HistoryStore(history_dir)
+
+    # First load: every history year is read from the workbooks' snapshots into the store
+    dataset, messages = build_dataset(snapshot_dir, history, travel_years, history_years, live_years, parallel=parallel_load)
+    if dataset is None:
+        raise RuntimeError(f"Synthetic data did not load: {messages}")
+    results.extend(result(size, "load", f"first load: {stage}", [seconds]) for stage, seconds in dataset["timings"].items())
+
+    # Refresh after Current_Base changed: its live-year rows are reloaded, SAP's are reused
+    changed = frames["Current_Base"].copy()
+    live = np.flatnonzero(changed["Travel Y"].isin(live_years).to_numpy())[::100]
+    changed.loc[live, "Sale In Cr"] = changed.loc[live, "Sale In Cr"] * 1.1
+    with open(next(source["file"] for source in source_registry if source["name"] == "Current_Base"), "ab") as f:
+        f.write(b"changed\n")
+    seed_snapshots(".", dict(frames, Current_Base=changed), live_years)
+    dataset, messages = build_dataset(
+        snapshot_dir, history, travel_years, history_years, live_years,
+        parallel=parallel_load, previous=dataset, sources=["Current_Base"],
+    )
+    results.extend(result(size, "load", f"refresh: {stage}", [seconds]) for stage, seconds in dataset["timings"].items())
+    results.extend(benchmark_queries(size, dataset, combos))
+    # etl.py builds its own copy of the data
+    del dataset, frames, changed
+
+    report = etl.run(force=True, parallel=parallel_load)
+    if report["status"] != "published":
+        raise RuntimeError(f"etl.py did not publish: {report.get('messages')} {report.get('checks')}")
+    results.extend(result(size, "etl", stage, [seconds]) for stage, seconds in report["timings"].items())
+
+    # Page renders of the app started on the published dataset
+    child = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--pages", data_dir],
+        capture_output=True, text=True,
+    )
+    if child.returncode != 0:
+        raise RuntimeError(f"Page renders failed:\n{child.stderr[-4000:]}")
+    steps = json.loads(child.stdout.strip().splitlines()[-1])
+    # A page that raises or shows an error did not render, so its time means nothing
+    failed = [f"{step['name']}: {'; '.join(step['exceptions'] + step['errors'])}" for step in steps if step["exceptions"] or step["errors"]]
+    if failed:
+        raise RuntimeError("Pages failed to render:\n" + "\n".join(failed))
+    results.extend(result(size, "page", step["name"], [step["seconds"]]) for step in steps)
+    return results
+
+
+def benchmark_queries(size, dataset, combos):
+    # Filter and aggregation benchmarks on a loaded dataset
+    results = []
+    cube, daily = dataset["cube"], dataset["daily"]
+    started = time.perf_counter()
+    index = build_filter_index(cube)
+    results.append(result(size, "filter", "build filter index", [time.perf_counter() - started]))
+    selections = filter_combinations(index, combos)
+    results.append(result(size, "filter", "select rows", run_times(
+        lambda *selection: take_rows(cube, select_rows(index, len(cube), *selection)), selections
+    )))
+
+    targets = build_target_table(read_target_file(target_file)[0])
+    # The app's default as-of date (as_of_default in Test.py)
+    as_of = (current_date - timedelta(days=1)).date()
+    start = as_of.replace(day=1)
+    backends = {"pandas": (
+        lambda *args, **kwargs: dashboard_aggregates(cube, index, daily, *args, **kwargs),
+        lambda *args: target_vs_ach_aggregates(cube, index, daily, targets, *args),
+    )}
+    if sql_backend.duckdb is not None:
+        started = time.perf_counter()
+        backend = sql_backend.DuckDBBackend(dataset["df"], snapshot_dir, dataset["version"])
+        results.append(result(size, "aggregate", "duckdb: export", [time.perf_counter() - started]))
+        backends["duckdb"] = (backend.dashboard_aggregates, lambda *args: backend.target_vs_ach_aggregates(targets, *args))
+    for name, (dashboard, target_vs_ach) in backends.items():
+        for period in ["Travel year", "MTD", "YTD", "Custom"]:
+            results.append(result(size, "aggregate", f"{name}: dashboard ({period})", run_times(
+                lambda *selection: dashboard(*selection, as_of, period, start), selections
+            )))
+        results.append(result(size, "aggregate", f"{name}: target vs ach", run_times(
+            lambda *selection: target_vs_ach(*selection, as_of), selections
+        )))
+    return results
+
+
+def page_renders(data_dir):
+    # Runs in the child process. Each step starts a fresh AppTest session, logged in as
+    # the generated Admin user through session_state except for the login step itself, and
+    # times the run that renders the step's page; Streamlit's caches are per process, so
+    # the data is opened once, by the first step that shows a page
+    from streamlit.testing.v1 import AppTest
+    import settings
+
+    # Test.py runs in this process and serves the release etl.run published
+    settings.prebuilt_data = True
+    os.chdir(data_dir)
+    steps = []
+
+    def step(name, logged_in=True, action=None):
+        at = AppTest.from_file(os.path.join(repo_dir, "Test.py"), default_timeout=3600)
+        if logged_in:
+            at.session_state["logged_in"] = True
+            at.session_state["username"] = "bench"
+            at.session_state["access"] = "Admin"
+        exceptions = []
+        if action is not None:
+            at.run()
+            exceptions += [e.message for e in at.exception]
+            action(at)
+        started = time.perf_counter()
+        at.run()
+        seconds = time.perf_counter() - started
+        exceptions += [e.message for e in at.exception]
+        steps.append({"name": name, "seconds": seconds, "exceptions": exceptions, "errors": [e.value for e in at.error]})
+
+    def log_in(at):
+        at.text_input[0].input("bench")
+        at.text_input[1].input("bench")
+        at.button[0].click()
+
+    def filter_quarter(at):
+        next(box for box in at.selectbox if box.label == "Travel Quarter").set_value("Q2")
+
+    step("login page", logged_in=False)
+    step("Dashboard (first load)", logged_in=False, action=log_in)
+    step("Dashboard (rerun)")
+    step("Dashboard (quarter filter)", action=filter_quarter)
+    for tab in page_steps:
+        step(tab, action=lambda at: at.radio[0].set_value(tab))
+    print(json.dumps(steps))
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=repo_dir, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(old_path, new):
+    # Median change per benchmark present in both runs
+    with open(old_path, encoding="utf-8") as f:
+        old = {(r["size"], r["group"], r["name"]): r for r in json.load(f)["results"]}
+    rows = []
+    for r in new["results"]:
+        before = old.get((r["size"], r["group"], r["name"]))
+        if before and before["median_ms"]:
+            rows.append([r["size"], r["group"], r["name"], before["median_ms"], r["median_ms"], round(r["median_ms"] / before["median_ms"], 2)])
+    print(pd.DataFrame(rows, columns=["Size", "Group", "Name", "Old ms", "New ms", "Ratio"]).to_string(index=False))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark loading, filtering, aggregation and page renders on synthetic data.")
+    parser.add_argument("--sizes", default="100k,1M,10M", help="Comma-separated row counts, e.g. 100k,1M")
+    parser.add_argument("--combos", type=int, default=40, help="Filter combinations timed per benchmark")
+    parser.add_argument("--work-dir", default="bench_data", help="Where the synthetic data is written (one folder per size)")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    parser.add_argument("--pages", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.pages:
+        page_renders(args.pages)
+        sys.exit()
+
+    enable_copy_on_write()
+    output = os.path.abspath(args.output)
+    work_dir = os.path.abspath(args.work_dir)
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+    results = []
+    for size in sizes:
+        print(f"Benchmarking {size:,} rows")
+        results.extend(benchmark_size(size, os.path.join(work_dir, str(size)), args.combos))
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "packages": {module.__name__: module.__version__ for module in [np, pd] + ([sql_backend.duckdb] if sql_backend.duckdb else [])},
+        "sizes": sizes,
+        "combos": args.combos,
+        "results": results,
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+    print(pd.DataFrame(results).to_string(index=False))
+    print(f"Wrote {output}")
+    if args.compare:
+        compare(args.compare, report)
@@ -0,0 +1,191 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_dir)
+
+from data_loader import month_name_map, source_columns, source_registry, source_spec, store_snapshot  # noqa: E402
+# The app's years and file names (settings.py), so the data matches what the app asks for
+from settings import current_date, history_years, live_years, snapshot_dir, target_file, travel_years, user_file  # noqa: E402
+
+# === SYNTHETIC DATA ===
+# Workbook-shaped sales data for the benchmarks, or for trying the app without the real
+# exports. Rows use the sources' raw column names and the value shapes the exports have:
+# Travel M spelled as short, long, upper-case and numeric months; Final Buniess in mixed
+# case with stray spaces; the FILE_SUB_TYPE values that make a booking NTCIL; REGION_B
+# as the eight sales regions of Target.csv, with REGION as their zones. Target.csv is
+# generated over the same regions, businesses and file types, near the generated sales.
+#
+# pyxlsb can only read .xlsb files, so the rows are not written as workbooks. Each source
+# gets a placeholder .xlsb and a snapshot of its rows in the loader's snapshot cache
+# (data_loader.store_snapshot), exactly what the app reads for an unchanged workbook.
+# Parsing real workbooks is therefore not covered.
+
+zones = {
+    "NORTH": ["DELHI NCR", "PUNJAB", "RAJASTHAN", "UTTAR PRADESH"],
+    "EAST + CENTRAL": ["EAST INDIA", "CENTRAL INDIA"],
+    "APTS": ["AP & TS"],
+    "KTNK": ["KARNATAKA", "KERALA", "TAMIL NADU"],
+    "GUJARAT": ["GUJARAT"],
+    "WEST": ["WEST ONE", "WEST TWO"],
+    "NRI": ["NRI"],
+    "CALL CENTER": ["CALL CENTER"],
+}
+businesses = ["LOLH", "LOSH", "LTDM", "AIR"]
+business_weights = [0.3, 0.3, 0.25, 0.15]
+# FILE_TYPE and FILE_SUB_TYPE per business; ESCORTED TOUR, CRUISE and RAIL are NTCIL
+file_types = {"LOLH": ["FIT", "GIT", "AIR"], "LOSH": ["FIT", "GIT", "AIR"], "LTDM": ["FIT", "GIT", "AIR"], "AIR": ["AIR"]}
+sub_types = {"FIT": ["FIT", "HOLIDAY PACKAGE", "CRUISE", "RAIL"], "GIT": ["GIT", "ESCORTED TOUR"], "AIR": ["AIR TICKET"]}
+destinations = [
+    "DUBAI", "SINGAPORE", "THAILAND", "BALI", "MALDIVES", "EUROPE", "SWITZERLAND", "PARIS",
+    "LONDON", "USA", "CANADA", "AUSTRALIA", "NEW ZEALAND", "JAPAN", "VIETNAM", "SRI LANKA",
+    "KASHMIR", "GOA", "KERALA", "RAJASTHAN", "HIMACHAL", "ANDAMAN", "SIKKIM", "LADAKH",
+]
+full_month_names = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
+# Raw column names per source: the destination column is renamed on load
+destination_cols = {"Current_Base": "Destination", "SAP": "Group Destination"}
+placeholder = b"Synthetic benchmark data: the rows are in the snapshot cache, not in this file.\n"
+
+
+def pick(rng, values, n, weights=None):
+    return np.asarray(values, dtype=object)[rng.choice(len(values), n, p=weights)]
+
+
+def noisy(rng, canonical, variants):
+    # Replaces each value by one of its spellings; variants: {value: [spellings]}
+    out = canonical.copy()
+    for value, spellings in variants.items():
+        at = np.flatnonzero(canonical == value)
+        out[at] = pick(rng, spellings, len(at))
+    return out
+
+
+def generate_source(name, rows, years, current_date, rng):
+    # Returns (raw rows as the workbook holds them, the same rows with clean values)
+    year = rng.choice(years, rows)
+    month = rng.integers(1, 13, rows)
+    day = rng.integers(1, 29, rows)
+    tour_start = pd.to_datetime({"year": year, "month": month, "day": day})
+    # Booked up to a year before travel, and never after the current date
+    booked = tour_start - pd.to_timedelta(rng.integers(0, 366, rows), unit="D")
+    latest = pd.Timestamp(current_date.date())
+    booked = booked.where(booked <= latest, latest - pd.to_timedelta(rng.integers(0, 60, rows), unit="D"))
+
+    region_b = pick(rng, list(zones), rows, [0.25, 0.12, 0.1, 0.15, 0.12, 0.14, 0.04, 0.08])
+    zone = np.empty(rows, dtype=object)
+    for region, region_zones in zones.items():
+        at = np.flatnonzero(region_b == region)
+        zone[at] = pick(rng, region_zones, len(at))
+    business = pick(rng, businesses, rows, business_weights)
+    file_type = np.empty(rows, dtype=object)
+    for value, types in file_types.items():
+        at = np.flatnonzero(business == value)
+        file_type[at] = pick(rng, types, len(at))
+    sub_type = np.empty(rows, dtype=object)
+    for value, types in sub_types.items():
+        at = np.flatnonzero(file_type == value)
+        sub_type[at] = pick(rng, types, len(at))
+
+    clean = pd.DataFrame({
+        "Sale In Cr": np.round(rng.lognormal(-4.5, 1.0, rows), 6),
+        "Month Num": month,
+        "Travel Y": year,
+        "REGION": zone,
+        "REGION_B": region_b,
+        "Final Buniess": business,
+        "FILE_TYPE": file_type,
+    })
+    month_variants = {
+        m: [month_name_map[m], month_name_map[m].upper(), full_month_names[m - 1], f" {month_name_map[m].lower()}", m]
+        for m in month_name_map
+    }
+    raw = pd.DataFrame({
+        "Sale In Cr": clean["Sale In Cr"],
+        "Travel M": noisy(rng, month.astype(object), month_variants),
+        "Travel Y": year,
+        "REGION": zone,
+        "TOUR_START_DATE": tour_start.dt.strftime("%Y-%m-%d"),
+        "FILE_DATE": booked.dt.strftime("%Y-%m-%d"),
+        "TOTAL_PAX": rng.integers(1, 7, rows),
+        "Travel Qtr": np.char.add("Q", ((month - 4) % 12 // 3 + 1).astype(str)).astype(object),
+        "Final Buniess": noisy(rng, business, {b: [b, b.lower(), f"{b} "] for b in businesses}),
+        destination_cols[name]: pick(rng, destinations, rows),
+        "FILE_TYPE": noisy(rng, file_type, {t: [t, t.lower()] for t in file_types["LOLH"]}),
+        "REGION_B": noisy(rng, region_b, {r: [r, r.lower()] for r in zones}),
+        "FILE_SUB_TYPE": sub_type,
+    })
+    return raw, clean
+
+
+def target_frame(clean, year, rng):
+    # Target.csv rows (REGION, ZONE, Target, Month, Type, Business Type) within +-30% of the year's sales
+    sales = clean[clean["Travel Y"] == year].assign(Month=lambda df: df["Month Num"].map(month_name_map))
+    def targets(keys, type_name, region, zone, business_type):
+        grouped = sales.groupby(keys)["Sale In Cr"].sum().reset_index()
+        return pd.DataFrame({
+            "REGION": grouped[region] if region in grouped else region,
+            "ZONE": grouped[zone] if zone in grouped else zone,
+            "Target": np.round(grouped["Sale In Cr"] * rng.uniform(0.7, 1.3, len(grouped)), 2),
+            "Month": grouped["Month"],
+            "Type": type_name,
+            "Business Type": business_type,
+        })
+    region = targets(["REGION_B", "REGION", "Month"], "Region", "REGION_B", "REGION", "RETAIL")
+    region.loc[region["REGION"] == "CALL CENTER", "Business Type"] = "CALL CENTER"
+    # Business targets split 80/20 between retail and the call center
+    barea = targets(["Final Buniess", "Month"], "BAREA", "Final Buniess", "Retail", "RETAIL")
+    call_center = barea.assign(ZONE="Call Center", **{"Business Type": "CALL CENTER"}, Target=np.round(barea["Target"] * 0.2, 2))
+    barea["Target"] = np.round(barea["Target"] * 0.8, 2)
+    file_type = targets(["FILE_TYPE", "Final Buniess", "Month"], "FILE TYPE", "FILE_TYPE", "Final Buniess", "BOTH")
+    # File type targets are set for the holiday businesses only
+    file_type = file_type[file_type["ZONE"] != "AIR"]
+    return pd.concat([region, barea, call_center, file_type], ignore_index=True)
+
+
+def seed_snapshots(out_dir, frames, years):
+    # Stores each source's rows as the snapshot of its placeholder workbook, as the
+    # streaming reader would have kept them when asked for these travel years
+    for source in source_registry:
+        raw = frames[source["name"]]
+        wanted = source_columns(source)
+        kept = raw[[col for col in raw.columns if source["renames"].get(col, col) in wanted]]
+        kept = kept[kept["Travel Y"].isin(years)].reset_index(drop=True)
+        path = os.path.join(out_dir, source["file"])
+        store_snapshot(kept, path, os.path.join(out_dir, snapshot_dir), source_spec(source, years))
+
+
+def write_dataset(out_dir, rows, seed=0):
+    # Writes rows bookings (split evenly between the sources) over the app's in-memory
+    # travel years, seeded for the app's first load, plus Target.csv and Emp_base.csv
+    # with a "bench" Admin user (password "bench"). Returns {source name: raw rows}.
+    rng = np.random.default_rng(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    frames, cleans = {}, []
+    for i, source in enumerate(source_registry):
+        count = rows // len(source_registry) + (1 if i < rows % len(source_registry) else 0)
+        frames[source["name"]], clean = generate_source(source["name"], count, travel_years, current_date, rng)
+        cleans.append(clean)
+        with open(os.path.join(out_dir, source["file"]), "wb") as f:
+            f.write(placeholder + f"{source['name']} {count} rows, seed {seed}\n".encode())
+    # A first load reads the live years and every history year not in the store yet
+    seed_snapshots(out_dir, frames, sorted(set(live_years) | set(history_years)))
+    targets = target_frame(pd.concat(cleans, ignore_index=True), current_date.year, rng)
+    targets.to_csv(os.path.join(out_dir, os.path.basename(target_file)), index=False)
+    pd.DataFrame({"User Name": ["bench"], "Password": ["bench"], "Access": ["Admin"]}).to_csv(
+        os.path.join(out_dir, os.path.basename(user_file)), index=False
+    )
+    return frames
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic sales data the app can open (run the app from OUT_DIR).")
+    parser.add_argument("out_dir")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write_dataset(args.out_dir, args.rows, seed=args.seed)
+    print(f"Wrote {args.rows:,} rows to {args.out_dir}")
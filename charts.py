@@ -0,0 +1,95 @@
+import numpy as np
+import plotly.io as pio
+
+# === COMBO CHARTS ===
+# Two bars per category with a %-line on a secondary axis, shared by the dashboard and
+# Target vs Ach pages. The figure is returned as a plain spec dict (rehydrated with
+# go.Figure(spec, _validate=False)), so no validating constructors run. Labels are
+# drawn by the browser from texttemplate, not from per-point text lists, and per-point
+# arrays are only sent for the points that need them (hidden 0% labels, red negative
+# labels). Values are float arrays rounded well below the 2 decimals that are shown;
+# from plotly 6 they are sent as binary typed arrays.
+
+template = pio.templates["plotly_white"].to_plotly_json()
+bar_font = dict(family="Arial, sans-serif", size=0.75 * 16)
+line_font = dict(family="Arial Black, Arial, sans-serif", size=0.875 * 16)
+value_decimals = 6
+
+
+def chart_values(values):
+    return np.round(np.asarray(values, dtype=np.float64), value_decimals)
+
+
+def line_labels(values, template_text):
+    # One texttemplate and one colour for the whole line unless some points differ
+    texttemplate = np.where(values == 0, "", template_text).tolist() if (values == 0).any() else template_text
+    color = np.where(values < 0, "red", "darkgreen").tolist() if (values < 0).any() else "darkgreen"
+    return texttemplate, color
+
+
+def combo_chart(categories, bars, line, title, category_title, value_title, bar_text="{value}", value_prefix="", horizontal=False):
+    # bars: [(name, colour, values)]; line: (name, values) on the secondary axis.
+    # bar_text formats the bar labels, "{value}" being the value to 2 decimals.
+    categories = list(categories)
+    value_axis, category_axis = ("x", "y") if horizontal else ("y", "x")
+    value_format = f"%{{{value_axis}:.2f}}"
+    data = []
+    for name, color, values in bars:
+        bar = {
+            "type": "bar",
+            category_axis: categories,
+            value_axis: chart_values(values),
+            "name": name,
+            "marker": {"color": color},
+            "texttemplate": bar_text.format(value=value_format),
+            "textposition": "auto",
+            "textfont": bar_font,
+        }
+        if horizontal:
+            bar["orientation"] = "h"
+        data.append(bar)
+    line_name, line_values = line
+    line_values = chart_values(line_values)
+    texttemplate, text_color = line_labels(line_values, f"{value_format}%")
+    data.append({
+        "type": "scatter",
+        category_axis: categories,
+        value_axis: line_values,
+        "name": line_name,
+        f"{value_axis}axis": f"{value_axis}2",
+        "mode": "lines+markers+text",
+        "line": {"color": "darkgreen", "width": 2},
+        "marker": {"color": "darkgreen", "size": 8},
+        "texttemplate": texttemplate,
+        "textposition": "middle right" if horizontal else "top center",
+        "textfont": dict(line_font, color=text_color),
+    })
+    value_axis_layout = {"title": {"text": value_title}, "tickformat": ".2f"}
+    if not horizontal:
+        value_axis_layout["side"] = "left"
+    if value_prefix:
+        value_axis_layout["tickprefix"] = value_prefix
+    layout = {
+        "title": {"text": title, "x": 0.5, "xanchor": "center", "y": 0.95, "font": {"family": "Arial, sans-serif", "size": 16, "color": "black"}},
+        f"{category_axis}axis": {"title": {"text": category_title}},
+        f"{value_axis}axis": value_axis_layout,
+        f"{value_axis}axis2": {
+            "title": {"text": line_name},
+            "overlaying": value_axis,
+            "side": "top" if horizontal else "right",
+            "tickformat": ".2f",
+            "ticksuffix": "%",
+        },
+        "barmode": "group",
+        "showlegend": True,
+        "legend": {"x": 0.5, "y": -0.15, "xanchor": "center", "yanchor": "top", "orientation": "h"},
+        "template": template,
+        "margin": {"t": 100, "b": 100, "l": 100 if horizontal else 80, "r": 80},
+        "autosize": True,
+    }
+    return {"data": data, "layout": layout}
+
+
+def payload_size(spec):
+    # Bytes of chart JSON sent to the browser for this figure
+    return len(pio.to_json(spec, validate=False).encode())
@@ -0,0 +1,553 @@
+import functools
+import hashlib
+import json
+import logging
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+from pyxlsb import open_workbook
+
+from atomic_io import write_json_atomic, write_parquet_atomic
+
+logger = logging.getLogger(__name__)
+
+# Required and optional columns
+required_cols = ["Sale In Cr", "Travel M", "Travel Y"]
+optional_cols = ["REGION", "TOUR START DATE", "FILE_DATE", "TOTAL_PAX", "Travel Qtr", "Final Buniess", "Destination", "FILE_TYPE", "REGION_B", "FILE_SUB_TYPE"]
+
+month_map = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+    "january": 1, "february": 2, "march": 3, "april": 4, "may": 5, "june": 6,
+    "july": 7, "august": 8, "september": 9, "october": 10, "november": 11, "december": 12,
+    "1": 1, "2": 2, "3": 3, "4": 4, "5": 5, "6": 6,
+    "7": 7, "8": 8, "9": 9, "10": 10, "11": 11, "12": 12
+}
+month_name_map = {
+    1: "Jan", 2: "Feb", 3: "Mar", 4: "Apr", 5: "May", 6: "Jun",
+    7: "Jul", 8: "Aug", 9: "Sep", 10: "Oct", 11: "Nov", 12: "Dec"
+}
+
+# === SNAPSHOT CACHE ===
+# Each .xlsb workbook is parsed once and stored as a Parquet snapshot next to a small
+# manifest holding the workbook's size, mtime and content hash. Later loads read the
+# snapshot and only re-parse the workbook when its content actually changes.
+
+SNAPSHOT_VERSION = 2
+
+
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _manifest_path(path, snapshot_dir):
+    return os.path.join(snapshot_dir, os.path.basename(path) + ".json")
+
+
+def _read_manifest(path, snapshot_dir):
+    try:
+        with open(_manifest_path(path, snapshot_dir), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _remove_stale_snapshots(path, snapshot_dir, keep):
+    prefix = os.path.basename(path) + "."
+    for name in os.listdir(snapshot_dir):
+        content_key = name[len(prefix):-len(".parquet")]
+        if (name.startswith(prefix) and name.endswith(".parquet") and name != keep
+                and len(content_key) == 16 and all(c in "0123456789abcdef" for c in content_key)):
+            try:
+                os.remove(os.path.join(snapshot_dir, name))
+            except OSError:
+                pass
+
+
+def read_workbook(path, snapshot_dir, reader=None, spec=""):
+    # reader(path) parses the workbook on a snapshot miss (default: the whole first sheet);
+    # spec describes what the reader keeps, so a different projection or window rebuilds
+    stat = os.stat(path)
+    manifest = _read_manifest(path, snapshot_dir)
+    content_hash = None
+
+    if manifest and manifest.get("version") == SNAPSHOT_VERSION and manifest.get("spec", "") == spec:
+        snapshot_path = os.path.join(snapshot_dir, manifest["snapshot"])
+        if os.path.exists(snapshot_path):
+            # Same size and mtime: trust the snapshot without hashing the workbook
+            if manifest["size"] == stat.st_size and manifest["mtime_ns"] == stat.st_mtime_ns:
+                return pd.read_parquet(snapshot_path)
+            # Touched but unchanged (e.g. re-copied by the export job): refresh the manifest only
+            content_hash = file_hash(path)
+            if manifest["sha256"] == content_hash:
+                manifest["size"] = stat.st_size
+                manifest["mtime_ns"] = stat.st_mtime_ns
+                write_json_atomic(manifest, _manifest_path(path, snapshot_dir))
+                return pd.read_parquet(snapshot_path)
+
+    if content_hash is None:
+        content_hash = file_hash(path)
+    df = reader(path) if reader is not None else pd.read_excel(path, engine='pyxlsb')
+    try:
+        df = store_snapshot(df, path, snapshot_dir, spec, stat, content_hash)
+    except Exception:
+        # A snapshot that cannot be written must never stop the workbook from loading
+        pass
+    return df
+
+
+def store_snapshot(df, path, snapshot_dir, spec="", stat=None, content_hash=None):
+    # Stores df as what reading the workbook at path gives under spec; returns df as
+    # later loads will read it back. stat and content_hash default to the file's current ones
+    stat = stat or os.stat(path)
+    content_hash = content_hash or file_hash(path)
+    os.makedirs(snapshot_dir, exist_ok=True)
+    snapshot_name = f"{os.path.basename(path)}.{content_hash[:16]}.parquet"
+    # Serve exactly what later loads will read back from the snapshot
+    df = write_parquet_atomic(df, os.path.join(snapshot_dir, snapshot_name))
+    write_json_atomic({
+        "version": SNAPSHOT_VERSION,
+        "source": os.path.basename(path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": content_hash,
+        "snapshot": snapshot_name,
+        "spec": spec,
+        "rows": len(df),
+    }, _manifest_path(path, snapshot_dir))
+    _remove_stale_snapshots(path, snapshot_dir, snapshot_name)
+    return df
+
+
+# === STREAMING READER ===
+# Reads a workbook straight off pyxlsb's row iterator, keeping only the columns a source
+# declares and skipping rows outside the loaded travel years before they are ever
+# materialised. Kept cells go through the same conversion and TextParser inference
+# pd.read_excel uses, so the result matches reading the whole sheet and then filtering.
+# The row check is conservative: a row is only skipped when its year is unambiguous;
+# everything else is kept and left to the vectorised filter in normalise().
+
+def _cell_value(value):
+    # Same conversion as pandas' pyxlsb reader: empty cells become "" and whole floats ints
+    if value is None:
+        return ""
+    if isinstance(value, float) and math.isfinite(value):
+        as_int = int(value)
+        return as_int if as_int == value else value
+    return value
+
+
+def _row_year(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def source_columns(source):
+    return set(source["required_cols"]) | set(source["optional_cols"]) | set(source["date_cols"])
+
+
+def stream_workbook(path, source, years):
+    wanted = source_columns(source)
+    years = set(years)
+    with open_workbook(path) as workbook:
+        with workbook.get_sheet(1) as sheet:
+            rows = sheet.rows(sparse=True)
+            header = next(rows, None)
+            if header is None:
+                return pd.DataFrame()
+            header = [_cell_value(cell.v) for cell in header]
+            positions = [
+                i for i, name in enumerate(header)
+                if source["renames"].get(str(name).strip(), str(name).strip()) in wanted
+            ]
+            names = [source["renames"].get(str(header[i]).strip(), str(header[i]).strip()) for i in positions]
+            year_at = positions[names.index("Travel Y")] if "Travel Y" in names else None
+
+            data = [[header[i] for i in positions]]
+            for row in rows:
+                values = [_cell_value(row[i].v) if i < len(row) else "" for i in positions]
+                if year_at is not None:
+                    year = _row_year(row[year_at].v) if year_at < len(row) else None
+                    if year is not None and year not in years:
+                        continue
+                data.append(values)
+    return TextParser(data, header=0, skip_blank_lines=False).read()
+
+
+# === SOURCE REGISTRY ===
+# One entry per sales source. Adding a source is a new entry here: its workbook, the
+# column renames that map it onto the shared schema, the columns it must/may provide,
+# which columns hold dates, and the travel-month window it contributes to an as-of view.
+# Sources with FILE_DATE among their date columns only count bookings made up to the
+# as-of date; the others count in full. Sources with an "incremental" column are
+# ingested from a watermark on that column.
+
+source_registry = [
+    {
+        # Current_Base.xlsb: travel months from the as-of month on, booked up to the as-of date
+        "name": "Current_Base",
+        "file": os.path.join("Current_Base.xlsb"),
+        "renames": {"TOUR_START_DATE": "TOUR START DATE", "Destination": "Destination"},
+        "required_cols": required_cols,
+        "optional_cols": optional_cols,
+        "date_cols": ["FILE_DATE"],
+        "window": "current_month_onwards_as_of",
+        "incremental": "FILE_DATE",
+    },
+    {
+        # SAP.xlsb: travel months before the as-of month
+        "name": "SAP",
+        "file": os.path.join("SAP.xlsb"),
+        "renames": {"TOUR_START_DATE": "TOUR START DATE", "Group Destination": "Destination"},
+        "required_cols": required_cols,
+        "optional_cols": optional_cols,
+        "date_cols": [],
+        "window": "before_current_month",
+    },
+]
+
+
+# Window rules take the travel month numbers of cube rows and the day after the as-of
+# date, and return which rows the source contributes; they are applied at query time
+# so the as-of date can change without reloading anything.
+
+def _window_current_month_onwards_as_of(month_num, current_date):
+    return month_num >= current_date.month
+
+
+def _window_before_current_month(month_num, current_date):
+    return (month_num >= 1) & (month_num < current_date.month)
+
+
+window_rules = {
+    "current_month_onwards_as_of": _window_current_month_onwards_as_of,
+    "before_current_month": _window_before_current_month,
+}
+
+
+# === NORMALISATION ===
+
+upper_cols = ["Final Buniess", "FILE_TYPE", "REGION_B", "FILE_SUB_TYPE"]
+ntcil_sub_types = ["ESCORTED TOUR", "CRUISE", "RAIL"]
+
+
+def check_columns(df, source):
+    # Returns (level, message) pairs for the caller to surface; an "error" means the source is unusable
+    messages = []
+    missing_required = [col for col in source["required_cols"] if col not in df.columns]
+    if missing_required:
+        messages.append(("error", f"Missing required columns in {source['file']}: {', '.join(missing_required)}"))
+    missing_optional = [col for col in source["optional_cols"] if col not in df.columns]
+    if missing_optional:
+        messages.append(("warning", f"Missing optional columns in {source['file']}: {', '.join(missing_optional)}"))
+    return messages
+
+
+def standardise_columns(df, source):
+    df.columns = df.columns.str.strip()
+    return df.rename(columns=source["renames"])
+
+
+def _per_value(series, func, keep_na=True):
+    # Run a string transformation once per distinct value and broadcast it back by code,
+    # instead of once per row; the dimension columns have only a handful of values
+    codes, uniques = pd.factorize(series, use_na_sentinel=keep_na)
+    transformed = func(pd.Series(uniques, dtype=object)).to_numpy(dtype=object)
+    if keep_na:
+        transformed = np.append(transformed, np.nan)
+    return pd.Series(transformed[codes], index=series.index)
+
+
+def normalise(df, source, years):
+    df = df.copy()
+    df["Source"] = source["name"]
+
+    # Normalize Final Buniess, FILE_TYPE, REGION_B, and FILE_SUB_TYPE to uppercase
+    for col in upper_cols:
+        if col in df.columns:
+            df[col] = _per_value(df[col], lambda values: values.str.strip().str.upper())
+
+    # BAREADEP is NTCIL for escorted tours, cruises and rail, otherwise the Final Buniess
+    if "FILE_SUB_TYPE" in df.columns and "Final Buniess" in df.columns:
+        df["BAREADEP"] = df["Final Buniess"].mask(df["FILE_SUB_TYPE"].isin(ntcil_sub_types), "NTCIL")
+    else:
+        df["BAREADEP"] = df["Final Buniess"] if "Final Buniess" in df.columns else "Unknown"
+
+    df["Travel M"] = _per_value(df["Travel M"], lambda values: values.astype(str).str.strip().str.lower(), keep_na=False)
+    df["Travel Y"] = df["Travel Y"].astype(int)
+    df["Month Num"] = df["Travel M"].map(month_map)
+    df["Month Name"] = df["Month Num"].map(month_name_map)
+    for col in source["date_cols"]:
+        df[col] = pd.to_datetime(df[col], errors="coerce")
+    # Undated sources carry FILE_DATE too; typing it there keeps one datetime column once
+    # the sources are combined, instead of dates and raw cell values that are stored as text
+    if "FILE_DATE" in df.columns and "FILE_DATE" not in source["date_cols"]:
+        df["FILE_DATE"] = pd.to_datetime(df["FILE_DATE"], errors="coerce")
+
+    # Only the loaded travel years; rows without a recognised travel month never fall in a window
+    return df[df["Travel Y"].isin(years) & df["Month Num"].notna()]
+
+
+# === INCREMENTAL INGESTION ===
+# Current_Base only gains new bookings day by day. The normalised, filtered frame is kept
+# in the snapshot directory together with the highest FILE_DATE already processed (the
+# watermark) and an order-independent digest of every other raw row, those without a
+# FILE_DATE included. When the workbook changes and that digest still matches, only rows
+# newer than the watermark are normalised and appended; any change to the other rows,
+# such as an edited older booking or an added row without a date, falls back to a full
+# rebuild.
+#
+# Only normalising works on the delta. A changed workbook is still parsed in full (an
+# .xlsb sheet is one compressed stream that cannot be read from the new rows on), and the
+# digest is still computed over every other raw row, so a refresh of Current_Base stays
+# proportional to the rows of the loaded years; it is the cheaper part that is skipped.
+
+INCREMENTAL_VERSION = 3
+
+
+def frame_digest(df):
+    if df.empty:
+        return "0:0"
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    # uint64 addition wraps, which keeps the digest independent of row order
+    return f"{len(df)}:{int(hashes.sum())}"
+
+
+def _incremental_paths(path, snapshot_dir):
+    base = os.path.join(snapshot_dir, os.path.basename(path))
+    return base + ".incremental.json", base + ".normalised.parquet"
+
+
+def _load_incremental(raw, source, snapshot_dir, years):
+    path = source["file"]
+    column = source["incremental"]
+    state_path, frame_path = _incremental_paths(path, snapshot_dir)
+    manifest = _read_manifest(path, snapshot_dir) or {}
+    spec = json.dumps(sorted(years))
+    try:
+        with open(state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("version") != INCREMENTAL_VERSION or state.get("spec") != spec or not os.path.exists(frame_path):
+            state = None
+    except (FileNotFoundError, ValueError):
+        state = None
+
+    # Same workbook content as the last ingestion: nothing to do
+    if state and manifest.get("sha256") and state.get("sha256") == manifest["sha256"]:
+        return pd.read_parquet(frame_path)
+
+    watermarks = pd.to_datetime(raw[column], errors="coerce") if column in raw.columns else None
+    df = None
+    if state and watermarks is not None and state.get("watermark"):
+        watermark = pd.Timestamp(state["watermark"])
+        newer = watermarks > watermark
+        if frame_digest(raw[~newer]) == state["digest"]:
+            delta = normalise(raw[newer], source, years)
+            cached = pd.read_parquet(frame_path)
+            df = pd.concat([cached, delta], ignore_index=True) if not delta.empty else cached
+    if df is None:
+        df = normalise(raw, source, years).reset_index(drop=True)
+
+    if watermarks is not None and watermarks.notna().any():
+        try:
+            watermark = watermarks.max()
+            df = write_parquet_atomic(df, frame_path)
+            write_json_atomic({
+                "version": INCREMENTAL_VERSION,
+                "spec": spec,
+                "sha256": manifest.get("sha256"),
+                "watermark": watermark.isoformat(),
+                "digest": frame_digest(raw[~(watermarks > watermark)]),
+                "rows": len(df),
+            }, state_path)
+        except Exception:
+            pass
+    return df
+
+
+def source_spec(source, years):
+    # What the streaming reader keeps of a source's workbook; part of its snapshot key
+    return json.dumps({
+        "columns": sorted(source_columns(source)),
+        "renames": source["renames"],
+        "years": sorted(years),
+    }, sort_keys=True)
+
+
+def load_source(source, snapshot_dir, years):
+    # Read, check and normalise one registry source for the given travel years; returns
+    # (df, messages, timings), timings being the seconds spent per stage. Rows outside
+    # the years are dropped while reading the workbook and at the end of normalising.
+    started = time.perf_counter()
+    spec = source_spec(source, years)
+    reader = functools.partial(stream_workbook, source=source, years=years)
+    raw = standardise_columns(read_workbook(source["file"], snapshot_dir, reader=reader, spec=spec), source)
+    timings = {"read": time.perf_counter() - started}
+    messages = check_columns(raw, source)
+    if any(level == "error" for level, _ in messages):
+        return pd.DataFrame(), messages, timings
+    started = time.perf_counter()
+    if source.get("incremental"):
+        df = _load_incremental(raw, source, snapshot_dir, years)
+    else:
+        df = normalise(raw, source, years)
+    timings["normalise"] = time.perf_counter() - started
+    return df, messages, timings
+
+
+def read_target_file(path):
+    # Target.csv with its Region, Month and Target Amount columns found under their usual
+    # names, plus Target Amount Cr; returns (df, messages), df being None when unusable
+    try:
+        df = pd.read_csv(path)
+    except Exception as e:
+        return None, [("error", f"Failed to load target data from {path}: {str(e)}")]
+    df.columns = df.columns.str.strip()
+    df = df.rename(columns={
+        col: "Region" for col in df.columns if col.lower() in ["region", "reg"]
+    })
+    df = df.rename(columns={
+        col: "Month" for col in df.columns if col.lower() in ["month", "month name"]
+    })
+    df = df.rename(columns={
+        col: "Target Amount" for col in df.columns if col.lower() in ["target", "target amount", "target_cr"]
+    })
+    required_cols = ["Region", "Month", "Target Amount"]
+    if not all(col in df.columns for col in required_cols):
+        return None, [("error", f"Missing required columns in {path}: {', '.join(set(required_cols) - set(df.columns))}")]
+    if df["Target Amount"].max() > 1e7:
+        df["Target Amount Cr"] = df["Target Amount"] / 1e7
+    else:
+        df["Target Amount Cr"] = df["Target Amount"]
+    return df, []
+
+
+# === COMPACT REPRESENTATION ===
+# The combined frame is held by every session, so it is stored compactly: low-cardinality
+# dimensions become categoricals, numeric columns are downcast to the smallest dtype that
+# keeps their values, and columns no page reads are dropped.
+
+category_cols = ["REGION", "REGION_B", "Final Buniess", "FILE_TYPE", "FILE_SUB_TYPE", "BAREADEP", "Destination", "Source", "Travel M", "Travel Qtr"]
+integer_cols = ["Travel Y", "Month Num", "TOTAL_PAX"]
+float_cols = ["Sale In Cr"]
+page_cols = category_cols + integer_cols + float_cols + ["Month Name", "FILE_DATE"]
+
+
+def _downcast_float(values):
+    # float32 only when every value survives the round trip exactly; sales totals must not drift
+    values = values.astype("float64")
+    as_float32 = values.astype("float32")
+    if np.array_equal(as_float32.to_numpy().astype("float64"), values.to_numpy(), equal_nan=True):
+        return as_float32
+    return values
+
+
+def compact_frame(df):
+    # Returns the compacted frame and a {"before", "after"} report of deep memory usage in bytes
+    before = int(df.memory_usage(deep=True).sum())
+    df = df[[col for col in df.columns if col in page_cols]].copy()
+    for col in category_cols:
+        if col in df.columns and df[col].nunique(dropna=True) <= max(len(df) // 2, 1):
+            df[col] = df[col].astype("category")
+    for col in integer_cols:
+        if col in df.columns:
+            values = pd.to_numeric(df[col], errors="coerce")
+            # Only whole-number columns without gaps can become integers; others stay float
+            if values.notna().all() and (values % 1 == 0).all():
+                df[col] = pd.to_numeric(values.astype("int64"), downcast="integer")
+            else:
+                df[col] = _downcast_float(values)
+    for col in float_cols:
+        if col in df.columns:
+            df[col] = _downcast_float(pd.to_numeric(df[col], errors="coerce"))
+    if "Month Name" in df.columns:
+        df["Month Name"] = pd.Categorical(df["Month Name"], categories=list(month_name_map.values()), ordered=True)
+    after = int(df.memory_usage(deep=True).sum())
+    logger.info("Compacted sales frame from %.1f MB to %.1f MB", before / 1e6, after / 1e6)
+    return df, {"before": before, "after": after}
+
+
+def distinct_values(series):
+    # Sorted distinct non-null values as text; categoricals read them off the used codes
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        used_codes = np.unique(series.cat.codes.to_numpy())
+        return sorted(series.cat.categories[used_codes[used_codes >= 0]].astype(str))
+    return sorted(series.dropna().astype(str).unique())
+
+
+def filter_options(series):
+    return ["All"] + distinct_values(series)
+
+
+# === SHARED DATASET ===
+# Loaded frames are held once per server process and handed to every session. With
+# pandas' copy-on-write mode each caller gets a shallow view: reads share the one copy
+# in memory, and any write a page makes (a new column, an in-place fix-up) lands in a
+# private copy of just the touched columns instead of in the frame everyone else reads.
+# Lookup structures built from those frames are plain numpy arrays and are frozen.
+# The mode is process-wide, so the entry points (Test.py, etl.py) switch it on at startup.
+
+
+def enable_copy_on_write():
+    pd.set_option("mode.copy_on_write", True)
+
+
+def shared_view(df):
+    return df.copy(deep=False)
+
+
+def freeze_arrays(value):
+    # Make every numpy array in value (searching dicts, lists and tuples) read-only; returns value
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, dict):
+        for item in value.values():
+            freeze_arrays(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            freeze_arrays(item)
+    return value
+
+
+# === PARALLEL LOADING ===
+# Each source's read/normalise/filter pipeline is CPU-bound pyxlsb and pandas work, so the
+# sources are loaded in separate worker processes. Workers are always spawned: forking a
+# process that runs threads (the Streamlit server's) can deadlock. A spawned worker
+# re-imports the main module first, so only entry points whose main module is safe to
+# import load in parallel: etl.py and the benchmarks, not the Streamlit script.
+
+def load_sources(jobs, parallel=True, progress=None):
+    # jobs: list of (loader, args) tuples; returns the loaders' results in job order.
+    # progress, if given, is called with the number of jobs finished so far
+    report = progress or (lambda done: None)
+    if parallel and len(jobs) > 1:
+        try:
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=len(jobs), mp_context=context, initializer=enable_copy_on_write) as pool:
+                futures = [pool.submit(loader, *args) for loader, args in jobs]
+                results = []
+                for future in futures:
+                    results.append(future.result())
+                    report(len(results))
+                return results
+        except (BrokenProcessPool, OSError):
+            # Sandboxed hosts may refuse to start processes; load sequentially instead
+            pass
+    results = []
+    for loader, args in jobs:
+        results.append(loader(*args))
+        report(len(results))
+    return results
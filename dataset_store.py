@@ -0,0 +1,223 @@
+import threading
+import time
+
+import pandas as pd
+
+from aggregates import build_sales_cube, cube_version, filter_dims
+from data_loader import load_sources, load_source, source_registry, compact_frame, freeze_arrays
+
+# === DATASET BUILD ===
+# Everything a data version consists of: the compact booking rows, the sales cube and
+# its daily running totals, and the messages raised while loading. Built without any
+# Streamlit calls so it can run in a background thread; the pages show the messages.
+# Workbooks are only read for the live (current) travel years, plus any history years
+# the history store has never held; their rows replace those years' partitions in the
+# store, and the version's rows are then read back from it. A rebuild for some sources
+# only reloads those; the other sources' partitions are left as they are.
+
+
+def rows_dataset(df):
+    # The compact rows, cube, daily running totals and version of a set of stored rows,
+    # with the seconds spent compacting and aggregating them
+    started = time.perf_counter()
+    df["Sale In Cr"] = pd.to_numeric(df["Sale In Cr"], errors="coerce").fillna(0)
+    if "TOTAL_PAX" in df.columns:
+        df["TOTAL_PAX"] = pd.to_numeric(df["TOTAL_PAX"], errors="coerce").fillna(0)
+    # Categorical dimensions, downcast numbers, and only the columns the pages read
+    df, memory_report = compact_frame(df)
+    compacted = time.perf_counter()
+    cube, daily = build_sales_cube(df)
+    return {
+        "df": df,
+        "cube": cube,
+        "daily": freeze_arrays(daily),
+        "columns": list(df.columns),
+        "version": cube_version(cube, daily),
+        "memory": memory_report,
+        "timings": {"compact": compacted - started, "aggregate": time.perf_counter() - compacted},
+    }
+
+
+def build_dataset(snapshot_dir, history, years, history_years, live_years, parallel=True, progress=None, previous=None, sources=None):
+    # Returns (dataset, messages); dataset is None when a source is unusable.
+    # years: the travel years the version holds; sources: names of the sources to reload (None: all of them).
+    # dataset["timings"] holds the seconds spent per stage, per source for the workbook stages
+    report = progress or (lambda step, done, total: None)
+    build_started = time.perf_counter()
+    load_years = sorted(set(live_years) | set(history.missing_years(history_years)))
+    backfill = set(load_years) - set(live_years)
+    reusable = previous is not None and not previous["df"].empty and sources is not None and not backfill
+    reload = [
+        source for source in source_registry
+        if not reusable or source["name"] in sources or source["name"] not in previous["source_messages"]
+    ]
+    total = len(reload) + 3
+    report("Loading workbooks", 0, total)
+    results = load_sources(
+        [(load_source, (source, snapshot_dir, load_years)) for source in reload],
+        parallel=parallel,
+        progress=lambda done: report("Loading workbooks", done, total),
+    )
+    loaded = {source["name"]: result for source, result in zip(reload, results)}
+
+    messages = []
+    source_messages = {}
+    timings = {}
+    for source in source_registry:
+        name = source["name"]
+        if name in loaded:
+            _, source_messages[name], source_timings = loaded[name]
+            timings.update({f"{name} {stage}": seconds for stage, seconds in source_timings.items()})
+        else:
+            source_messages[name] = previous["source_messages"][name]
+        messages.extend(source_messages[name])
+    if any(level == "error" for level, _ in messages):
+        return None, messages
+
+    # Only the partitions of the reloaded years and sources whose rows changed are rewritten
+    report("Updating history", len(reload), total)
+    started = time.perf_counter()
+    written = history.write({name: result[0] for name, result in loaded.items()}, load_years)
+    timings["history write"] = time.perf_counter() - started
+
+    # Combine DataFrames
+    report("Combining sources", len(reload) + 1, total)
+    started = time.perf_counter()
+    df = history.read(years, sources=[source["name"] for source in source_registry])
+    timings["concat"] = time.perf_counter() - started
+    if df.empty:
+        return None, messages + [("error", f"No sales rows found for travel years {', '.join(str(year) for year in years)}")]
+
+    report("Aggregating", len(reload) + 2, total)
+    dataset = rows_dataset(df)
+    timings.update(dataset["timings"])
+    timings["total"] = time.perf_counter() - build_started
+    dataset = dict(
+        dataset,
+        timings=timings,
+        messages=messages,
+        source_messages=source_messages,
+        sources=[source["name"] for source in reload],
+        history={"written": written, "version": history.version()},
+    )
+    report("Done", total, total)
+    return dataset, messages
+
+
+def history_view(history, years, region="All", quarter="All", final_business="All"):
+    # A dataset of other travel years than the current version's, from only the history
+    # partitions the view needs; None when they hold no rows
+    selections = {"region": region, "quarter": quarter, "final_business": final_business}
+    filters = {col: str(selections[name]) for col, name in filter_dims if selections[name] != "All"}
+    started = time.perf_counter()
+    df = history.read(years, sources=[source["name"] for source in source_registry], filters=filters)
+    if df.empty:
+        return None
+    read = time.perf_counter() - started
+    view = rows_dataset(df)
+    view["timings"] = dict(read=read, **view["timings"])
+    return view
+
+
+def empty_dataset(messages):
+    return {
+        "df": pd.DataFrame(),
+        "cube": pd.DataFrame(),
+        "daily": None,
+        "columns": [],
+        "version": "empty",
+        "messages": messages,
+        "source_messages": {},
+        "sources": [],
+        "memory": None,
+        "history": None,
+        "timings": {},
+    }
+
+
+# === DATASET STORE ===
+# Double-buffered data versions. Sessions always read the current version; a refresh
+# builds the next one in a background thread while they keep doing so, and the new
+# version replaces the current one in a single reference swap once it has loaded
+# cleanly. A failed refresh leaves the current version in place and reports why.
+# Only the very first load, when there is nothing to serve yet, runs in the foreground.
+# Refreshes requested while one is running are merged and run straight after it.
+
+
+class DatasetStore:
+    def __init__(self, build):
+        # build(progress, previous, sources) -> (dataset or None, messages);
+        # progress(step, done, total), sources: names to reload or None for all
+        self._build = build
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._current = None
+        self._generation = 0
+        self._worker = None
+        self._queued = False
+        self._queued_sources = set()
+        self._status = {"state": "idle", "step": "", "done": 0, "total": 0, "started": None, "finished": None, "messages": []}
+
+    def current(self):
+        with self._lock:
+            if self._current is not None:
+                return self._current
+        self._run_build(first_load=True)
+        return self._current
+
+    def refresh(self, sources=None):
+        # Queues a background rebuild of the named sources (None: all); returns False if
+        # a rebuild is already running, in which case this one follows it
+        with self._lock:
+            if sources is None or self._queued_sources is None:
+                self._queued_sources = None
+            else:
+                self._queued_sources |= set(sources)
+            self._queued = True
+            if self._worker is not None and self._worker.is_alive():
+                return False
+            self._worker = threading.Thread(target=self._run_queued, name="dataset-refresh", daemon=True)
+            self._worker.start()
+        return True
+
+    def _run_queued(self):
+        while True:
+            with self._lock:
+                if not self._queued:
+                    return
+                sources = self._queued_sources
+                self._queued = False
+                self._queued_sources = set()
+            self._run_build(sources=sources)
+
+    def status(self):
+        with self._lock:
+            return dict(self._status, generation=self._generation)
+
+    def _progress(self, step, done, total):
+        with self._lock:
+            self._status.update(step=step, done=done, total=total)
+
+    def _run_build(self, first_load=False, sources=None):
+        with self._build_lock:
+            if first_load and self._current is not None:
+                # Another session finished the first load while this one waited
+                return
+            with self._lock:
+                self._status.update(state="running", step="Starting", done=0, total=0, started=time.time(), finished=None, messages=[])
+            try:
+                dataset, messages = self._build(self._progress, self._current, sources)
+            except Exception as e:
+                dataset, messages = None, [("error", f"Failed to load data: {str(e)}")]
+            # A version only goes live if it loaded cleanly and has rows; otherwise the
+            # current one stays (or, on the first load, an empty one carries the errors)
+            valid = dataset is not None and not dataset["df"].empty
+            with self._lock:
+                if valid:
+                    self._generation += 1
+                    dataset["generation"] = self._generation
+                    dataset["loaded_at"] = time.time()
+                    self._current = dataset
+                elif self._current is None:
+                    self._current = dict(empty_dataset(messages), generation=0, loaded_at=time.time())
+                self._status.update(state="done" if valid else "failed", finished=time.time(), messages=messages)
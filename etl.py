@@ -0,0 +1,168 @@
+import argparse
+import logging
+import math
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from aggregates import build_target_table, normalise_text
+from atomic_io import write_json_atomic
+from data_loader import enable_copy_on_write, read_target_file, source_registry
+from dataset_store import build_dataset
+from history_store import HistoryStore
+from release_store import RELEASE_VERSION, ReleaseStore
+from settings import dataset_dir, history_dir, history_years, keep_datasets, live_years, parallel_load, snapshot_dir, target_file, travel_years
+
+logger = logging.getLogger("etl")
+
+# === ETL ===
+# Builds the data version the app serves outside the Streamlit process, so no user
+# request waits for it; schedule it after the upstream export, from the app's folder:
+#   python etl.py            build and publish if a workbook, Target.csv or the years changed
+#   python etl.py --force    build and publish regardless
+# It runs the app's own pipeline (dataset_store.build_dataset: workbooks, normalising,
+# history store, compacting, sales cube) and Target.csv, checks the result and publishes
+# it as a new release in dataset_dir (release_store.py), which the app picks up when
+# settings.prebuilt_data is True. A build that fails a check is not published, and the
+# app keeps serving the previous release.
+# Every run's report is written to dataset_dir/last_run.json; the exit status is 0 when
+# a release was published or nothing changed, 1 otherwise.
+
+
+def input_state():
+    # What a release is built from: the travel years and the size and mtime of every input file
+    files = {}
+    for path in [source["file"] for source in source_registry] + [target_file]:
+        try:
+            stat = os.stat(path)
+            files[path] = [stat.st_size, stat.st_mtime_ns]
+        except OSError:
+            files[path] = None
+    return {"travel_years": travel_years, "history_years": history_years, "live_years": live_years, "files": files}
+
+
+def validation_checks(dataset, targets):
+    # [{"check", "level", "ok", "detail"}]; a failed "error" check stops the release
+    df, cube, daily = dataset["df"], dataset["cube"], dataset["daily"]
+    checks = []
+
+    def check(name, ok, detail="", level="error"):
+        checks.append({"check": name, "level": level, "ok": bool(ok), "detail": detail})
+
+    found_sources = set(df["Source"].astype(str)) if "Source" in df.columns else set()
+    missing_sources = [source["name"] for source in source_registry if source["name"] not in found_sources]
+    check("Every source has rows", not missing_sources, ", ".join(missing_sources))
+    missing_years = sorted(set(travel_years) - set(df["Travel Y"].astype(int)))
+    check("Every travel year has rows", not missing_years, ", ".join(str(year) for year in missing_years))
+    # The cube and the last running total of each cube row must add up to the booking rows
+    last = np.append(daily["start"][1:], len(daily["keys"])) - 1
+    for i, measure in enumerate(daily["measures"]):
+        rows_total = float(df[measure].to_numpy(dtype=float).sum())
+        cube_total = float(cube[measure].to_numpy(dtype=float).sum())
+        daily_total = float(daily["cumulative"][last, i].sum())
+        check(
+            f"{measure} totals match",
+            math.isclose(rows_total, cube_total, rel_tol=1e-6, abs_tol=1e-6) and math.isclose(rows_total, daily_total, rel_tol=1e-6, abs_tol=1e-6),
+            f"rows {rows_total:,.4f}, cube {cube_total:,.4f}, daily {daily_total:,.4f}",
+        )
+    check("Targets loaded", not targets["table"].empty)
+    if "REGION_B" in df.columns:
+        table = targets["table"].reset_index()
+        regions = set(normalise_text(df["REGION_B"].dropna().astype(str)))
+        untargeted = sorted(regions - set(table.loc[table["Type"] == "REGION", "Region"]))
+        check("Every sales region has a target", not untargeted, ", ".join(untargeted), level="warning")
+    return checks
+
+
+def totals(df):
+    # Rows and sales per source and travel year
+    grouped = df.groupby(["Source", "Travel Y"], observed=True)["Sale In Cr"].agg(["size", "sum"]).reset_index()
+    return [
+        {"source": str(row["Source"]), "year": int(row["Travel Y"]), "rows": int(row["size"]), "sales_cr": round(float(row["sum"]), 4)}
+        for _, row in grouped.iterrows()
+    ]
+
+
+def run(force=False, parallel=parallel_load):
+    # Returns the run's report; report["status"] is "published", "unchanged" or "failed"
+    started = time.perf_counter()
+    releases = ReleaseStore(dataset_dir, keep_datasets)
+    inputs = input_state()
+    report = {"started": datetime.now().isoformat(timespec="seconds"), "inputs": inputs, "release": None}
+    latest = releases.latest()
+    # A release written by another version of this code is rebuilt even if no input changed
+    if latest is not None and latest["version"] == RELEASE_VERSION and latest["inputs"] == inputs and not force:
+        logger.info("Release %s is up to date", latest["release"])
+        return dict(report, status="unchanged", release=latest["release"])
+
+    history = HistoryStore(history_dir)
+    dataset, messages = build_dataset(
+        snapshot_dir, history, travel_years, history_years, live_years, parallel,
+        progress=lambda step, done, total: logger.info("%s (%d/%d)", step, done, total),
+    )
+    report["messages"] = [list(message) for message in messages]
+    if dataset is None:
+        return dict(report, status="failed", checks=[])
+    timings = dict(dataset["timings"])
+
+    stage = time.perf_counter()
+    target_df, target_messages = read_target_file(target_file)
+    report["messages"] += [list(message) for message in target_messages]
+    if target_df is None:
+        return dict(report, status="failed", checks=[])
+    targets = build_target_table(target_df)
+    timings["targets"] = time.perf_counter() - stage
+
+    stage = time.perf_counter()
+    checks = validation_checks(dataset, targets)
+    timings["validate"] = time.perf_counter() - stage
+    report.update(
+        version=dataset["version"],
+        rows=len(dataset["df"]),
+        cube_rows=len(dataset["cube"]),
+        memory=dataset["memory"],
+        totals=totals(dataset["df"]),
+        checks=checks,
+        timings=timings,
+    )
+    if any(not check["ok"] and check["level"] == "error" for check in checks):
+        return dict(report, status="failed")
+
+    # The release's own report has every timing: only release.json is written after them
+    stage = time.perf_counter()
+    release = releases.prepare(dataset, targets)
+    timings["publish"] = time.perf_counter() - stage
+    timings["total"] = time.perf_counter() - started
+    report["release"] = releases.publish(release, dataset, targets, dict(report, status="published", release=release), inputs)
+    return dict(report, status="published")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build, check and publish the sales dataset the app serves.")
+    parser.add_argument("--force", action="store_true", help="Build even if no input changed")
+    parser.add_argument("--sequential", action="store_true", help="Load the workbooks one after another")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    enable_copy_on_write()
+
+    try:
+        report = run(force=args.force, parallel=parallel_load and not args.sequential)
+    except Exception as e:
+        logger.exception("ETL run failed")
+        report = {"started": datetime.now().isoformat(timespec="seconds"), "status": "failed", "messages": [["error", str(e)]]}
+    for level, message in report.get("messages", []):
+        logger.log(logging.ERROR if level == "error" else logging.WARNING, message)
+    for check in report.get("checks", []):
+        if not check["ok"]:
+            logger.log(logging.ERROR if check["level"] == "error" else logging.WARNING, "Check failed: %s %s", check["check"], check["detail"])
+    os.makedirs(dataset_dir, exist_ok=True)
+    write_json_atomic(report, os.path.join(dataset_dir, "last_run.json"))
+    logger.info("Run %s%s", report["status"], f": release {report['release']}" if report.get("release") else "")
+    return 0 if report["status"] in ("published", "unchanged") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# === FILE WATCHER ===
+# The workbooks and Target.csv are overwritten by an upstream export at any time, so
+# their size and mtime are polled in a background thread. An export is written over
+# several seconds, so a change only counts once the file has kept the same size and
+# mtime for the settle period; a file that is missing mid-copy is waited for. Settled
+# changes are handed to the callback together, once per poll, by path.
+
+
+def file_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class FileWatcher:
+    def __init__(self, paths, on_change, interval=5.0, settle=10.0):
+        # on_change(changed_paths) runs on the watcher thread
+        self.paths = list(paths)
+        self.on_change = on_change
+        self.interval = interval
+        self.settle = settle
+        self._seen = {path: file_signature(path) for path in self.paths}
+        self._pending = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="file-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def poll(self, now=None):
+        # One check of every path; returns the paths whose change has settled
+        now = time.time() if now is None else now
+        settled = []
+        for path in self.paths:
+            signature = file_signature(path)
+            if signature == self._seen[path]:
+                self._pending.pop(path, None)
+            elif signature is None:
+                # Deleted or being replaced: wait for the file to come back
+                self._pending.pop(path, None)
+            elif path in self._pending and self._pending[path][0] == signature:
+                if now - self._pending[path][1] >= self.settle:
+                    self._seen[path] = signature
+                    del self._pending[path]
+                    settled.append(path)
+            else:
+                self._pending[path] = (signature, now)
+        return settled
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                changed = self.poll()
+                if changed:
+                    self.on_change(changed)
+            except Exception:
+                # A failed poll or rebuild must not stop watching; the next change retries
+                logger.exception("File watcher poll failed")
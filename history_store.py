@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from atomic_io import write_json_atomic, write_parquet_atomic
+from data_loader import frame_digest
+
+# === HISTORY STORE ===
+# Normalised booking rows of every travel year ever loaded, kept as Parquet partitions
+# by Travel Y, travel month and Source under one folder, with a manifest listing each
+# partition's file, row count and min/max statistics of the filter columns. Years only
+# need reading from the workbooks once: a refresh rewrites the partitions of the years
+# it reloaded (the current year), and only those whose rows changed. Readers pick
+# partitions by year and source and skip those whose statistics rule out a filter
+# value, so a view opens only the partitions it needs; as each travel month falls in
+# one travel quarter, a quarter filter alone skips three months in four.
+#
+# Files replaced by a write are removed by the write after it, so a reader still
+# working from the previous manifest never loses a file mid-read.
+
+HISTORY_VERSION = 2
+stat_cols = ["REGION", "Travel Qtr", "Final Buniess"]
+
+
+def partition_dir(year, month, source):
+    return f"year={year}/month={month:02d}/source={source}"
+
+
+def column_stats(part):
+    # [min, max] as text of each text filter column; None when the partition has no
+    # value in it (nothing can match), no entry when it holds other types (no pruning)
+    stats = {}
+    for col in stat_cols:
+        if col not in part.columns:
+            stats[col] = None
+            continue
+        values = part[col].dropna()
+        if len(values) and pd.api.types.infer_dtype(values, skipna=True) != "string":
+            continue
+        stats[col] = [values.min(), values.max()] if len(values) else None
+    return stats
+
+
+def may_match(stats, col, value):
+    if col not in stats:
+        return True
+    bounds = stats[col]
+    return bounds is not None and bounds[0] <= value <= bounds[1]
+
+
+class HistoryStore:
+    def __init__(self, root):
+        self.root = root
+        self._manifest = self._read_manifest()
+
+    def reload(self):
+        # Picks up partitions written by another process (etl.py)
+        self._manifest = self._read_manifest()
+
+    def _manifest_path(self):
+        return os.path.join(self.root, "manifest.json")
+
+    def _read_manifest(self):
+        try:
+            with open(self._manifest_path(), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("version") == HISTORY_VERSION:
+                return manifest
+        except (FileNotFoundError, ValueError):
+            pass
+        return {"version": HISTORY_VERSION, "years": [], "partitions": {}, "retired": []}
+
+    def _path(self, file):
+        return os.path.join(self.root, *file.split("/"))
+
+    def missing_years(self, years):
+        # Travel years that were never loaded into the store
+        return sorted(set(years) - set(self._manifest["years"]))
+
+    def version(self, years=None):
+        # Changes whenever a partition of the given years (None: any year) is rewritten
+        files = sorted(
+            partition["file"] for partition in self._manifest["partitions"].values()
+            if years is None or partition["year"] in years
+        )
+        return hashlib.sha1(json.dumps(files).encode()).hexdigest()[:16]
+
+    def write(self, frames, years):
+        # Replaces the partitions of the given travel years for each {source name: rows};
+        # returns the number of partition files written
+        manifest = self._manifest
+        years = set(years)
+        partitions = {
+            key: partition for key, partition in manifest["partitions"].items()
+            if not (partition["year"] in years and partition["source"] in frames)
+        }
+        written = 0
+        for source, df in frames.items():
+            for (year, month), part in df.groupby(["Travel Y", "Month Num"], sort=True):
+                year, month = int(year), int(month)
+                if year not in years:
+                    continue
+                key = partition_dir(year, month, source)
+                part = part.reset_index(drop=True)
+                digest = hashlib.sha1(f"{list(part.columns)}|{frame_digest(part)}".encode()).hexdigest()[:16]
+                file = f"{key}/part-{digest}.parquet"
+                previous = manifest["partitions"].get(key)
+                if previous and previous["file"] == file and os.path.exists(self._path(file)):
+                    partitions[key] = previous
+                    continue
+                os.makedirs(os.path.dirname(self._path(file)), exist_ok=True)
+                stored = write_parquet_atomic(part, self._path(file))
+                partitions[key] = {
+                    "year": year,
+                    "month": month,
+                    "source": source,
+                    "file": file,
+                    "rows": len(stored),
+                    "stats": column_stats(stored),
+                }
+                written += 1
+
+        live_files = {partition["file"] for partition in partitions.values()}
+        updated = {
+            "version": HISTORY_VERSION,
+            "years": sorted(set(manifest["years"]) | years),
+            "partitions": partitions,
+            "retired": sorted({partition["file"] for partition in manifest["partitions"].values()} - live_files),
+        }
+        os.makedirs(self.root, exist_ok=True)
+        write_json_atomic(updated, self._manifest_path())
+        self._manifest = updated
+        for file in manifest["retired"]:
+            if file not in live_files:
+                try:
+                    os.remove(self._path(file))
+                except OSError:
+                    pass
+        return written
+
+    def select(self, years, sources=None, filters=None):
+        # Partitions of the given years (and sources, in that order) whose statistics
+        # allow every {column: value as text} filter
+        manifest = self._manifest
+        order = {source: i for i, source in enumerate(sources)} if sources is not None else {}
+        chosen = [
+            partition for partition in manifest["partitions"].values()
+            if partition["year"] in years
+            and (sources is None or partition["source"] in order)
+            and all(may_match(partition["stats"], col, value) for col, value in (filters or {}).items())
+        ]
+        return sorted(chosen, key=lambda p: (order.get(p["source"], 0), p["source"], p["year"], p["month"]))
+
+    def read(self, years, sources=None, filters=None):
+        partitions = self.select(years, sources, filters)
+        if not partitions:
+            return pd.DataFrame()
+        return pd.concat([pd.read_parquet(self._path(partition["file"])) for partition in partitions], ignore_index=True)
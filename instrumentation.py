@@ -0,0 +1,74 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import pandas as pd
+
+# === INSTRUMENTATION ===
+# Always-on timing events behind the admin Performance page: data load stages, page
+# and fragment reruns, and figure builds. An event is a small dict kept in a bounded
+# ring buffer, where the oldest events drop off once it is full, and appended as one
+# JSON line to a local log so a slow day can still be looked at after a restart. The
+# log is rolled over to <log>.1 once it reaches max_log_bytes. Recording an event is a
+# deque append and one short file write; a log that cannot be written is skipped.
+
+
+class Recorder:
+    def __init__(self, capacity, log_path=None, max_log_bytes=10 * 1024 * 1024):
+        self.log_path = log_path
+        self.max_log_bytes = max_log_bytes
+        self._events = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def record(self, kind, name, seconds, **fields):
+        event = dict(time=time.time(), kind=kind, name=name, seconds=seconds, **fields)
+        with self._lock:
+            self._events.append(event)
+            if self.log_path:
+                try:
+                    self._write(json.dumps(event, default=str))
+                except OSError:
+                    pass
+        return event
+
+    def record_stages(self, kind, timings, **fields):
+        # timings: {stage name: seconds}
+        for name, seconds in timings.items():
+            self.record(kind, name, seconds, **fields)
+
+    def _write(self, line):
+        if os.path.exists(self.log_path) and os.path.getsize(self.log_path) >= self.max_log_bytes:
+            os.replace(self.log_path, self.log_path + ".1")
+        os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    @contextmanager
+    def timer(self, kind, name, **fields):
+        # Records the wall time of the block; a block that raises (st.rerun, st.stop) is not recorded
+        started = time.perf_counter()
+        yield
+        self.record(kind, name, time.perf_counter() - started, **fields)
+
+    def events(self, kind=None):
+        with self._lock:
+            return [event for event in self._events if kind is None or event["kind"] == kind]
+
+    def __len__(self):
+        return len(self._events)
+
+
+def summarise(events, quantiles=(0.5, 0.9, 0.99)):
+    # Per event name, in first-seen order: runs, the last duration and the given
+    # percentiles and maximum of the durations, in milliseconds
+    if not events:
+        return pd.DataFrame()
+    durations = pd.DataFrame(events).groupby("name", sort=False)["seconds"]
+    summary = pd.DataFrame({"Runs": durations.size(), "Last ms": durations.last() * 1000})
+    for q in quantiles:
+        summary[f"p{round(q * 100)} ms"] = durations.quantile(q) * 1000
+    summary["Max ms"] = durations.max() * 1000
+    return summary.round(1).rename_axis("Name").reset_index()
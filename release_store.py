@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from aggregates import target_index, target_keys
+from atomic_io import write_json_atomic, write_parquet_atomic
+from data_loader import frame_digest, freeze_arrays
+
+# === RELEASE STORE ===
+# Data versions prebuilt by etl.py, ready to serve: each release is a folder holding the
+# compact booking rows and the sales cube as Parquet, the cube's daily running totals
+# as numpy arrays, the target table, and release.json with everything else the app
+# keeps of a data version (messages, memory report, build timings) plus the validation
+# report and the inputs it was built from. A release is written to a temporary folder
+# and renamed into place, and only then does latest.json point to it, so the app never
+# opens a half-written release. The newest keep releases are kept, so an app still
+# opening the previous one is not cut off. Runs must not overlap (e.g. flock in cron).
+
+RELEASE_VERSION = 2
+daily_arrays = ["days", "keys", "start", "cumulative"]
+
+
+class ReleaseStore:
+    def __init__(self, root, keep=3):
+        self.root = root
+        self.keep = keep
+
+    def pointer_path(self):
+        # Rewritten on every publish; the app watches it for new releases
+        return os.path.join(self.root, "latest.json")
+
+    def _release_path(self, release, name=""):
+        return os.path.join(self.root, release, name)
+
+    def latest(self):
+        # release.json of the latest release, or None when nothing was published yet
+        try:
+            with open(self.pointer_path(), "r", encoding="utf-8") as f:
+                release = json.load(f)["release"]
+            with open(self._release_path(release, "release.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+    def _staging_path(self, release, name=""):
+        return self._release_path(f"{release}.tmp{os.getpid()}", name)
+
+    def prepare(self, dataset, targets):
+        # Writes the dataset (from dataset_store.build_dataset) and its targets (from
+        # aggregates.build_target_table) to a temporary folder; returns the new release's
+        # name, for publish. Everything but release.json is written here, so the report
+        # passed to publish can time it
+        release = f"{time.strftime('%Y%m%d-%H%M%S')}-{hashlib.sha1(dataset['version'].encode()).hexdigest()[:8]}"
+        tmp = self._staging_path(release)
+        os.makedirs(tmp)
+        # Mixed-type raw columns are stored as text, as in the history store; FILE_DATE is typed by data_loader.normalise
+        write_parquet_atomic(dataset["df"], os.path.join(tmp, "rows.parquet"))
+        write_parquet_atomic(dataset["cube"], os.path.join(tmp, "cube.parquet"))
+        np.savez(os.path.join(tmp, "daily.npz"), **{name: dataset["daily"][name] for name in daily_arrays})
+        targets["table"].reset_index().to_parquet(os.path.join(tmp, "targets.parquet"), index=False)
+        return release
+
+    def publish(self, release, dataset, targets, report, inputs):
+        # Writes release.json of a prepared release, renames it into place and points
+        # latest.json to it
+        write_json_atomic({
+            "version": RELEASE_VERSION,
+            "release": release,
+            "data_version": dataset["version"],
+            "created": time.time(),
+            "columns": dataset["columns"],
+            "daily": {"measures": dataset["daily"]["measures"], "ranks": int(dataset["daily"]["ranks"])},
+            "memory": dataset["memory"],
+            "messages": dataset["messages"],
+            "source_messages": dataset["source_messages"],
+            "sources": dataset["sources"],
+            "history": dataset["history"],
+            "timings": dataset["timings"],
+            "targets": {"typed": targets["typed"], "version": frame_digest(targets["table"].reset_index())},
+            "inputs": inputs,
+            "report": report,
+        }, self._staging_path(release, "release.json"))
+        os.replace(self._staging_path(release), self._release_path(release))
+        write_json_atomic({"release": release}, self.pointer_path())
+        self._remove_old(release)
+        return release
+
+    def _remove_old(self, current):
+        releases = sorted(
+            name for name in os.listdir(self.root)
+            if os.path.exists(self._release_path(name, "release.json")) and name != current
+        )
+        for name in releases[:max(len(releases) - (self.keep - 1), 0)]:
+            shutil.rmtree(self._release_path(name), ignore_errors=True)
+
+    def open_latest(self):
+        # Returns (dataset, messages) in the form of dataset_store.build_dataset, with the
+        # release's targets; dataset is None when there is no usable release
+        started = time.perf_counter()
+        meta = self.latest()
+        if meta is None:
+            return None, [("error", f"No prebuilt dataset in {self.root}: run python etl.py to build one, or set prebuilt_data = False in settings.py")]
+        if meta["version"] != RELEASE_VERSION:
+            return None, [("error", f"Dataset {meta['release']} was built by another version of etl.py: run python etl.py --force")]
+        release = meta["release"]
+        df = pd.read_parquet(self._release_path(release, "rows.parquet"))
+        cube = pd.read_parquet(self._release_path(release, "cube.parquet"))
+        with np.load(self._release_path(release, "daily.npz")) as arrays:
+            daily = dict(meta["daily"], **{name: arrays[name] for name in daily_arrays})
+        table = pd.read_parquet(self._release_path(release, "targets.parquet")).set_index(target_keys)
+        messages = [tuple(message) for message in meta["messages"]]
+        dataset = {
+            "df": df,
+            "cube": cube,
+            "daily": freeze_arrays(daily),
+            "columns": meta["columns"],
+            "version": meta["data_version"],
+            "memory": meta["memory"],
+            "timings": {"open": time.perf_counter() - started},
+            "messages": messages,
+            "source_messages": {name: [tuple(message) for message in found] for name, found in meta["source_messages"].items()},
+            "sources": meta["sources"],
+            "history": meta["history"],
+            "targets": target_index(table, meta["targets"]["typed"]),
+            "target_version": meta["targets"]["version"],
+            "release": release,
+        }
+        return dataset, messages
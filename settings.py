@@ -0,0 +1,35 @@
+import os
+from datetime import datetime
+
+# === DATA SETTINGS ===
+# Where the sales data and the users live and which travel years the data covers; shared by
+# the app (Test.py), the ETL command (etl.py) and the user admin command (user_store.py),
+# which all run from the app's folder.
+
+target_file = os.path.join("Target.csv")
+# Sales workbooks (Current_Base.xlsb, SAP.xlsb) are listed in data_loader.source_registry
+snapshot_dir = os.path.join(".snapshots")
+# etl.py loads the workbooks in parallel worker processes; the app loads them one after another
+parallel_load = True
+# Sales rows of every travel year are kept in history_dir, partitioned by year, travel month and source.
+# A refresh re-reads only live_years from the workbooks; travel_years are held in memory and other
+# history years are opened from the store when a view needs them. The as-of date can be any day of
+# a history year whose previous year is kept too
+current_date = datetime(2025, 7, 24, 22, 4)  # 10:04 PM IST, July 24, 2025
+history_dir = os.path.join("history")
+history_years = list(range(current_date.year - 4, current_date.year + 1))
+live_years = [current_date.year]
+travel_years = [current_date.year - 1, current_date.year]
+# The app builds its data versions itself from the workbooks, in its first request and whenever a
+# workbook changes. To take that off the app, run python etl.py after each upstream export (e.g. from
+# cron): it publishes releases to dataset_dir, keeping the latest keep_datasets. Then set
+# prebuilt_data = True and the app only opens the latest release; run etl.py once before switching,
+# as the app has nothing to show until the first release is published. Only one of the two may
+# build at a time, since both write history_dir and the snapshot cache
+dataset_dir = os.path.join("datasets")
+keep_datasets = 3
+prebuilt_data = False
+# Logins are kept in user_db (SQLite); user_file is only read once, to import the initial users.
+# After that, users are managed with python user_store.py
+user_file = os.path.join("Emp_base.csv")
+user_db = os.path.join("users.db")
@@ -0,0 +1,149 @@
+import glob
+import hashlib
+import os
+from datetime import timedelta
+
+import numpy as np
+
+from aggregates import booking_days, cube_dims, cube_measures, dashboard_result, dated_sources, period_start, same_day_in_year, summary_dims, target_vs_ach_result
+from data_loader import source_registry
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+# === DUCKDB BACKEND ===
+# Optional alternative to the in-process pandas cube, chosen with query_backend in
+# Test.py. Each data version's booking rows are written once to a Parquet file that
+# DuckDB queries in place: the filters, the as-of window and the per-year groupby run
+# as SQL inside the engine (multi-threaded, with the filters pushed into the Parquet
+# scan), and only the per-year summaries come back. Those go through the same
+# dashboard_result / target_vs_ach_result as the pandas path, so both backends give
+# the same page values on the same data and can be compared directly.
+#
+# History views (see Test.sales_view) hold few rows and are loaded into DuckDB's memory
+# rather than exported.
+#
+# The window rules are the SQL forms of data_loader.window_rules, by the same names.
+# As in the daily cube, rows of undated sources count at every as-of date and dated
+# rows without a booking day never do.
+
+sql_window_rules = {
+    "current_month_onwards_as_of": '"Month Num" >= $month',
+    "before_current_month": '"Month Num" >= 1 AND "Month Num" < $month',
+}
+filter_columns = [("REGION", "region"), ("Travel Qtr", "quarter"), ("Final Buniess", "final_business")]
+keep_exports = 2
+
+
+def quote(col):
+    return '"' + col.replace('"', '""') + '"'
+
+
+def export_path(snapshot_dir, data_version):
+    return os.path.join(snapshot_dir, f"sales.{hashlib.sha1(data_version.encode()).hexdigest()[:16]}.parquet")
+
+
+def sales_rows(df):
+    # The cube's dimensions and measures per booking row, plus its booking day
+    rows = df[[col for col in cube_dims + cube_measures if col in df.columns]].copy()
+    rows["Booked On"] = booking_days(df)[1]
+    return rows
+
+
+def export_rows(df, path):
+    if os.path.exists(path):
+        return path
+    rows = sales_rows(df)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    rows.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    # The previous version's export stays for sessions still reading it
+    exports = sorted(glob.glob(os.path.join(glob.escape(os.path.dirname(path) or "."), "sales.*.parquet")), key=os.path.getmtime)
+    for old in exports[:-keep_exports]:
+        try:
+            os.remove(old)
+        except OSError:
+            pass
+    return path
+
+
+class DuckDBBackend:
+    def __init__(self, df, snapshot_dir=None, data_version=None):
+        # Without a snapshot_dir the rows are copied into an in-memory table
+        if duckdb is None:
+            raise ImportError("query_backend = \"duckdb\" needs the duckdb package (pip install duckdb)")
+        self.columns = set(df.columns)
+        self._con = duckdb.connect()
+        if snapshot_dir is None:
+            self._con.register("sales_rows", sales_rows(df))
+            self._con.execute("CREATE TABLE sales AS SELECT * FROM sales_rows")
+            self._con.unregister("sales_rows")
+        else:
+            path = export_rows(df, export_path(snapshot_dir, data_version))
+            self._con.execute(f"CREATE VIEW sales AS SELECT * FROM read_parquet('{path.replace(chr(39), chr(39) * 2)}')")
+
+    def _query(self, sql, params):
+        # A cursor per query: sessions run on their own threads and may query at once
+        return self._con.cursor().execute(sql, params).df()
+
+    def _filters(self, region, quarter, final_business):
+        # The select-box filters, compared as text like the pandas filter index
+        selections = {"region": region, "quarter": quarter, "final_business": final_business}
+        where, params = [], {}
+        for col, name in filter_columns:
+            if selections[name] == "All" or col not in self.columns:
+                continue
+            where.append(f"CAST({quote(col)} AS VARCHAR) = ${name}")
+            params[name] = str(selections[name])
+        return where, params
+
+    def year_summary(self, region, quarter, final_business, as_of, year, period="Travel year", start=None):
+        # aggregates.year_summary(window_rows(...)) for one travel year, computed in SQL
+        shift = as_of.year - year
+        first_day = period_start(as_of, period, start)
+        where, params = self._filters(region, quarter, final_business)
+        where.append('"Travel Y" = $year')
+        params.update(year=year, cutoff=same_day_in_year(as_of, year))
+        dated = ", ".join(f"$dated{i}" for i in range(len(dated_sources))) or "NULL"
+        params.update({f"dated{i}": name for i, name in enumerate(dated_sources)})
+        if first_day is None:
+            # Each source's travel months, bookings up to the as-of day
+            windows = []
+            for i, source in enumerate(source_registry):
+                windows.append(f'("Source" = $source{i} AND {sql_window_rules[source["window"]]})')
+                params[f"source{i}"] = source["name"]
+            where.append("(" + " OR ".join(windows) + ")")
+            params["month"] = (as_of + timedelta(days=1)).month
+            booked = f'"Source" NOT IN ({dated}) OR "Booked On" <= $cutoff'
+        else:
+            # Bookings made within the period; undated sources have none to place
+            where.append(f'"Source" IN ({dated})')
+            params["before"] = same_day_in_year(first_day, first_day.year - shift) - timedelta(days=1)
+            booked = '"Booked On" > $before AND "Booked On" <= $cutoff'
+        dims = ", ".join(quote(col) for col in summary_dims if col in self.columns)
+        rows = ", ".join(quote(col) for col in cube_dims if col in self.columns)
+        measures = [quote(col) for col in cube_measures if col in self.columns]
+        # Windowed totals per cube row; as in aggregates.window_rows, cube rows with
+        # nothing booked in the window are left out before the summary
+        summary = self._query(
+            f'SELECT {dims}, SUM("Sale In Cr") AS "Sale In Cr" FROM ('
+            f'SELECT {rows}, ' + ", ".join(f"SUM(CASE WHEN {booked} THEN {col} ELSE 0 END) AS {col}" for col in measures)
+            + f' FROM sales WHERE {" AND ".join(where)} GROUP BY {rows}'
+            f') WHERE {" OR ".join(f"{col} <> 0" for col in measures)} GROUP BY {dims}',
+            params,
+        )
+        # NULL dimensions come back as None; NaN keeps them grouped and labelled as in pandas
+        text_cols = [col for col in summary.columns if summary[col].dtype == object]
+        summary[text_cols] = summary[text_cols].where(summary[text_cols].notna(), np.nan)
+        return summary
+
+    def dashboard_aggregates(self, region, quarter, final_business, as_of, period="Travel year", start=None):
+        current = self.year_summary(region, quarter, final_business, as_of, as_of.year, period, start)
+        previous = self.year_summary(region, quarter, final_business, as_of, as_of.year - 1, period, start)
+        return dashboard_result(current, previous)
+
+    def target_vs_ach_aggregates(self, targets, region, quarter, final_business, as_of):
+        return target_vs_ach_result(self.year_summary(region, quarter, final_business, as_of, as_of.year), targets)
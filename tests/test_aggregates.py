@@ -0,0 +1,214 @@
+import itertools
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(repo_dir, "benchmarks"))
+
+# synthetic_data puts the repository on sys.path for the app modules below
+from synthetic_data import generate_source, target_frame  # noqa: E402
+
+from aggregates import (  # noqa: E402
+    build_filter_index, build_target_table, dashboard_aggregates, dated_sources, kpi_businesses,
+    period_start, same_day_in_year, target_vs_ach_aggregates,
+)
+from data_loader import enable_copy_on_write, month_name_map, normalise, read_target_file, source_registry, standardise_columns, window_rules  # noqa: E402
+from dataset_store import rows_dataset  # noqa: E402
+import sql_backend  # noqa: E402
+
+# === PAGE AGGREGATE TESTS ===
+# The cube-based page aggregates against the row-level filtering the pages did before
+# the cube: the filters and each source's travel-month window applied to the booking
+# rows, dated sources booked up to the as-of day (or within the booking period), and
+# every chart summed from the rows that remain. A region booked only after the as-of
+# day ("LATE REGION") must not show up until its bookings do.
+
+travel_years = [2024, 2025]
+as_of_dates = [date(2025, 7, 23), date(2025, 2, 10)]
+period_cases = [("Travel year", None), ("MTD", None), ("YTD", None), ("Custom", date(2025, 1, 15))]
+
+
+def late_rows():
+    # AIR bookings of one region for December 2025, booked after both as-of dates
+    return pd.DataFrame({
+        "Sale In Cr": [0.5, 0.25],
+        "Travel M": ["Dec", "Dec"],
+        "Travel Y": [2025, 2025],
+        "REGION": ["LATE ZONE", "LATE ZONE"],
+        "TOUR START DATE": ["2025-12-10", "2025-12-20"],
+        "FILE_DATE": ["2025-07-24", "2025-07-24"],
+        "TOTAL_PAX": [2, 3],
+        "Travel Qtr": ["Q3", "Q3"],
+        "Final Buniess": ["AIR", "AIR"],
+        "Destination": ["DUBAI", "DUBAI"],
+        "FILE_TYPE": ["AIR", "AIR"],
+        "REGION_B": ["LATE REGION", "LATE REGION"],
+        "FILE_SUB_TYPE": ["AIR TICKET", "AIR TICKET"],
+    })
+
+
+@pytest.fixture(scope="module")
+def data(tmp_path_factory):
+    enable_copy_on_write()
+    rng = np.random.default_rng(7)
+    frames, cleans = [], []
+    for source in source_registry:
+        raw, clean = generate_source(source["name"], 3_000, travel_years, datetime(2025, 7, 24), rng)
+        raw = standardise_columns(raw, source)
+        if source["name"] in dated_sources:
+            raw = pd.concat([raw, late_rows()], ignore_index=True)
+        frames.append(normalise(raw, source, travel_years))
+        cleans.append(clean)
+    dataset = rows_dataset(pd.concat(frames, ignore_index=True))
+    target_path = str(tmp_path_factory.mktemp("targets") / "Target.csv")
+    target_frame(pd.concat(cleans, ignore_index=True), 2025, rng).to_csv(target_path, index=False)
+    dataset["targets"] = build_target_table(read_target_file(target_path)[0])
+    dataset["index"] = build_filter_index(dataset["cube"])
+    # The reference filtering works on plain text columns, as the pages' rows were
+    rows = dataset["df"].copy()
+    for col in rows.columns:
+        if isinstance(rows[col].dtype, pd.CategoricalDtype):
+            rows[col] = rows[col].astype(object).where(rows[col].notna(), None)
+    dataset["rows"] = rows
+    return dataset
+
+
+def reference_rows(df, region, quarter, final_business, as_of, year, period="Travel year", start=None):
+    # The booking rows one year of a page counted, filtered row by row
+    for col, value in [("REGION", region), ("Travel Qtr", quarter), ("Final Buniess", final_business)]:
+        if value != "All":
+            df = df[df[col].astype(str) == value]
+    df = df[df["Travel Y"] == year]
+    cutoff = pd.Timestamp(same_day_in_year(as_of, year))
+    first_day = period_start(as_of, period, start)
+    parts = []
+    for source in source_registry:
+        rows = df[df["Source"] == source["name"]]
+        booked = rows["FILE_DATE"] if "FILE_DATE" in rows.columns else None
+        if first_day is None:
+            rows = rows[window_rules[source["window"]](rows["Month Num"], as_of + timedelta(days=1))]
+            if source["name"] in dated_sources:
+                rows = rows[rows["FILE_DATE"] <= cutoff]
+        elif source["name"] in dated_sources:
+            before = pd.Timestamp(same_day_in_year(first_day, first_day.year - (as_of.year - year)))
+            rows = rows[(booked >= before) & (booked <= cutoff)]
+        else:
+            continue
+        parts.append(rows)
+    return pd.concat(parts, ignore_index=True)
+
+
+def sales_by(rows, col):
+    sales = rows.groupby(rows[col].astype(str))["Sale In Cr"].sum()
+    return sales[sales.index != "nan"]
+
+
+def values(series, keys):
+    return np.array([series.get(key, 0.0) for key in keys], dtype=float)
+
+
+def selections(cube):
+    # Every single filter on its own plus a fixed sample of combinations
+    options = {col: sorted(cube[col].dropna().astype(str).unique()) for col in ["REGION", "Travel Qtr", "Final Buniess"]}
+    picked = [("All", "All", "All")]
+    picked += [(region, "All", "All") for region in options["REGION"]]
+    picked += [("All", quarter, "All") for quarter in options["Travel Qtr"]]
+    picked += [("All", "All", business) for business in options["Final Buniess"]]
+    combos = list(itertools.product(options["REGION"], options["Travel Qtr"], options["Final Buniess"]))
+    rng = np.random.default_rng(0)
+    picked += [combos[i] for i in sorted(rng.choice(len(combos), 12, replace=False))]
+    return picked
+
+
+def check_dashboard(result, df, selection, as_of, period, start):
+    current = reference_rows(df, *selection, as_of, as_of.year, period, start)
+    previous = reference_rows(df, *selection, as_of, as_of.year - 1, period, start)
+    where = f"{selection} {as_of} {period}"
+    assert result["sales_current"] == pytest.approx(current["Sale In Cr"].sum(), abs=1e-9), where
+    assert result["sales_previous"] == pytest.approx(previous["Sale In Cr"].sum(), abs=1e-9), where
+
+    present = set(current["Final Buniess"].dropna().astype(str)) | set(previous["Final Buniess"].dropna().astype(str))
+    current_business, previous_business = sales_by(current, "Final Buniess"), sales_by(previous, "Final Buniess")
+    for business in kpi_businesses:
+        kpi = result["business_kpis"][business]
+        if business not in present:
+            assert kpi is None, (where, business)
+        else:
+            assert kpi is not None, (where, business)
+            assert kpi[0] == pytest.approx(current_business.get(business, 0.0), abs=1e-9), (where, business)
+            assert kpi[1] == pytest.approx(previous_business.get(business, 0.0), abs=1e-9), (where, business)
+
+    month_names = list(month_name_map.values())
+    for rows, key in [(current, "current_year_monthly"), (previous, "previous_year_monthly")]:
+        monthly = rows.groupby("Month Num")["Sale In Cr"].sum().rename(month_name_map)
+        np.testing.assert_allclose(result[key].to_numpy(), values(monthly, month_names), atol=1e-9, err_msg=where)
+
+    regions = sorted(set(sales_by(current, "REGION_B").index) | set(sales_by(previous, "REGION_B").index))
+    assert result["regions"] == regions, where
+    np.testing.assert_allclose(result["current_year_region"].to_numpy(), values(sales_by(current, "REGION_B"), regions), atol=1e-9, err_msg=where)
+    np.testing.assert_allclose(result["previous_year_region"].to_numpy(), values(sales_by(previous, "REGION_B"), regions), atol=1e-9, err_msg=where)
+
+    current_barea, previous_barea = sales_by(current, "BAREADEP"), sales_by(previous, "BAREADEP")
+    barea = sorted(set(current_barea[current_barea > 0].index) | set(previous_barea[previous_barea > 0].index))
+    assert result["barea_categories"] == barea, where
+    np.testing.assert_allclose(result["file_type_sales"], values(sales_by(current, "FILE_TYPE"), ["GIT", "FIT", "AIR"]), atol=1e-9, err_msg=where)
+
+
+def check_target_vs_ach(result, df, selection, as_of):
+    current = reference_rows(df, *selection, as_of, as_of.year)
+    where = f"{selection} {as_of}"
+    assert result["sales_current"] == pytest.approx(current["Sale In Cr"].sum(), abs=1e-9), where
+    present = set(current["Final Buniess"].dropna().astype(str))
+    business = sales_by(current, "Final Buniess")
+    for name in kpi_businesses:
+        expected = business.get(name, 0.0) if name in present else None
+        assert (result["business_sales"][name] is None) == (expected is None), (where, name)
+        if expected is not None:
+            assert result["business_sales"][name] == pytest.approx(expected, abs=1e-9), (where, name)
+    regions = sorted(sales_by(current, "REGION_B").index)
+    assert list(result["regions"]) == regions, where
+    np.testing.assert_allclose(result["sales_by_region"].to_numpy(), values(sales_by(current, "REGION_B"), regions), atol=1e-9, err_msg=where)
+    monthly = current.groupby("Month Num")["Sale In Cr"].sum().rename(month_name_map)
+    np.testing.assert_allclose(result["sales_by_month"].to_numpy(), values(monthly, list(month_name_map.values())), atol=1e-9, err_msg=where)
+
+
+def backends(data):
+    found = {"pandas": (
+        lambda *args: dashboard_aggregates(data["cube"], data["index"], data["daily"], *args),
+        lambda *args: target_vs_ach_aggregates(data["cube"], data["index"], data["daily"], data["targets"], *args),
+    )}
+    if sql_backend.duckdb is not None:
+        backend = sql_backend.DuckDBBackend(data["df"])
+        found["duckdb"] = (backend.dashboard_aggregates, lambda *args: backend.target_vs_ach_aggregates(data["targets"], *args))
+    return found
+
+
+def test_dashboard_matches_row_filtering(data):
+    for dashboard, _ in backends(data).values():
+        for selection, as_of, (period, start) in itertools.product(selections(data["cube"]), as_of_dates, period_cases):
+            check_dashboard(dashboard(*selection, as_of, period, start), data["rows"], selection, as_of, period, start)
+
+
+def test_target_vs_ach_matches_row_filtering(data):
+    for _, target_vs_ach in backends(data).values():
+        for selection, as_of in itertools.product(selections(data["cube"]), as_of_dates):
+            check_target_vs_ach(target_vs_ach(*selection, as_of), data["rows"], selection, as_of)
+
+
+def test_region_booked_after_as_of_is_not_shown(data):
+    as_of = as_of_dates[0]
+    for dashboard, target_vs_ach in backends(data).values():
+        result = dashboard("All", "All", "All", as_of)
+        assert "LATE REGION" not in result["regions"]
+        assert "LATE REGION" not in target_vs_ach("All", "All", "All", as_of)["regions"]
+        # Filtered to the region, nothing is booked yet: no business has data
+        result = dashboard("LATE ZONE", "All", "All", as_of)
+        assert result["regions"] == []
+        assert all(kpi is None for kpi in result["business_kpis"].values())
+        # Once the as-of day reaches the bookings, the region is there
+        assert "LATE REGION" in dashboard("All", "All", "All", date(2025, 7, 24))["regions"]
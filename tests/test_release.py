@@ -0,0 +1,70 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(repo_dir, "benchmarks"))
+
+# synthetic_data puts the repository on sys.path for the app modules below
+from synthetic_data import write_dataset  # noqa: E402
+
+import etl  # noqa: E402
+from data_loader import enable_copy_on_write  # noqa: E402
+from release_store import ReleaseStore  # noqa: E402
+import settings  # noqa: E402
+from settings import dataset_dir, keep_datasets  # noqa: E402
+
+# === RELEASE TESTS ===
+# etl.py publishes a release built from synthetic data (see benchmarks/synthetic_data.py)
+# in a temporary folder; the app is then started on it with prebuilt_data switched on.
+
+
+@pytest.fixture(scope="module")
+def release_dir(tmp_path_factory):
+    enable_copy_on_write()
+    data_dir = str(tmp_path_factory.mktemp("release"))
+    cwd = os.getcwd()
+    os.chdir(data_dir)
+    try:
+        write_dataset(data_dir, 2_000)
+        report = etl.run(force=True, parallel=False)
+    finally:
+        os.chdir(cwd)
+    assert report["status"] == "published", report
+    return data_dir
+
+
+def test_release_keeps_file_date_typed(release_dir, monkeypatch):
+    monkeypatch.chdir(release_dir)
+    dataset, messages = ReleaseStore(dataset_dir, keep_datasets).open_latest()
+    assert dataset is not None, messages
+    assert pd.api.types.is_datetime64_any_dtype(dataset["df"]["FILE_DATE"])
+    assert dataset["df"]["FILE_DATE"].notna().any()
+
+
+def test_release_report_has_every_timing(release_dir, monkeypatch):
+    monkeypatch.chdir(release_dir)
+    report = ReleaseStore(dataset_dir, keep_datasets).latest()["report"]
+    assert {"targets", "validate", "publish", "total"} <= set(report["timings"])
+    assert report["release"] == ReleaseStore(dataset_dir, keep_datasets).latest()["release"]
+
+
+def test_drr_page_renders_from_release(release_dir, monkeypatch):
+    from streamlit.testing.v1 import AppTest
+
+    monkeypatch.chdir(release_dir)
+    # AppTest runs Test.py in this process, so it imports the patched setting
+    monkeypatch.setattr(settings, "prebuilt_data", True)
+    at = AppTest.from_file(os.path.join(repo_dir, "Test.py"), default_timeout=120)
+    at.session_state["logged_in"] = True
+    at.session_state["username"] = "bench"
+    at.session_state["access"] = "Admin"
+    at.run()
+    at.radio[0].set_value("Detailed DRR").run()
+    assert not at.exception, [e.message for e in at.exception]
+    assert not at.error, [e.value for e in at.error]
+    assert any(box.label == "Select FILE_DATE Range" for box in at.date_input)
+    release = ReleaseStore(dataset_dir, keep_datasets).latest()["release"]
+    assert any(f"release {release}" in caption.value for caption in at.caption)
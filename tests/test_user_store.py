@@ -0,0 +1,122 @@
+import os
+import sqlite3
+import sys
+import time
+from contextlib import closing
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import user_store  # noqa: E402
+from user_store import UserStore  # noqa: E402
+
+# === USER STORE TESTS ===
+# Passwords are hashed with few PBKDF2 iterations here; verify_password reads the count
+# from the stored hash, so the checks are the same as with the production setting.
+
+
+@pytest.fixture(autouse=True)
+def fast_hashing(monkeypatch):
+    monkeypatch.setattr(user_store, "hash_iterations", 1_000)
+
+
+def write_csv(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("User Name,Password,Access\n")
+        f.writelines(f"{user},{password},{access}\n" for user, password, access in rows)
+
+
+@pytest.fixture
+def store(tmp_path):
+    csv_path = tmp_path / "Emp_base.csv"
+    write_csv(csv_path, [("admin", "bank@123", "Admin"), ("Nikita", "nikita@123", "Sales"), ("ÉLODIE", "pw", "")])
+    store = UserStore(str(tmp_path / "users.db"))
+    assert store.migrate_csv(str(csv_path)) == 3
+    return store, csv_path
+
+
+def test_csv_is_imported_once(store):
+    store, csv_path = store
+    write_csv(csv_path, [("admin", "changed", "Admin"), ("newcomer", "pw", "")])
+    assert store.migrate_csv(str(csv_path)) is None
+    # Later edits of the file change nothing, and no user is removed
+    assert store.authenticate("admin", "bank@123") == "Admin"
+    assert store.authenticate("admin", "changed") is None
+    assert store.authenticate("newcomer", "pw") is None
+    assert store.authenticate("Nikita", "nikita@123") == "Sales"
+
+
+def test_import_does_not_store_plain_passwords(store):
+    store, _ = store
+    with closing(sqlite3.connect(store.path)) as conn:
+        hashes = [row[0] for row in conn.execute("SELECT password_hash FROM users")]
+    assert all(stored.startswith("pbkdf2_sha256$") for stored in hashes)
+    assert "bank@123" not in "".join(hashes)
+
+
+def test_first_import_errors(tmp_path):
+    store = UserStore(str(tmp_path / "users.db"))
+    with pytest.raises(FileNotFoundError):
+        store.migrate_csv(str(tmp_path / "missing.csv"))
+    (tmp_path / "bad.csv").write_text("User Name,Secret\nadmin,x\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        store.migrate_csv(str(tmp_path / "bad.csv"))
+
+
+def test_lookup_ignores_case_and_spaces(store):
+    store, _ = store
+    assert store.authenticate("ADMIN", "bank@123") == "Admin"
+    assert store.authenticate("  nikita ", "nikita@123") == "Sales"
+    # Casefolding covers more than ASCII, unlike SQLite's NOCASE
+    assert store.authenticate("élodie", "pw") == ""
+    assert store.add_user("Straße", "pw") is True
+    assert store.authenticate("STRASSE", "pw") == ""
+    assert store.add_user("strasse", "other") is False
+
+
+def test_rejected_logins(store):
+    store, _ = store
+    assert store.authenticate("admin", "wrong") is None
+    assert store.authenticate("admin", "") is None
+    assert store.authenticate("admin", "BANK@123") is None
+    assert store.authenticate("nobody", "bank@123") is None
+    assert store.authenticate("", "") is None
+
+
+def test_set_password(store):
+    store, _ = store
+    assert store.set_password("ADMIN", "new secret") is True
+    assert store.authenticate("admin", "new secret") == "Admin"
+    assert store.authenticate("admin", "bank@123") is None
+    assert store.set_password("nobody", "x") is False
+
+
+def test_admin_changes(store):
+    store, _ = store
+    assert store.add_user("Ravi", "pw", "Sales") is True
+    assert store.set_access("ravi", "Admin") is True
+    assert store.authenticate("Ravi", "pw") == "Admin"
+    assert store.remove_user("RAVI") is True
+    assert store.authenticate("Ravi", "pw") is None
+    assert store.remove_user("Ravi") is False
+
+
+def test_version_1_database_is_upgraded(tmp_path):
+    # The schema before user_key: NOCASE usernames and a migrations table
+    path = str(tmp_path / "users.db")
+    with closing(sqlite3.connect(path)) as conn:
+        conn.executescript("""
+            CREATE TABLE users (username TEXT PRIMARY KEY COLLATE NOCASE, password_hash TEXT NOT NULL,
+                access TEXT NOT NULL DEFAULT '', updated_at REAL NOT NULL) WITHOUT ROWID;
+            CREATE TABLE migrations (name TEXT PRIMARY KEY, applied_at REAL NOT NULL);
+        """)
+        conn.execute("INSERT INTO users VALUES (?, ?, ?, ?)", ("Nikita", user_store.hash_password("changed"), "Sales", time.time()))
+        conn.execute("INSERT INTO migrations VALUES (?, ?)", ("import:Emp_base.csv", time.time()))
+        conn.commit()
+    csv_path = tmp_path / "Emp_base.csv"
+    write_csv(csv_path, [("Nikita", "nikita@123", "Sales")])
+    store = UserStore(path)
+    assert store.migrate_csv(str(csv_path)) is None
+    assert store.authenticate("NIKITA", "changed") == "Sales"
+    assert store.authenticate("nikita", "nikita@123") is None
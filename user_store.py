@@ -0,0 +1,245 @@
+import argparse
+import getpass
+import hashlib
+import hmac
+import os
+import sqlite3
+import sys
+import time
+import unicodedata
+from contextlib import closing
+
+import pandas as pd
+
+from settings import user_db
+
+# === USER STORE ===
+# Logins and password changes go to a small SQLite database instead of Emp_base.csv.
+# WAL mode lets any number of sessions read while one writes, and every change is a
+# single-row UPDATE, so simultaneous password changes can no longer overwrite each
+# other the way whole-file CSV rewrites did. Users are keyed by their casefolded name
+# (user_key), so the case-insensitive lookup is an index seek in any script, not only
+# ASCII as with SQLite's NOCASE. Passwords are stored as salted PBKDF2 hashes.
+# Emp_base.csv is imported once, on first start, and not read again after that; from
+# then on users are managed from the app's folder with:
+#   python user_store.py list
+#   python user_store.py add NAME [--access Admin]      asks for the password
+#   python user_store.py password NAME                  asks for the new password
+#   python user_store.py access NAME ACCESS
+#   python user_store.py remove NAME
+
+hash_iterations = 600_000
+busy_timeout = 30
+schema_version = 2
+
+# Statements run one by one: executescript would commit the upgrade's transaction
+schema = [
+    """CREATE TABLE IF NOT EXISTS users (
+        user_key TEXT PRIMARY KEY,
+        username TEXT NOT NULL,
+        password_hash TEXT NOT NULL,
+        access TEXT NOT NULL DEFAULT '',
+        updated_at REAL NOT NULL
+    ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS imports (
+        name TEXT PRIMARY KEY,
+        applied_at REAL NOT NULL
+    )""",
+]
+
+
+def user_key(username):
+    return unicodedata.normalize("NFKC", str(username).strip()).casefold()
+
+
+def hash_password(password, salt=None, iterations=None):
+    salt = salt or os.urandom(16)
+    iterations = iterations or hash_iterations
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+    return f"pbkdf2_sha256${iterations}${salt.hex()}${digest.hex()}"
+
+
+def verify_password(password, stored):
+    try:
+        algorithm, iterations, salt, digest = stored.split("$")
+    except ValueError:
+        return False
+    if algorithm != "pbkdf2_sha256":
+        return False
+    candidate = hashlib.pbkdf2_hmac("sha256", password.encode(), bytes.fromhex(salt), int(iterations))
+    return hmac.compare_digest(candidate.hex(), digest)
+
+
+class UserStore:
+    def __init__(self, path):
+        self.path = path
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if conn.execute("PRAGMA user_version").fetchone()[0] < schema_version:
+                    self._upgrade(conn)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _connect(self):
+        # A connection per call: Streamlit runs sessions on many threads, and opening
+        # SQLite is far cheaper than the password hashing around it
+        conn = sqlite3.connect(self.path, timeout=busy_timeout, isolation_level=None)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _upgrade(self, conn):
+        # Version 1 keyed users by username with NOCASE collation and recorded the CSV
+        # import in a migrations table; its users keep their password hashes, and an
+        # import done there is not repeated
+        tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        old_users, old_imports = [], []
+        if "users" in tables and "user_key" not in {col[1] for col in conn.execute("PRAGMA table_info(users)")}:
+            old_users = conn.execute("SELECT username, password_hash, access, updated_at FROM users").fetchall()
+            conn.execute("DROP TABLE users")
+        if "migrations" in tables:
+            old_imports = conn.execute("SELECT name, applied_at FROM migrations").fetchall()
+            conn.execute("DROP TABLE migrations")
+        for statement in schema:
+            conn.execute(statement)
+        conn.executemany(
+            "INSERT OR IGNORE INTO users VALUES (?, ?, ?, ?, ?)",
+            [(user_key(username), username, password_hash, access, updated_at) for username, password_hash, access, updated_at in old_users],
+        )
+        conn.executemany("INSERT OR IGNORE INTO imports VALUES (?, ?)", old_imports)
+        conn.execute(f"PRAGMA user_version = {schema_version}")
+
+    def migrate_csv(self, csv_path):
+        # One-time import of Emp_base.csv; returns the number of users imported, or
+        # None if it was imported before. Raises FileNotFoundError / ValueError when
+        # the first import cannot be done.
+        name = f"import:{os.path.basename(csv_path)}"
+        with closing(self._connect()) as conn:
+            if conn.execute("SELECT 1 FROM imports WHERE name = ?", (name,)).fetchone():
+                return None
+            users_df = pd.read_csv(csv_path)
+            pw_col = next((col for col in users_df.columns if col.strip().lower() == "password"), None)
+            if not pw_col:
+                raise ValueError(f"Password column not found in {os.path.basename(csv_path)}")
+            now = time.time()
+            rows = [
+                (user_key(user), str(user).strip(), hash_password(str(password).strip()), str(access) if pd.notna(access) else "", now)
+                for user, password, access in zip(
+                    users_df["User Name"],
+                    users_df[pw_col],
+                    users_df["Access"] if "Access" in users_df.columns else [""] * len(users_df),
+                )
+                if pd.notna(user) and str(user).strip()
+            ]
+            # BEGIN IMMEDIATE takes the write lock first, so two processes starting
+            # together cannot both import
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if conn.execute("SELECT 1 FROM imports WHERE name = ?", (name,)).fetchone():
+                    conn.execute("ROLLBACK")
+                    return None
+                # The first row of a repeated username wins, as with the CSV lookup
+                conn.executemany("INSERT OR IGNORE INTO users VALUES (?, ?, ?, ?, ?)", rows)
+                conn.execute("INSERT INTO imports VALUES (?, ?)", (name, now))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def authenticate(self, username, password):
+        # Returns the user's access level, or None if the username or password is wrong
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT password_hash, access FROM users WHERE user_key = ?", (user_key(username),)
+            ).fetchone()
+        if row is None or not verify_password(password.strip(), row[0]):
+            return None
+        return row[1]
+
+    def set_password(self, username, new_password):
+        # Single-row update; returns False if the user does not exist
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "UPDATE users SET password_hash = ?, updated_at = ? WHERE user_key = ?",
+                (hash_password(new_password.strip()), time.time(), user_key(username)),
+            )
+        return cursor.rowcount == 1
+
+    def set_access(self, username, access):
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "UPDATE users SET access = ?, updated_at = ? WHERE user_key = ?", (access, time.time(), user_key(username))
+            )
+        return cursor.rowcount == 1
+
+    def add_user(self, username, password, access=""):
+        # Returns False if a user of that name exists
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO users VALUES (?, ?, ?, ?, ?)",
+                (user_key(username), username.strip(), hash_password(password.strip()), access, time.time()),
+            )
+        return cursor.rowcount == 1
+
+    def remove_user(self, username):
+        with closing(self._connect()) as conn:
+            cursor = conn.execute("DELETE FROM users WHERE user_key = ?", (user_key(username),))
+        return cursor.rowcount == 1
+
+    def users(self):
+        # [(username, access, updated_at)] by username
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT username, access, updated_at FROM users ORDER BY user_key").fetchall()
+
+
+def ask_password():
+    password = getpass.getpass("Password: ")
+    if not password.strip():
+        sys.exit("Password cannot be empty")
+    if getpass.getpass("Repeat password: ") != password:
+        sys.exit("Passwords do not match")
+    return password
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the dashboard's users.")
+    parser.add_argument("--db", default=user_db, help=f"User database (default {user_db})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="List users and their access")
+    add = commands.add_parser("add", help="Add a user")
+    add.add_argument("username")
+    add.add_argument("--access", default="", help="e.g. Admin")
+    password = commands.add_parser("password", help="Set a user's password")
+    password.add_argument("username")
+    access = commands.add_parser("access", help="Set a user's access")
+    access.add_argument("username")
+    access.add_argument("access")
+    remove = commands.add_parser("remove", help="Remove a user")
+    remove.add_argument("username")
+    args = parser.parse_args(argv)
+
+    store = UserStore(args.db)
+    if args.command == "list":
+        for username, user_access, updated_at in store.users():
+            print(f"{username}\t{user_access or '-'}\t{time.strftime('%Y-%m-%d %H:%M', time.localtime(updated_at))}")
+        return 0
+    if args.command == "add":
+        done = store.add_user(args.username, ask_password(), args.access)
+    elif args.command == "password":
+        done = store.set_password(args.username, ask_password())
+    elif args.command == "access":
+        done = store.set_access(args.username, args.access)
+    else:
+        done = store.remove_user(args.username)
+    if not done:
+        print(f"User {args.username} {'already exists' if args.command == 'add' else 'not found'}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())